@@ -0,0 +1,394 @@
+# Filename: benchmark.py
+""" Repeatable benchmarks of ILLIXR Visualizer's load, slice and render
+    paths over synthetic traces from generate_trace.py or given
+    databases. Each trace is measured in a fresh process so its peak RSS
+    is its own. Results are saved as JSON with the commit they were
+    measured at, and --compare reports the change from earlier results.
+    The start of every launch, importing illixr_visualizer and
+    registering its illixr:// scheme, is held to a time budget: the exit
+    status is 1 if it runs over, or if the import loads pandas, plotly or
+    QtWebEngine, which are imported once the window is shown. """
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import numpy as np
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None # Peak RSS is not reported on Windows
+
+import generate_trace
+
+__author__ = 'Alanna Zoscak'
+
+IMPORT_BUDGET_MS = 300 # Median ms of the start-up before the QApplication, about twice that measured
+DEFERRED_MODULES = ('pandas', 'plotly', 'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets', 'PyQt5.QtWebChannel')
+SCHEME_MODULES = ('PyQt5.QtWebEngineCore',) # Loaded to register the scheme, which must precede the QApplication
+
+# Where viewer.html's payload decoder starts and ends in its script
+VIEWER_DECODER = ('var typedArrays = {', '// Keys of a trace holding one value per point')
+
+# Times JSON.parse of each page's figure JSON, which Plotly could draw as
+# is, against viewer.html's parseFigure of its payload, which JSON.parse
+# reads and the decoder expands into the same figure
+NODE_PARSE = """const fs = require('fs');
+eval(fs.readFileSync(process.argv[2], 'utf8'));
+const pages = JSON.parse(fs.readFileSync(process.argv[3], 'utf8'));
+const times = {};
+function time(stage, parse, text) {
+    const start = process.hrtime.bigint();
+    parse(text);
+    (times[stage] = times[stage] || []).push(Number(process.hrtime.bigint() - start) / 1e9);
+}
+for (let run = 0; run < Number(process.argv[4]); run++) {
+    for (const [stage, figJson, payload] of pages) {
+        time(stage + '_parse_json', JSON.parse, figJson);
+        time(stage + '_parse_payload', parseFigure, payload);
+    }
+}
+process.stdout.write(JSON.stringify(times));
+"""
+
+
+def peak_rss_kb():
+    """ Peak resident set size of this process in KiB, or None. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak # Bytes on macOS
+
+def import_time(runs : int):
+    """ Times the start of a launch in runs fresh processes: importing
+        illixr_visualizer, then registering its illixr:// scheme, which
+        Qt requires before the QApplication and so before the window is
+        shown. Returns the median ms, the modules loaded that should have
+        been deferred until the window is shown, and whether the scheme
+        was registered, which needs QtWebEngine; without it only the
+        import is timed. """
+    script = ("import json, sys, time\n"
+        "timerStart = time.perf_counter()\n"
+        "import illixr_visualizer\n"
+        "imported = sorted(sys.modules)\n"
+        "try:\n"
+        "    illixr_visualizer.register_url_scheme()\n"
+        "    registered = True\n"
+        "except ImportError:\n"
+        "    registered = False\n"
+        "print(json.dumps([(time.perf_counter() - timerStart) * 1000, registered, imported, sorted(sys.modules)]))\n")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    deferred = set()
+    registered = True
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], cwd=directory, capture_output=True,
+            text=True, check=True).stdout
+        ms, runRegistered, imported, modules = json.loads(output.splitlines()[-1])
+        times.append(ms)
+        registered = registered and runRegistered
+        deferred.update(module for module in imported if is_deferred(module, DEFERRED_MODULES))
+        deferred.update(module for module in modules if is_deferred(module, DEFERRED_MODULES) and
+            not is_deferred(module, SCHEME_MODULES))
+    return float(np.median(times)), sorted(deferred), registered
+
+def is_deferred(module : str, names : tuple):
+    """ Whether module is one of names or inside one of their packages. """
+    return any(module == name or module.startswith(name + '.') for name in names)
+
+def viewer_decoder():
+    """ viewer.html's payload decoder, the part of its script from its
+        typed array table to parseFigure, which needs no DOM. """
+    viewerPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'viewer.html')
+    with open(viewerPath) as viewerFile:
+        script = viewerFile.read()
+    first, last = VIEWER_DECODER
+    return script[script.index(first):script.index(last)]
+
+def display_parse_times(pages : list, repeat : int):
+    """ Times, in node, JSON.parse reading each (stage, JSON, payload)
+        page's figure JSON and viewer.html's parseFigure decoding its
+        payload, repeat times each. Returns {stage: [s, ...]}, empty if
+        node is not installed. """
+    node = shutil.which('node')
+    if node is None or not pages:
+        return {}
+    with tempfile.TemporaryDirectory() as scriptDir:
+        paths = [os.path.join(scriptDir, name) for name in ('decoder.js', 'pages.json', 'parse.js')]
+        for path, text in zip(paths, (viewer_decoder(), json.dumps(pages), NODE_PARSE)):
+            with open(path, 'w') as scriptFile:
+                scriptFile.write(text)
+        result = subprocess.run([node, paths[2], paths[0], paths[1], str(repeat)], capture_output=True, text=True,
+            check=True)
+    return json.loads(result.stdout)
+
+def git_revision():
+    """ Commit the working tree is at, and whether it has changes. """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=directory, capture_output=True,
+            text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=directory,
+            capture_output=True, text=True, check=True).stdout.strip() != ''
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+class StageTimes():
+    """ Wall clock times of each benchmarked stage over repeated runs. """
+    def __init__(self):
+        """ Starts with no stages timed. """
+        self.times = {}
+        self.peaks = {}
+    
+    def time(self, stage : str, function, *args, **kwargs):
+        """ Calls function, recording its duration under stage. Returns
+            what function returns. """
+        timerStart = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.times.setdefault(stage, []).append(time.perf_counter() - timerStart)
+        self.peaks[stage] = peak_rss_kb()
+        return result
+    
+    def add(self, stage : str, times : list):
+        """ Records durations measured in another process under stage. """
+        self.times.setdefault(stage, []).extend(times)
+        self.peaks[stage] = None
+    
+    def summary(self):
+        """ Median, 90th percentile and maximum of each stage, in s, with
+            the process's peak RSS once the stage had run. """
+        return {stage: {
+            'runs': len(times),
+            'median': float(np.median(times)),
+            'p90': float(np.percentile(times, 90)),
+            'max': float(np.max(times)),
+            'peakRssKb': self.peaks[stage]
+        } for stage, times in self.times.items()}
+
+
+def run_case(namePath : str, dataPaths : dict, pageSz : int, nPages : int, repeat : int):
+    """ Benchmarks one trace: reading each table, merging, sorting and
+        indexing them, writing and mapping the sidecar, loading it all at
+        once through the Model, the time to the first page drawn in memory
+        and in lazy mode, summarizing each plugin's latencies, then
+        slicing nPages pages spread over the trace, building their figures,
+        serializing them to JSON, to the display's payload and to HTML, and
+        parsing the JSON and decoding the payload again as the display
+        would, in node if it is installed. Returns the results, with the
+        median size of each page serialized. """
+    from illixr_export import figure_to_json, figure_to_payload
+    from illixr_model import PageRequest, VisualizerModel
+    from illixr_store import read_columns, TraceStore
+    
+    model = VisualizerModel()
+    stages = StageTimes()
+    rows = {}
+    for _ in range(repeat):
+        names, _ = stages.time('read_names', read_columns, namePath, model.pluginTable, model.nameColumns)
+        tables = []
+        for source, dataPath in dataPaths.items():
+            layout = model.source_layout(source)
+            columns, _ = stages.time('read_' + source, read_columns, dataPath, layout.table, model.source_columns(layout))
+            tables.append(model.source_table(source, layout, columns))
+            rows[source] = len(columns[layout.start])
+        store = stages.time('merge_sort_index', TraceStore.from_tables,
+            names[model.pluginID], names[model.pluginName], tables)
+        del tables, columns
+        
+        with tempfile.TemporaryDirectory() as sidecarRoot:
+            sidecar = os.path.join(sidecarRoot, 'trace')
+            stages.time('sidecar_save', store.save, sidecar)
+            stages.time('sidecar_open', TraceStore.open, sidecar)
+    
+    # The whole load, reading every table at once in one thread per core
+    model.cacheRoot = None
+    for _ in range(repeat):
+        stages.time('load', model.load, namePath, dataPaths)
+    
+    # Time to the first page drawn: loading everything into memory, and in
+    # lazy mode, building the sidecar database on a first load or opening
+    # it on later ones. Lazy first loads read every row once to index it.
+    # plotly is warmed up first, as the window does before a load
+    import plotly.graph_objs as go
+    figure_to_payload(go.Figure([go.Scattergl(x=[0], y=[0]), go.Heatmap(z=[[0]])]))
+    def first_paint(lazy : bool):
+        store, _ = model.load(namePath, dataPaths, lazy=lazy)
+        model.create_fig(PageRequest(store.index.minStart // pageSz, pageSz, list(store.plugin_order()),
+            model.timeBase, store, False))
+        if lazy:
+            store.connection.close()
+    for _ in range(repeat):
+        stages.time('first_paint', first_paint, False)
+        with tempfile.TemporaryDirectory() as cacheRoot:
+            model.cacheRoot = cacheRoot
+            stages.time('lazy_first_paint', first_paint, True)
+            stages.time('lazy_reopen_paint', first_paint, True)
+        model.cacheRoot = None
+    
+    for _ in range(repeat):
+        stages.time('statistics', model.statistics, store)
+    
+    # Pages spread evenly over the trace
+    pluginOrder = list(store.plugin_order())
+    totalPages = store.page_count(pageSz)
+    pages = np.unique(np.linspace(store.index.minStart // pageSz, totalPages - 1, nPages).astype(np.int64)).tolist()
+    drawn = 0
+    sizes = {}
+    parsed = [] # (stage, JSON, payload) of each page drawn, parsed in node
+    for run in range(repeat):
+        for page in pages + [None]:
+            stage = 'page' if page is not None else 'overview'
+            request = PageRequest(page, pageSz, pluginOrder, model.timeBase, store, False)
+            if page is not None:
+                stages.time('window', store.window, page * pageSz, (page + 1) * pageSz)
+            fig = stages.time(stage + '_figure', model.create_fig, request)
+            if fig is None:
+                continue
+            drawn += 1
+            figJson = stages.time(stage + '_to_json', figure_to_json, fig)
+            payload = stages.time(stage + '_to_payload', figure_to_payload, fig)
+            stages.time(stage + '_to_html', fig.to_html, include_plotlyjs=False)
+            if run == 0:
+                parsed.append((stage, figJson, payload))
+            sizes.setdefault(stage + '_json', []).append(len(figJson))
+            sizes.setdefault(stage + '_payload', []).append(len(payload))
+    for stage, times in display_parse_times(parsed, repeat).items():
+        stages.add(stage, times)
+    
+    return {
+        'rows': rows,
+        'storeBytes': store.nbytes,
+        'pageSz': pageSz,
+        'pages': len(pages),
+        'pagesDrawn': drawn // repeat,
+        'bytes': {name: int(np.median(lengths)) for name, lengths in sizes.items()},
+        'stages': stages.summary(),
+        'peakRssKb': peak_rss_kb()
+    }
+
+
+def trace_paths(dataDir : str, rows : int, seed : int):
+    """ Paths of a synthetic trace of about rows rows, generated into
+        dataDir unless an earlier run already did. """
+    outDir = os.path.join(dataDir, f"{rows:.0e}".replace('+', '') + '_seed' + str(seed))
+    marker = os.path.join(outDir, 'complete')
+    if not os.path.exists(marker):
+        print("Generating " + f"{rows:,}" + " rows into " + outDir, file=sys.stderr)
+        generate_trace.generate(generate_trace.TraceSpec(rows=rows, seed=seed), outDir)
+        open(marker, 'w').close()
+    return (os.path.join(outDir, 'plugin_name.sqlite'), {
+        'switchboard': os.path.join(outDir, 'switchboard_callback.sqlite'),
+        'threadloop': os.path.join(outDir, 'threadloop_iteration.sqlite')
+    })
+
+def compare(results : dict, baseline : dict):
+    """ Prints each stage's median relative to the baseline's. """
+    before = {case['name']: case for case in baseline['cases']}
+    print("Compared with " + str(baseline.get('commit')) + ":")
+    for case in results['cases']:
+        if case['name'] not in before:
+            continue
+        for stage, summary in case['stages'].items():
+            old = before[case['name']]['stages'].get(stage)
+            if old is None or old['median'] == 0:
+                continue
+            ratio = summary['median'] / old['median']
+            print("  " + case['name'].ljust(12) + stage.ljust(24) + f"{old['median'] * 1000:10.2f}" + " ms -> " +
+                f"{summary['median'] * 1000:10.2f}" + " ms  x" + f"{ratio:.2f}" + ("  SLOWER" if ratio > 1.1 else ""))
+
+
+def main(argv : list):
+    """ Command line entry point. Returns the exit status. """
+    parser = argparse.ArgumentParser(description="Benchmark ILLIXR Visualizer's load, slice and render paths.")
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e4, 1e5, 1e6],
+        help="sizes of synthetic traces to benchmark (default: 1e4 1e5 1e6)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic traces (default: 0)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'illixr_visualizer_benchmark'),
+        help="directory synthetic traces are generated into and reused from")
+    parser.add_argument('--plugin-db', help="benchmark these databases instead of synthetic traces")
+    parser.add_argument('--switchboard-db')
+    parser.add_argument('--threadloop-db')
+    parser.add_argument('--page-size', type=int, default=1000000, help="ns per page (default: 1000000)")
+    parser.add_argument('--pages', type=int, default=20, help="pages sliced and rendered per trace (default: 20)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each stage (default: 3)")
+    parser.add_argument('--out', help="file to save the results to as JSON")
+    parser.add_argument('--compare', help="earlier results to compare with")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS,
+        help="median ms importing illixr_visualizer and registering its scheme may take (default: " +
+        str(IMPORT_BUDGET_MS) + ")")
+    parser.add_argument('--import-only', action='store_true', help="only check the import budget")
+    args = parser.parse_args(argv)
+    
+    if args.plugin_db:
+        dataPaths = {source: path for source, path in
+            (('switchboard', args.switchboard_db), ('threadloop', args.threadloop_db)) if path}
+        if not dataPaths:
+            parser.error("at least one of --switchboard-db and --threadloop-db is required")
+        cases = [(os.path.basename(os.path.dirname(os.path.abspath(args.plugin_db))), args.plugin_db, dataPaths)]
+    else:
+        cases = [(f"{int(rows):.0e}".replace('+', ''),) + trace_paths(args.data_dir, int(rows), args.seed)
+            for rows in args.rows]
+    if args.import_only:
+        cases = []
+    
+    commit, dirty = git_revision()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'cases': []
+    }
+    
+    importMs, deferred, registered = import_time(max(args.repeat, 5))
+    results['import'] = {'medianMs': importMs, 'budgetMs': args.import_budget, 'deferredModules': deferred,
+        'schemeRegistered': registered}
+    withinBudget = importMs <= args.import_budget and not deferred
+    print(("import illixr_visualizer and register illixr://: " if registered else "import illixr_visualizer: ") +
+        f"{importMs:.1f}" + " ms median, budget " + f"{args.import_budget:.0f}" + " ms" +
+        ("" if withinBudget else "  OVER BUDGET"))
+    if not registered:
+        print("  QtWebEngine is not available: the scheme's registration was not timed")
+    if deferred:
+        print("  loaded modules deferred until the window is shown: " + ", ".join(deferred))
+    
+    for name, namePath, dataPaths in cases:
+        # A fresh process per trace, so peak RSS is the trace's own
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            case = pool.submit(run_case, namePath, dataPaths, args.page_size, args.pages, args.repeat).result()
+        case['name'] = name
+        results['cases'].append(case)
+        
+        print(name + ": " + f"{sum(case['rows'].values()):,}" + " rows, peak RSS " +
+            f"{(case['peakRssKb'] or 0) / 1024:,.0f}" + " MiB")
+        for stage, summary in case['stages'].items():
+            print("  " + stage.ljust(24) + f"{summary['median'] * 1000:10.2f}" + " ms median  " +
+                f"{summary['max'] * 1000:10.2f}" + " ms max")
+        for stage in ('page', 'overview'):
+            if stage + '_json' in case['bytes']:
+                print("  " + (stage + " bytes").ljust(24) + f"{case['bytes'][stage + '_json']:10,}" + " JSON  " +
+                    f"{case['bytes'][stage + '_payload']:10,}" + " payload")
+    
+    if args.out:
+        with open(args.out, 'w') as outFile:
+            json.dump(results, outFile, indent=1)
+    if args.compare:
+        with open(args.compare) as baselineFile:
+            compare(results, json.load(baselineFile))
+    return 0 if withinBudget else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,253 @@
+# Filename: generate_trace.py
+""" Writes synthetic ILLIXR databases for exercising ILLIXR Visualizer at
+    scale. The plugin_name, switchboard_callback and threadloop_iteration
+    databases use the same schemas as ILLIXR's logs in metrics/, and scale
+    from 10^4 to 10^8 rows in bounded memory.
+    
+    Threadloop plugins iterate periodically; an iteration that overruns
+    its period skips the periods it overran. Switchboard plugins run a
+    callback shortly after each iteration of a threadloop plugin they
+    subscribe to. Rows are written in completion order, as ILLIXR logs
+    them. """
+
+from math import ceil
+import argparse
+import numpy as np
+import os
+import sqlite3
+import sys
+import time
+
+__author__ = 'Alanna Zoscak'
+
+# Schemas of ILLIXR's logs
+SCHEMAS = {
+    'plugin_name': 'CREATE TABLE plugin_name(plugin_id INTEGER, plugin_name TEXT)',
+    'switchboard_callback': ('CREATE TABLE switchboard_callback(plugin_id INTEGER, iteration_no INTEGER, ' +
+        'cpu_time_start INTEGER, cpu_time_stop INTEGER, wall_time_start INTEGER, wall_time_stop INTEGER)'),
+    'threadloop_iteration': ('CREATE TABLE threadloop_iteration(plugin_id INTEGER, iteration_no INTEGER, ' +
+        'skips INTEGER, cpu_time_start INTEGER, cpu_time_stop INTEGER, wall_time_start INTEGER, wall_time_stop INTEGER)')
+}
+
+# Plugin names of an ILLIXR run, suffixed when more plugins are asked for
+PLUGIN_NAMES = ['offline_imu_cam', 'kimera_vio', 'imu_integrator', 'gldemo', 'timewarp_gl', 'debugview',
+    'audio_encoding', 'audio_decoding', 'ground_truth_slam', 'pose_prediction', 'gtsam_integrator', 'offload_data']
+
+OVERLAPS = ('random', 'aligned', 'disjoint')
+
+WALL_EPOCH = 1617158436000000000 # Wall clock at the start of the trace, in ns since the epoch
+
+
+class TraceSpec():
+    """ The plugins of a synthetic trace and how they are scheduled.
+        Threadloop plugin i runs every periods[i] ns for roughly
+        duties[i] of its period, starting at phases[i]. Switchboard
+        plugin j runs a callback of about callbackDurs[j] ns, latencies[j]
+        ns after each iteration of threadloop plugin publishers[j]. """
+    def __init__(self, plugins=12, rows=10**6, switchboardShare=0.25, periodRange=(10**6, 10**8),
+            dutyRange=(0.05, 0.6), jitter=0.25, overlap='random', seed=0):
+        """ Draws a trace of about rows rows over plugins plugins, of which
+            switchboardShare are switchboard plugins. Periods are drawn
+            log-uniformly from periodRange and duty cycles uniformly from
+            dutyRange. Durations vary lognormally with sigma jitter.
+            overlap is one of OVERLAPS: random phases, every plugin
+            starting in phase, or plugins staggered into disjoint slots
+            of a shared period. """
+        if plugins < 2:
+            raise ValueError("A trace needs at least two plugins")
+        if overlap not in OVERLAPS:
+            raise ValueError("overlap must be one of " + ", ".join(OVERLAPS))
+        rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.jitter = jitter
+        self.overlap = overlap
+        
+        nSwitchboard = min(max(int(round(plugins * switchboardShare)), 0), plugins - 1)
+        nThreadloop = plugins - nSwitchboard
+        self.names = [PLUGIN_NAMES[i % len(PLUGIN_NAMES)] + ('' if i < len(PLUGIN_NAMES) else '_' + str(i // len(PLUGIN_NAMES)))
+            for i in range(plugins)]
+        self.threadloopIds = np.arange(1, nThreadloop + 1)
+        self.switchboardIds = np.arange(nThreadloop + 1, plugins + 1)
+        
+        # Threadloop schedules
+        if overlap == 'disjoint':
+            # One shared period, each plugin confined to its own slot of it
+            period = np.exp(rng.uniform(np.log(periodRange[0]), np.log(periodRange[1])))
+            self.periods = np.full(nThreadloop, int(period))
+            self.duties = rng.uniform(dutyRange[0], dutyRange[1], nThreadloop) / nThreadloop
+            self.phases = (np.arange(nThreadloop) * self.periods // nThreadloop).astype(np.int64)
+        else:
+            self.periods = np.exp(rng.uniform(np.log(periodRange[0]), np.log(periodRange[1]), nThreadloop)).astype(np.int64)
+            self.duties = rng.uniform(dutyRange[0], dutyRange[1], nThreadloop)
+            if overlap == 'aligned':
+                self.phases = np.zeros(nThreadloop, dtype=np.int64)
+            else:
+                self.phases = (rng.random(nThreadloop) * self.periods).astype(np.int64)
+        
+        # Switchboard subscriptions
+        self.publishers = rng.integers(0, nThreadloop, nSwitchboard)
+        self.latencies = (rng.uniform(0.001, 0.01, nSwitchboard) * self.periods[self.publishers]).astype(np.int64)
+        self.callbackDurs = (rng.uniform(0.001, 0.05, nSwitchboard) * self.periods[self.publishers]).astype(np.int64)
+        if overlap == 'disjoint':
+            # Callbacks stay inside their publisher's slot
+            self.latencies //= nThreadloop
+            self.callbackDurs //= nThreadloop
+        
+        # Long enough for the requested number of rows
+        rate = np.sum(1 / self.periods) + np.sum(1 / self.periods[self.publishers])
+        self.duration = int(ceil(rows / rate))
+    
+    def iterations(self, plugin : int, start : int, end : int, rng):
+        """ Iterations of threadloop plugin (an index into threadloopIds)
+            scheduled in [start, end). Returns iteration numbers, skips,
+            CPU start and stop times and wall durations. """
+        period = self.periods[plugin]
+        phase = self.phases[plugin]
+        first = max(ceil((start - phase) / period), 0)
+        last = max(ceil((end - phase) / period), 0)
+        slots = np.arange(first, last, dtype=np.int64)
+        
+        # Lognormal durations around the plugin's duty cycle
+        durs = period * self.duties[plugin] * rng.lognormal(0, self.jitter, len(slots))
+        
+        # An iteration overrunning its period skips the periods it overran
+        overrun = (durs // period).astype(np.int64)
+        blockedUntil = np.maximum.accumulate(slots + overrun)
+        kept = np.ones(len(slots), dtype=bool)
+        kept[1:] = blockedUntil[:-1] < slots[1:]
+        slots, durs, overrun = slots[kept], durs[kept], overrun[kept]
+        
+        # Iterations end before their next period, or in the disjoint layout before the next plugin's slot
+        limit = period * (0.95 if self.overlap != 'disjoint' else 0.95 / len(self.periods))
+        durs = np.minimum(durs, (overrun + 1) * limit).astype(np.int64)
+        starts = phase + slots * period
+        wallDurs = (durs * rng.uniform(1, 3, len(slots))).astype(np.int64)
+        return slots, overrun, starts, starts + np.maximum(durs, 1), wallDurs
+    
+    def plugin_rows(self):
+        """ Rows of the plugin_name table. """
+        return [(i + 1, name) for i, name in enumerate(self.names)]
+
+
+def _completion_order(columns : list, stops):
+    """ Sorts rows, given as a list of columns, by their stop times. """
+    order = np.argsort(stops, kind='stable')
+    return [column[order] for column in columns]
+
+def _insert(connection, table : str, columns : list, batchSz=100000):
+    """ Inserts rows, given as a list of NumPy columns, in batches. """
+    placeholders = ', '.join('?' * len(columns))
+    for first in range(0, len(columns[0]), batchSz):
+        rows = zip(*(column[first:first + batchSz].tolist() for column in columns))
+        connection.executemany('INSERT INTO ' + table + ' VALUES (' + placeholders + ')', rows)
+
+def _open_database(path : str, table : str):
+    """ Creates a database holding an empty table, replacing any previous
+        file. Durability is traded for insert speed. """
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode = OFF')
+    connection.execute('PRAGMA synchronous = OFF')
+    connection.execute(SCHEMAS[table])
+    return connection
+
+def generate(spec : TraceSpec, outDir : str, windowSz=None, progress=None):
+    """ Writes plugin_name.sqlite, switchboard_callback.sqlite and
+        threadloop_iteration.sqlite for spec into outDir. The trace is
+        generated one time window at a time, each holding about 10^6
+        rows, so memory stays bounded whatever the trace's length. If
+        given, progress(rowsWritten) is called after each window. Returns
+        the number of data rows written. """
+    os.makedirs(outDir, exist_ok=True)
+    paths = {table: os.path.join(outDir, table + '.sqlite') for table in SCHEMAS}
+    connections = {table: _open_database(path, table) for table, path in paths.items()}
+    try:
+        connections['plugin_name'].executemany('INSERT INTO plugin_name VALUES (?, ?)', spec.plugin_rows())
+        
+        if windowSz is None:
+            rate = np.sum(1 / spec.periods) + np.sum(1 / spec.periods[spec.publishers])
+            windowSz = max(int(10**6 / rate), int(spec.periods.max()))
+        rowsWritten = 0
+        iterationNos = np.zeros(len(spec.publishers), dtype=np.int64)
+        for window, start in enumerate(range(0, spec.duration, windowSz)):
+            end = min(start + windowSz, spec.duration)
+            rng = np.random.default_rng((spec.seed, window))
+            threadloop = []
+            switchboard = []
+            for plugin, pluginId in enumerate(spec.threadloopIds):
+                slots, skips, starts, stops, wallDurs = spec.iterations(plugin, start, end, rng)
+                threadloop.append((np.full(len(slots), pluginId), slots, skips, starts, stops,
+                    WALL_EPOCH + starts, WALL_EPOCH + starts + wallDurs))
+                
+                # Callbacks of subscribers, triggered by each iteration's completion
+                for subscriber in np.flatnonzero(spec.publishers == plugin):
+                    durs = np.maximum(spec.callbackDurs[subscriber] * rng.lognormal(0, spec.jitter, len(stops)), 1)
+                    cbStarts = stops + spec.latencies[subscriber]
+                    cbStops = cbStarts + durs.astype(np.int64)
+                    wallStops = cbStarts + (durs * rng.uniform(1, 3, len(stops))).astype(np.int64)
+                    switchboard.append((np.full(len(stops), spec.switchboardIds[subscriber]),
+                        iterationNos[subscriber] + np.arange(len(stops)), cbStarts, cbStops,
+                        WALL_EPOCH + cbStarts, WALL_EPOCH + wallStops))
+                    iterationNos[subscriber] += len(stops)
+            
+            for table, parts, stopColumn in (('threadloop_iteration', threadloop, 4), ('switchboard_callback', switchboard, 3)):
+                if not parts:
+                    continue
+                columns = [np.concatenate(column) for column in zip(*parts)]
+                _insert(connections[table], table, _completion_order(columns, columns[stopColumn]))
+                rowsWritten += len(columns[0])
+            if progress is not None:
+                progress(rowsWritten)
+        
+        for connection in connections.values():
+            connection.commit()
+    finally:
+        for connection in connections.values():
+            connection.close()
+    return rowsWritten
+
+
+def main(argv : list):
+    """ Command line entry point. Returns the exit status. """
+    parser = argparse.ArgumentParser(description="Write synthetic ILLIXR databases.")
+    parser.add_argument('--out', required=True, help="directory to write the databases to")
+    parser.add_argument('--rows', type=float, default=1e6, help="approximate number of data rows (default: 1e6)")
+    parser.add_argument('--plugins', type=int, default=12, help="number of plugins (default: 12)")
+    parser.add_argument('--switchboard-share', type=float, default=0.25,
+        help="share of plugins that are switchboard callbacks (default: 0.25)")
+    parser.add_argument('--period', type=float, nargs=2, default=(1e6, 1e8), metavar=('MIN', 'MAX'),
+        help="range of threadloop periods in ns (default: 1e6 1e8)")
+    parser.add_argument('--duty', type=float, nargs=2, default=(0.05, 0.6), metavar=('MIN', 'MAX'),
+        help="range of threadloop duty cycles (default: 0.05 0.6)")
+    parser.add_argument('--jitter', type=float, default=0.25, help="lognormal sigma of durations (default: 0.25)")
+    parser.add_argument('--overlap', choices=OVERLAPS, default='random', help="how plugins overlap (default: random)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    
+    try:
+        spec = TraceSpec(
+            plugins = args.plugins,
+            rows = int(args.rows),
+            switchboardShare = args.switchboard_share,
+            periodRange = (int(args.period[0]), int(args.period[1])),
+            dutyRange = tuple(args.duty),
+            jitter = args.jitter,
+            overlap = args.overlap,
+            seed = args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    
+    timerStart = time.perf_counter()
+    def progress(rowsWritten):
+        print("\r" + f"{rowsWritten:,}" + " rows", end='', file=sys.stderr, flush=True)
+    rowsWritten = generate(spec, args.out, progress=progress)
+    print(file=sys.stderr)
+    print("Wrote " + f"{rowsWritten:,}" + " rows over " + f"{spec.duration:,}" + " ns to " + args.out + " in " +
+        f"{time.perf_counter() - timerStart:.1f}" + " s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,191 @@
+# Filename: illixr_cli.py
+""" Headless command line of ILLIXR Visualizer: renders a trace's pages to
+    Plotly JSON, or streams it to a Chrome or Perfetto trace, without a
+    display or QtWebEngine. Run as python illixr_cli.py export ..., or
+    equivalently python illixr_visualizer.py export ... """
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import ceil
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import sys
+
+from illixr_store import MalformedDatabaseError, sidecar_directory, SOURCES, TraceStore
+from illixr_export import figure_to_json
+from illixr_model import PageRequest, VisualizerModel
+
+__author__ = 'Alanna Zoscak'
+
+
+# Model and store of a headless export process, set by _export_init
+_exportModel = None
+_exportStore = None
+
+def _export_init(sidecar : str, timeBase : str):
+    """ Initializes a headless export process by memory-mapping the
+        sidecar, so every process shares the page cache's copy of it. """
+    global _exportModel, _exportStore
+    _exportModel = VisualizerModel()
+    _exportModel.timeBase = timeBase
+    _exportStore = TraceStore.open(sidecar)
+
+def _export_page(page : int, pageSz : int, pluginOrder : list, outDir : str, fmt : str):
+    """ Renders one page to a standalone file in outDir. Returns the page's
+        manifest entry, or None if no data falls on the page. """
+    request = PageRequest(
+        page = page,
+        pageSz = pageSz,
+        pluginOrder = pluginOrder,
+        timeBase = _exportModel.timeBase,
+        store = _exportStore,
+        prefetch = False
+    )
+    fig = _exportModel.create_fig(request)
+    if fig is None:
+        return None
+    start = page * pageSz
+    fig.layout.title = "Page " + str(page) + ": [" + f"{start:,}" + ", " + f"{start + pageSz:,}" + ") ns"
+    fileName = "page_" + f"{page:06d}" + "." + fmt
+    with open(os.path.join(outDir, fileName), 'w') as pageFile:
+        if fmt == 'html':
+            pageFile.write(fig.to_html(include_plotlyjs='directory'))
+        else:
+            pageFile.write(figure_to_json(fig))
+    return {'page': page, 'start': start, 'end': start + pageSz, 'file': fileName}
+
+def export_main(argv : list):
+    """ Headless entry point: python illixr_visualizer.py export ...
+        Loads the databases through the Model and renders every page
+        overlapping the chosen time range to standalone HTML or JSON in a
+        pool of processes that map the loaded trace's sidecar, or streams
+        the intervals starting in it to a Chrome or Perfetto trace. Needs
+        no display. Returns the exit status. """
+    parser = argparse.ArgumentParser(
+        prog = 'illixr_visualizer.py export',
+        description = "Render ILLIXR Visualizer pages without a display."
+    )
+    parser.add_argument('--plugin-db', required=True, help="database with plugin names")
+    parser.add_argument('--switchboard-db', help="database with switchboard logs")
+    parser.add_argument('--threadloop-db', help="database with threadloop logs")
+    parser.add_argument('--timewarp-gpu-db', help="database with timewarp GPU times, drawn as an extra lane")
+    parser.add_argument('--check-queues-db', help="database with switchboard queue checks, drawn as an extra lane")
+    parser.add_argument('--mtp-record-db', help="database with motion-to-photon records, drawn as vsync markers")
+    parser.add_argument('--time-base', choices=('cpu', 'wall'), default='cpu',
+        help="clock times are taken from (default: cpu); GPU times and vsync are logged in wall clock time only")
+    parser.add_argument('--out', required=True, help="directory to write pages or the trace to")
+    parser.add_argument('--start', type=int, default=None, help="first ns to export (default: start of trace)")
+    parser.add_argument('--end', type=int, default=None, help="ns to export up to (default: end of trace)")
+    parser.add_argument('--page-size', type=int, default=1000000, help="ns per page (default: 1000000)")
+    parser.add_argument('--format', choices=('html', 'json', 'chrome', 'perfetto'), default='html',
+        help="page file format, or chrome or perfetto for one trace file of the intervals")
+    parser.add_argument('--plugins', nargs='+', help="plugins written to a trace file (default: all)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="rendering processes (default: one per core)")
+    args = parser.parse_args(argv)
+    
+    dataPaths = {source: getattr(args, source + '_db') for source in SOURCES if getattr(args, source + '_db')}
+    if 'switchboard' not in dataPaths and 'threadloop' not in dataPaths:
+        parser.error("at least one of --switchboard-db and --threadloop-db is required")
+    if args.page_size <= 0 or args.jobs <= 0:
+        parser.error("--page-size and --jobs must be positive")
+    
+    model = VisualizerModel()
+    model.timeBase = args.time_base
+    timerStart = time.perf_counter()
+    try:
+        store, summary = model.load(args.plugin_db, dataPaths)
+    except MalformedDatabaseError as e:
+        print("illixr_visualizer.py export: " + str(e), file=sys.stderr)
+        return 1
+    print(summary)
+    
+    if args.format in ('chrome', 'perfetto'):
+        fmt, extension = {'chrome': ('json', '.json'), 'perfetto': ('perfetto', '.perfetto-trace')}[args.format]
+        path = os.path.join(args.out, 'trace' + extension)
+        try:
+            os.makedirs(args.out, exist_ok=True)
+            written = model.export(store, path, fmt, args.start, args.end, args.plugins)
+        except OSError as e:
+            print("illixr_visualizer.py export: " + str(e), file=sys.stderr)
+            return 1
+        print("Exported " + f"{written:,}" + " intervals to " + path + " in " +
+            f"{time.perf_counter() - timerStart:.2f}" + " s")
+        return 0
+    
+    # Rendering processes map the sidecar; write one if caching is off
+    tempDir = None
+    sidecar = None
+    if model.cacheRoot is not None:
+        sidecar = sidecar_directory(model.cacheRoot, args.plugin_db, dataPaths, model.sidecar_columns(dataPaths))
+    if sidecar is None or TraceStore.open(sidecar) is None:
+        tempDir = tempfile.mkdtemp(prefix='illixr_visualizer_')
+        sidecar = os.path.join(tempDir, 'trace')
+        store.save(sidecar)
+    
+    try:
+        os.makedirs(args.out, exist_ok=True)
+        
+        # Pages overlapping [start, end)
+        start = store.index.minStart if args.start is None else args.start
+        end = store.index.maxStop + 1 if args.end is None else args.end
+        pages = range(max(start, 0) // args.page_size, ceil(end / args.page_size))
+        pluginOrder = list(store.plugin_order())
+        
+        if args.format == 'html':
+            # Pages share one copy of plotly.js
+            from plotly.offline import get_plotlyjs
+            with open(os.path.join(args.out, 'plotly.min.js'), 'w') as jsFile:
+                jsFile.write(get_plotlyjs())
+        
+        # Contiguous runs of pages per task keep each process's reads local
+        chunkSz = max(1, len(pages) // (args.jobs * 8))
+        with ProcessPoolExecutor(args.jobs, initializer=_export_init, initargs=(sidecar, model.timeBase)) as pool:
+            entries = pool.map(_export_page, pages, repeat(args.page_size), repeat(pluginOrder),
+                repeat(args.out), repeat(args.format), chunksize=chunkSz)
+            entries = [entry for entry in entries if entry is not None]
+        
+        # Whole trace overview next to the pages
+        overview = model.create_fig(PageRequest(None, args.page_size, pluginOrder, model.timeBase, store, False))
+        overviewFile = None
+        if overview is not None:
+            overviewFile = 'overview.' + args.format
+            with open(os.path.join(args.out, overviewFile), 'w') as pageFile:
+                if args.format == 'html':
+                    pageFile.write(overview.to_html(include_plotlyjs='directory'))
+                else:
+                    pageFile.write(figure_to_json(overview))
+        
+        manifest = {
+            'pluginDb': os.path.abspath(args.plugin_db),
+            'dataDbs': {source: os.path.abspath(path) for source, path in dataPaths.items()},
+            'timeBase': model.timeBase,
+            'timeOrigin': store.origin,
+            'pageSize': args.page_size,
+            'pluginOrder': pluginOrder,
+            'overview': overviewFile,
+            'pages': entries
+        }
+        with open(os.path.join(args.out, 'manifest.json'), 'w') as manifestFile:
+            json.dump(manifest, manifestFile, indent=1)
+    except OSError as e:
+        print("illixr_visualizer.py export: " + str(e), file=sys.stderr)
+        return 1
+    finally:
+        if tempDir is not None:
+            shutil.rmtree(tempDir, ignore_errors=True)
+    
+    print("Exported " + str(len(entries)) + " pages to " + args.out + " in " +
+        f"{time.perf_counter() - timerStart:.2f}" + " s")
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] != ['export']:
+        print("usage: illixr_cli.py export [-h] ...", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(export_main(sys.argv[2:]))
@@ -0,0 +1,324 @@
+# Filename: illixr_export.py
+""" Exporters of ILLIXR Visualizer's Model: streams a store's intervals to
+    a Chrome trace-event JSON file or a Perfetto protobuf trace, and
+    serializes figures to Plotly JSON or the display's compact payload. """
+
+import base64
+import json
+import numpy as np
+import os
+
+from illixr_store import SOURCES, TraceEvents
+
+__author__ = 'Alanna Zoscak'
+
+
+class TraceExporter():
+    """ Part of ILLIXR Visualizer's Model.
+        Streams a store's intervals to a Chrome trace-event JSON file or a
+        Perfetto protobuf trace, viewable in Perfetto or chrome://tracing.
+        Each plugin is a named track. Both viewers need a track's slices
+        to nest, so intervals of a plugin that overlap without nesting,
+        such as its switchboard callbacks and threadloop iterations, go
+        to extra tracks named "plugin (2)" and so on. Intervals are read
+        and encoded a chunk at a time, numpy building each chunk's bytes
+        as a whole, so memory stays bounded and no event is formatted on
+        its own. Times are in ns after the store's origin, as plotted;
+        the JSON records the origin. """
+    formats = {'json': "Chrome trace (*.json)", 'perfetto': "Perfetto trace (*.perfetto-trace)"}
+    chunkSz = 2**16 # Intervals encoded at once
+    
+    def __init__(self, store, fmt : str):
+        """ Prepares to export the store in the format fmt, 'json' or
+            'perfetto'. """
+        self.store = store
+        self.fmt = fmt
+        self.tracks = {}    # (code, level) -> track number, from 1
+        self.frontiers = {} # Code -> latest stop on each of its tracks
+        self.ranks = {name: rank for rank, name in enumerate(store.plugin_order())}
+        
+        # The category of each source, in both formats' encodings
+        self.categories = self._table([json.dumps(source)[1:-1].encode() for source in SOURCES])
+    
+    def write(self, path : str, a=None, b=None, plugins=None, progress=None):
+        """ Writes the intervals starting in [a, b), or in the whole trace,
+            of the plugins named in plugins, or of every plugin, to path.
+            The file is written beside path and renamed into place when
+            complete. If given, progress(percent, message) is called after
+            each chunk and may raise to abort the export. Returns the
+            number of intervals written. """
+        if progress is None:
+            progress = lambda percent, message: None
+        codes = None
+        if plugins is not None:
+            codes = np.flatnonzero(np.isin(self.store.names, list(plugins)))
+        tempPath = path + '.tmp' + str(os.getpid())
+        written = 0
+        try:
+            with open(tempPath, 'wb') as traceFile:
+                traceFile.write(self._header())
+                for events in self.store.intervals(a, b, self.chunkSz):
+                    if codes is not None:
+                        events = TraceEvents(*(column[np.isin(events.codes, codes)] for column in events))
+                    if not len(events.codes):
+                        continue
+                    # An interval stopping before it starts is written as zero-length
+                    events = events._replace(stops=np.maximum(events.stops, events.starts))
+                    tracks, added = self._assign(events.codes, events.starts, events.stops)
+                    traceFile.write(b''.join(self._descriptor(track, code, level) for track, code, level in added))
+                    traceFile.write(self._encode(events, tracks))
+                    written += len(events.codes)
+                    progress(-1, "Saved " + f"{written:,}" + " intervals")
+                traceFile.write(self._footer())
+            os.replace(tempPath, path)
+        except BaseException:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+            raise
+        return written
+    
+    def _assign(self, codes, starts, stops):
+        """ The track of each interval of a chunk, and the (track, code,
+            level) of the tracks new in it. A plugin's intervals in start
+            order go on its first track while they follow each other, and
+            the rest on the next tracks in turn. """
+        tracks = np.empty(len(codes), dtype=np.int64)
+        added = []
+        order = np.argsort(codes, kind='stable')
+        for rows in np.split(order, np.flatnonzero(np.diff(codes[order])) + 1):
+            code = int(codes[rows[0]])
+            frontiers = self.frontiers.setdefault(code, [])
+            level = 0
+            while len(rows):
+                if level == len(frontiers):
+                    frontiers.append(np.iinfo(np.int64).min)
+                rowStops = stops[rows]
+                reach = np.maximum.accumulate(np.concatenate(([frontiers[level]], rowStops[:-1])))
+                fits = starts[rows] >= reach # Starts after every interval before it
+                if fits.any():
+                    if (code, level) not in self.tracks:
+                        self.tracks[(code, level)] = len(self.tracks) + 1
+                        added.append((self.tracks[(code, level)], code, level))
+                    tracks[rows[fits]] = self.tracks[(code, level)]
+                    frontiers[level] = max(frontiers[level], int(rowStops[fits].max()))
+                rows = rows[~fits]
+                level += 1
+        return tracks, added
+    
+    def _track_name(self, code : int, level : int):
+        """ Name of a plugin's track. """
+        return str(self.store.names[code]) + (" (" + str(level + 1) + ")" if level else "")
+    
+    def _header(self):
+        """ Bytes starting the file. """
+        if self.fmt == 'json':
+            return (b'{"displayTimeUnit": "ns", "otherData": {"timeOrigin": ' + str(self.store.origin).encode() +
+                b'}, "traceEvents": [\n')
+        # The process track holding every plugin's, clearing the sequence's state
+        return self._packet(self._field(13, 1) + self._field(60, self._field(1, 1) + self._field(2, "ILLIXR") +
+            self._field(11, 3))) # Children in explicit order
+    
+    def _footer(self):
+        """ Bytes ending the file. """
+        if self.fmt == 'json':
+            return json.dumps({'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': "ILLIXR"}}).encode() + b']}\n'
+        return b''
+    
+    def _descriptor(self, track : int, code : int, level : int):
+        """ Bytes naming a track and placing it in plot order. """
+        name = self._track_name(code, level)
+        rank = self.ranks.get(self.store.names[code], len(self.ranks)) * 1000 + level
+        if self.fmt == 'json':
+            return b''.join(json.dumps(event).encode() + b',\n' for event in (
+                {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': track, 'args': {'name': name}},
+                {'name': 'thread_sort_index', 'ph': 'M', 'pid': 1, 'tid': track, 'args': {'sort_index': rank}}))
+        return self._packet(self._field(60, self._field(1, track + 1) + self._field(2, name) +
+            self._field(5, 1) + self._field(12, rank)))
+    
+    def _encode(self, events, tracks):
+        """ Bytes of a chunk of intervals, each as a complete event or as
+            a begin and end packet. """
+        times = events.starts
+        durations = events.stops - events.starts
+        numbered = events.iterations >= 0
+        if self.fmt == 'json':
+            names = self._table([b'{"name": ' + json.dumps(self._track_name(code, level)).encode() +
+                b', "ph": "X", "pid": 1, "tid": ' + str(track).encode() + b', "cat": "' for (code, level), track in self.tracks.items()])
+            negative = times < 0
+            times = np.abs(times)
+            return self._join(len(times), [
+                self._rows(names, tracks - 1), self._rows(self.categories, events.sources),
+                self._constant(b'", "ts": '), self._constant(b'-', negative),
+                self._decimal(times // 1000), self._constant(b'.'), self._decimal(times % 1000, 3),
+                self._constant(b', "dur": '), self._decimal(durations // 1000), self._constant(b'.'), self._decimal(durations % 1000, 3),
+                self._constant(b', "args": {"iteration": ', numbered), self._decimal(np.maximum(events.iterations, 0), visible=numbered),
+                self._constant(b'}', numbered), self._constant(b'},\n')
+            ])
+        
+        # Each packet's bytes and lengths, as protobuf fields
+        byTrack = sorted(self.tracks.items(), key=lambda item: item[1])
+        uuids = self._table([b'\x58' + self._varint_bytes(track + 1) for _, track in byTrack])
+        names = self._table([b'\xba\x01' + self._varint_bytes(len(name)) + name for name in
+            (self._track_name(code, level).encode() for (code, level), _ in byTrack)])
+        categories = self._table([b'\xb2\x01' + self._varint_bytes(len(category)) + category for category in
+            (source.encode() for source in SOURCES)])
+        uuid, name, category = self._rows(uuids, tracks - 1), self._rows(names, tracks - 1), self._rows(categories, events.sources)
+        iteration = self._varint(np.maximum(events.iterations, 0), numbered)
+        annotation = np.where(numbered, 14 + iteration[2], 0) # DebugAnnotation "iteration" and its value
+        beginEvent = 2 + uuid[2] + category[2] + name[2] + annotation
+        endEvent = 2 + uuid[2]
+        packets = []
+        for stamps, event in ((times, beginEvent), (times + durations, endEvent)):
+            timestamp, eventLength = self._varint(stamps), self._varint(event)
+            packet = 1 + timestamp[2] + 1 + eventLength[2] + event + 2
+            packets.append((self._varint(packet), timestamp, eventLength))
+        (beginPacket, beginTime, beginLength), (endPacket, endTime, endLength) = packets
+        return self._join(len(times), [
+            self._constant(b'\x0a'), beginPacket, self._constant(b'\x40'), beginTime, self._constant(b'\x5a'), beginLength,
+            self._constant(b'\x48\x01'), uuid, category, name,
+            self._constant(b'\x22', numbered), self._varint(annotation - 2, numbered),
+            self._constant(b'\x52\x09iteration\x20', numbered), iteration, self._constant(b'\x50\x01'),
+            self._constant(b'\x0a'), endPacket, self._constant(b'\x40'), endTime, self._constant(b'\x5a'), endLength,
+            self._constant(b'\x48\x02'), uuid, self._constant(b'\x50\x01')
+        ])
+    
+    # Each row's bytes are built of pieces: (matrix, mask, lengths) of
+    # the bytes it adds to each row, masked to those in use
+    
+    @staticmethod
+    def _table(values : list):
+        """ Byte strings as a (matrix, lengths) table of rows. """
+        width = max((len(value) for value in values), default=0)
+        matrix = np.zeros((len(values), max(width, 1)), dtype=np.uint8)
+        for row, value in enumerate(values):
+            matrix[row, :len(value)] = np.frombuffer(value, dtype=np.uint8)
+        return matrix, np.array([len(value) for value in values], dtype=np.int64)
+    
+    @staticmethod
+    def _rows(table : tuple, rows):
+        """ The piece adding the given rows of a table. """
+        matrix, lengths = table
+        lengths = lengths[rows]
+        return matrix[rows], np.arange(matrix.shape[1]) < lengths[:, None], lengths
+    
+    @staticmethod
+    def _constant(value : bytes, visible=True):
+        """ The piece adding value to the rows where visible is set. """
+        visible = np.asarray(visible)
+        lengths = np.where(visible, len(value), 0)
+        return np.frombuffer(value, dtype=np.uint8)[None, :], np.broadcast_to(visible[..., None], visible.shape + (len(value),)), lengths
+    
+    @staticmethod
+    def _decimal(values, width=None, visible=True):
+        """ The piece adding non-negative integers in decimal, padded with
+            zeros to width digits if given. """
+        values = np.asarray(values, dtype=np.int64)
+        lengths = width if width is not None else np.searchsorted(10 ** np.arange(1, 19, dtype=np.int64), values, side='right') + 1
+        lengths = np.broadcast_to(np.where(visible, lengths, 0), values.shape)
+        digits = np.empty((len(values), max(int(np.max(lengths, initial=1)), 1)), dtype=np.uint8)
+        rest = values.copy()
+        for column in range(digits.shape[1] - 1, -1, -1):
+            digits[:, column] = rest % 10 + 48
+            rest //= 10
+        return digits, np.arange(digits.shape[1]) >= digits.shape[1] - lengths[:, None], lengths # Right-aligned
+    
+    @staticmethod
+    def _varint(values, visible=True):
+        """ The piece adding integers as protobuf varints. """
+        values = np.asarray(values, dtype=np.int64).astype(np.uint64)
+        lengths = np.searchsorted(np.uint64(1) << (np.arange(1, 10, dtype=np.uint64) * np.uint64(7)), values, side='right') + 1
+        width = int(lengths.max(initial=1))
+        groups = (values[:, None] >> (np.arange(width, dtype=np.uint64) * np.uint64(7))) & np.uint64(0x7f)
+        groups[np.arange(width) < lengths[:, None] - 1] |= np.uint64(0x80) # More groups follow
+        lengths = np.where(visible, lengths, 0)
+        return groups.astype(np.uint8), np.arange(width) < lengths[:, None], lengths
+    
+    @staticmethod
+    def _join(n : int, pieces : list):
+        """ The bytes of n rows, each its pieces in order. """
+        matrix = np.concatenate([np.broadcast_to(piece[0], (n, piece[0].shape[1])) for piece in pieces], axis=1)
+        mask = np.concatenate([np.broadcast_to(piece[1], (n, piece[0].shape[1])) for piece in pieces], axis=1)
+        return matrix[mask].tobytes()
+    
+    # Protobuf fields of the few packets written one by one
+    
+    @staticmethod
+    def _varint_bytes(value : int):
+        """ A protobuf varint. """
+        encoded = bytearray()
+        while True:
+            group, value = value & 0x7f, value >> 7
+            encoded.append(group | (0x80 if value else 0))
+            if not value:
+                return bytes(encoded)
+    
+    @classmethod
+    def _field(cls, number : int, value):
+        """ A protobuf field: varint for an int, length-delimited for
+            bytes or a str. """
+        if isinstance(value, int):
+            return cls._varint_bytes(number << 3) + cls._varint_bytes(value)
+        if isinstance(value, str):
+            value = value.encode()
+        return cls._varint_bytes(number << 3 | 2) + cls._varint_bytes(len(value)) + value
+    
+    @classmethod
+    def _packet(cls, fields : bytes):
+        """ A TracePacket of the given fields, on the exporter's sequence. """
+        return cls._field(1, fields + cls._field(10, 1))
+
+def figure_to_json(figure):
+    """ Serializes a figure to standalone Plotly figure JSON. """
+    return figure.to_json()
+
+def figure_to_payload(figure):
+    """ Serializes a figure to the compact JSON payload pushed to the
+        display, which viewer.html expands before drawing. Traces of
+        intervals travel as their starts and durations alone, and traces
+        of instantaneous events as their times. Each start or time is
+        sent as its offset from the one before, the first from a time
+        origin for the view, so they are int32 like the durations unless
+        they are over 2 s apart. Every other numeric array is a Plotly
+        typed array. Arrays are base64 encoded, so a page of intervals is
+        about a tenth of figure_to_json's size and is parsed without
+        reading its numbers one at a time. """
+    from plotly.utils import PlotlyJSONEncoder
+    fig = figure.to_plotly_json()
+    times = [trace['x'] for trace in fig['data'] if trace.get('meta') in ('intervals', 'instants') and len(trace['x'])]
+    origin = int(min(np.nanmin(x) for x in times)) if times else 0
+    for trace in fig['data']:
+        kind = trace.pop('meta', None)
+        if kind == 'intervals':
+            # Segments are laid out start, stop, NaN
+            x = trace.pop('x')
+            trace.pop('customdata', None)
+            trace['intervals'] = {'origin': origin, 'lane': float(trace.pop('y')[0]),
+                'startDeltas': _typed_array(np.diff(x[0::3], prepend=origin)), 'durations': _typed_array(x[1::3] - x[0::3])}
+        elif kind == 'instants':
+            trace['instants'] = {'origin': origin, 'lane': float(trace.pop('y')[0]),
+                'timeDeltas': _typed_array(np.diff(trace.pop('x'), prepend=origin))}
+    return json.dumps(_typed_arrays(fig), cls=PlotlyJSONEncoder)
+
+def _typed_arrays(value):
+    """ A figure's dict with its numeric arrays as typed arrays. """
+    if isinstance(value, dict):
+        return {key: _typed_arrays(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_typed_arrays(item) for item in value]
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biuf':
+        return _typed_array(value)
+    return value
+
+def _typed_array(values):
+    """ A Plotly typed array of a numeric array, base64 encoded: int32
+        if its values are whole numbers that fit, otherwise float64. """
+    values = np.asarray(values)
+    whole = values.dtype.kind in 'biu' or (np.isfinite(values).all() and (values == np.round(values)).all())
+    if whole and (len(values) == 0 or (values.min() >= -2**31 and values.max() < 2**31)):
+        dtype, data = 'i4', values.astype('<i4')
+    else:
+        dtype, data = 'f8', values.astype('<f8')
+    spec = {'dtype': dtype, 'bdata': base64.b64encode(data.tobytes()).decode('ascii')}
+    if values.ndim > 1:
+        spec['shape'] = ','.join(str(length) for length in values.shape)
+    return spec
@@ -0,0 +1,902 @@
+# Filename: illixr_model.py
+""" ILLIXR Visualizer's Model: loads ILLIXR's databases into stores,
+    computes their statistics and builds the figures of their pages. Used
+    by the View's worker thread and by the headless exporter alike. """
+
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial
+from math import ceil, log2
+import cProfile
+import json
+import multiprocessing
+import numpy as np
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from illixr_store import CompareStore, DATA_SOURCES, default_cache_root, LatencyStats, LazyTraceStore
+from illixr_store import LoadCancelled, MalformedDatabaseError, PLUGIN_COLORS, read_columns, sidecar_directory
+from illixr_store import SOURCES, TraceStore, TraceTail
+from illixr_export import TraceExporter
+
+__author__ = 'Alanna Zoscak'
+
+
+class StageTimer():
+    """ Part of ILLIXR Visualizer's Model.
+        Times the stages of loading and rendering cheaply enough to stay
+        on. Each stage's latencies are counted in a log-scale histogram
+        with bucketsPerOctave buckets per power of two nanoseconds, and
+        the latest spans are kept in a ring for a Chrome trace-event dump.
+        Safe to use from any thread. """
+    bucketsPerOctave = 4
+    
+    def __init__(self, maxSpans=10000):
+        """ Starts with no stages timed. """
+        self.lock = threading.Lock()
+        self.maxSpans = maxSpans
+        self.profiler = None # cProfile.Profile while a profile is captured
+        self.reset()
+    
+    def reset(self):
+        """ Forgets every stage timed so far. """
+        with self.lock:
+            self.histograms = {} # Stage -> bucket counts
+            self.totals = {}     # Stage -> [count, total ns, max ns]
+            self.latest = {}     # Stage -> latest duration in ns
+            self.spans = deque(maxlen=self.maxSpans) # (stage, start ns, duration ns, thread ID)
+            self.threadNames = {}
+    
+    @contextmanager
+    def span(self, stage : str):
+        """ Times the enclosed block as one run of stage. """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, start, time.perf_counter_ns() - start)
+    
+    def record(self, stage : str, start : int, duration : int, threadId=None, threadName=None):
+        """ Records one run of stage that started at start (perf_counter
+            ns) and took duration ns. Spans timed elsewhere, such as in the
+            display's page, are recorded under their own threadId and
+            threadName. """
+        bucket = int(log2(max(duration, 1)) * self.bucketsPerOctave)
+        if threadId is None:
+            thread = threading.current_thread()
+            threadId, threadName = thread.ident, thread.name
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = [0] * (64 * self.bucketsPerOctave)
+                self.totals[stage] = [0, 0, 0]
+            histogram[bucket] += 1
+            totals = self.totals[stage]
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] = max(totals[2], duration)
+            self.latest[stage] = duration
+            self.spans.append((stage, start, duration, threadId))
+            if threadName is not None and threadId not in self.threadNames:
+                self.threadNames[threadId] = threadName
+    
+    def percentile(self, stage : str, q : float):
+        """ Upper bound of the q-th percentile latency of stage in ns,
+            within one histogram bucket. """
+        with self.lock:
+            histogram = list(self.histograms[stage])
+        target = q / 100 * sum(histogram)
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if count and seen >= target:
+                break
+        return 2 ** ((bucket + 1) / self.bucketsPerOctave)
+    
+    def summary(self):
+        """ Rows of (stage, runs, mean, p50, p90, p99, max) with latencies
+            in ms, in the order stages were first timed. """
+        with self.lock:
+            totals = {stage: list(values) for stage, values in self.totals.items()}
+        rows = []
+        for stage, (count, total, longest) in totals.items():
+            rows.append((stage, count, total / count / 1e6) +
+                tuple(min(self.percentile(stage, q), longest) / 1e6 for q in (50, 90, 99)) + (longest / 1e6,))
+        return rows
+    
+    def chrome_trace(self):
+        """ The latest spans as a Chrome trace-event document, viewable in
+            chrome://tracing or Perfetto. """
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+            threadNames = dict(self.threadNames)
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': threadId, 'args': {'name': name}}
+            for threadId, name in threadNames.items()]
+        events.extend({'name': stage, 'cat': 'illixr_visualizer', 'ph': 'X', 'pid': pid, 'tid': threadId,
+            'ts': start / 1000, 'dur': duration / 1000} for stage, start, duration, threadId in spans)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+    
+    def save_chrome_trace(self, path : str):
+        """ Writes chrome_trace to path. """
+        with open(path, 'w') as traceFile:
+            json.dump(self.chrome_trace(), traceFile)
+    
+    def start_profile(self):
+        """ Starts capturing a cProfile profile of profiled blocks. """
+        self.profiler = cProfile.Profile()
+    
+    def stop_profile(self, path=None):
+        """ Stops capturing the profile, writing it to path (for pstats
+            or snakeviz) if given. Call from the thread that runs the
+            profiled blocks. """
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None and path:
+            profiler.dump_stats(path)
+    
+    @contextmanager
+    def profiling(self):
+        """ Adds the enclosed block to the profile, if one is captured. """
+        profiler = self.profiler
+        if profiler is None:
+            yield
+            return
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+
+# A request to render one page of the loaded data, or the whole trace if
+# page is None. Carries the data it was made for so a load in progress
+# cannot race it. Prefetch requests are rendered into the cache without
+# being displayed. If concurrency is set, the running concurrency is
+# drawn in a lane under the plugins. If span is set, the (start, end) ns
+# zoomed or panned to in the display is drawn instead of the page.
+PageRequest = namedtuple('PageRequest', ['page', 'pageSz', 'pluginOrder', 'timeBase', 'store', 'prefetch', 'concurrency', 'span'],
+    defaults=(False, None))
+
+
+class TraceExtent(namedtuple('TraceExtent', ['names', 'pluginOrder', 'minStart', 'maxStop'])):
+    """ Part of ILLIXR Visualizer's Model.
+        What the GUI reads of a store: its lane names, the plugins with
+        data in order of first appearance, and its time bounds. Taken on
+        the worker thread after each load and live poll, so the GUI never
+        reads a store while a poll appends to it. """
+    __slots__ = ()
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every interval. """
+        return max(ceil(self.maxStop / pageSz), 1)
+
+
+class VisualizerModel():
+    """ ILLIXR Visualizer's Model.
+        Describes the layout of ILLIXR's databases, loads them into a
+        TraceStore and generates figures of it. Independent of Qt, so it
+        serves both the GUI's worker and the headless exporter. """
+    def __init__(self):
+        """ Model initializer. """
+        self.pluginTable = 'plugin_name' # Name of table containing plugin names 
+        self.pluginID = 'plugin_id' # Name of plugin identifier attribute, shared over databases
+        self.pluginName = 'plugin_name' # Name of column holding plugin names
+        
+        # Columns (and their types) holding plugin IDs and plugin names
+        self.nameColumns = {
+            self.pluginID : np.int64,
+            self.pluginName : object
+        }
+        
+        # Data tables, by the source their database is given as
+        self.sources = DATA_SOURCES
+        
+        self.timeBase = 'cpu' # Clock that start and end times are taken from, 'cpu' or 'wall'
+        
+        self.cacheRoot = default_cache_root() # Directory of sidecar caches, None to disable
+        
+        # Tables are read by one thread per core, in rowid ranges of at least partitionRows rows
+        self.readThreads = os.cpu_count() or 1
+        self.partitionRows = 2**18
+        
+        # Figure settings
+        self.rawEventLimit = 200000 # Most intervals drawn one by one; denser views show occupancy
+        self.overviewBins = 2000    # Most occupancy bins drawn across a view
+        self.concurrencyPoints = 4000 # Most steps of the concurrency lane drawn across a view
+        self.viewMargin = 0.5 # Share of a zoomed view's width drawn either side of it, so small pans need no redraw
+        self.findLimit = 1000 # Most intervals listed by a search
+        
+        self.timer = StageTimer() # Latencies of each stage of loading and rendering
+    
+    def source_layout(self, source : str):
+        """ The DataSource describing the source's table, with its time
+            columns named for the time base. Returns None if the table was
+            not logged with the time base's clock. """
+        layout = self.sources[source]
+        if self.timeBase not in layout.clocks:
+            return None
+        return layout._replace(
+            start = layout.start.format(self.timeBase),
+            stop = layout.stop.format(self.timeBase) if layout.stop else None
+        )
+    
+    def source_columns(self, layout):
+        """ Columns (and their types) read from a source's table. """
+        columns = {}
+        if layout.idColumn:
+            columns[layout.idColumn] = np.int32
+        for column in (layout.start, layout.stop, layout.duration, layout.iteration):
+            if column:
+                columns[column] = np.int64
+        if layout.skips:
+            columns[layout.skips] = np.int32
+        return columns
+    
+    def source_table(self, source : str, layout, columns : dict):
+        """ The (source tag, plugin IDs, starts, stops, skips, iterations)
+            data table of TraceStore.from_tables made from the columns read
+            from a source's table. """
+        starts = columns[layout.start]
+        if layout.idColumn:
+            ids = columns[layout.idColumn]
+        else:
+            ids = np.full(len(starts), -1 - SOURCES.index(source), dtype=np.int32) # Its lane
+        if layout.stop:
+            stops = columns[layout.stop]
+        elif layout.duration:
+            stops = starts + columns[layout.duration]
+        else:
+            stops = starts # Instantaneous events
+        return SOURCES.index(source), ids, starts, stops, columns.get(layout.skips), columns.get(layout.iteration)
+    
+    def sidecar_columns(self, dataPaths : dict):
+        """ The settings a sidecar of the databases depends on. """
+        return [self.timeBase] + [self.source_layout(source) for source in sorted(dataPaths) if source in self.sources]
+    
+    def load(self, namePath : str, dataPaths : dict, progress=None, lazy=False, live=False):
+        """ Loads, merges, sorts and indexes the databases, returning the
+            TraceStore and a summary of the load. dataPaths maps sources
+            (see DATA_SOURCES) to databases; those not logged with the time
+            base's clock are skipped. Wall clock times are rebased to the
+            first interval. A sidecar of previously
+            loaded databases is memory-mapped instead. A lazy load returns
+            a LazyTraceStore, which keeps the intervals on disk, for traces
+            larger than memory. A live load, of a capture ILLIXR is still
+            writing, is never cached and gives the store a TraceTail that
+            poll() reads newly written rows with; lazy loads cannot be
+            live. If given, progress(percent, message) is called as the
+            load advances and may raise LoadCancelled. Raises
+            MalformedDatabaseError. """
+        with self.timer.span('load'):
+            if lazy:
+                return self._load_lazy(namePath, dataPaths, progress)
+            tail = TraceTail(self.timeBase == 'wall') if live else None
+            try:
+                return self._load(namePath, dataPaths, progress, tail)
+            except BaseException:
+                if tail is not None:
+                    tail.close() # A load that does not complete follows nothing
+                raise
+    
+    def run_databases(self, directory : str):
+        """ The plugin name database and the data databases, keyed by
+            source, that ILLIXR wrote into a run's directory under their
+            table's names. namePath is None if there is none. """
+        namePath = os.path.join(directory, self.pluginTable + ".sqlite")
+        dataPaths = {source: os.path.join(directory, layout.table + ".sqlite") for source, layout in self.sources.items()
+            if os.path.isfile(os.path.join(directory, layout.table + ".sqlite"))}
+        return (namePath if os.path.isfile(namePath) else None), dataPaths
+    
+    def load_runs(self, runs : list, align=None, interleave=True, progress=None):
+        """ Loads several runs for comparison, each a (label, namePath,
+            dataPaths), returning a CompareStore and a summary of the load.
+            Runs not cached yet are loaded at once in a pool of up to one
+            process per core, each writing the run's sidecar, which is then
+            memory-mapped here rather than copied back. Runs are lined up
+            on their first interval, or on the first interval of the lane
+            named align, such as 'vsync'. Labels must be distinct. Lanes
+            are listed as the CompareStore's interleave. progress is
+            called as for load. Raises MalformedDatabaseError. """
+        if progress is None:
+            progress = lambda percent, message: None
+        timerStart = time.perf_counter()
+        cacheRoot = self.cacheRoot or os.path.join(tempfile.gettempdir(), 'illixr_visualizer')
+        with self.timer.span('load runs'):
+            # Runs loaded before are mapped straight away
+            stores = {}
+            sidecars = {}
+            for label, namePath, dataPaths in runs:
+                try:
+                    sidecars[label] = sidecar_directory(cacheRoot, namePath, dataPaths, self.sidecar_columns(dataPaths))
+                except OSError:
+                    raise MalformedDatabaseError("Cannot read the databases of run " + label + ".")
+                store = TraceStore.open(sidecars[label])
+                if store is not None:
+                    stores[label] = store
+            
+            pending = [run for run in runs if run[0] not in stores]
+            if pending:
+                nProcesses = min(len(pending), os.cpu_count() or 1)
+                progress(0, "Loading " + str(len(pending)) + " runs, " + str(nProcesses) + " at a time")
+                pool = ProcessPoolExecutor(nProcesses, mp_context=multiprocessing.get_context('spawn'))
+                try:
+                    futures = {pool.submit(_load_run, namePath, dataPaths, self.timeBase, cacheRoot): label
+                        for label, namePath, dataPaths in pending}
+                    waiting = set(futures)
+                    while waiting:
+                        done, waiting = wait(waiting, timeout=0.1)
+                        for future in done:
+                            label = futures[future]
+                            try:
+                                future.result()
+                            except MalformedDatabaseError as e:
+                                raise MalformedDatabaseError("Run " + label + ": " + str(e))
+                            except BrokenProcessPool:
+                                raise MalformedDatabaseError("The process loading run " + label + " stopped unexpectedly.")
+                            stores[label] = TraceStore.open(sidecars[label])
+                            if stores[label] is None:
+                                raise MalformedDatabaseError("Cannot write the cache of run " + label + " to " + cacheRoot + ".")
+                        progress(int(90 * (len(pending) - len(waiting)) / len(pending)), "Loaded " +
+                            str(len(pending) - len(waiting)) + " of " + str(len(pending)) + " runs")
+                finally:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            
+            # Line the runs up on their anchors
+            progress(95, "Aligning runs")
+            labels = [label for label, _, _ in runs]
+            anchors = []
+            for label in labels:
+                anchor = CompareStore.anchor_of(stores[label], align)
+                if anchor is None:
+                    raise MalformedDatabaseError("Run " + label + " has no " + (align or "intervals") + " to align on.")
+                anchors.append(anchor)
+            store = CompareStore(labels, [stores[label] for label in labels], anchors, interleave)
+        
+        summary = ("Compared " + str(len(runs)) + " runs of " + f"{len(store):,}" + " rows in " +
+            f"{time.perf_counter() - timerStart:.2f}" + " s, aligned on the first " + (align or "interval") +
+            " at " + f"{store.anchor:,}" + " ns")
+        return store, summary
+    
+    def run_differences(self, store, stats):
+        """ Rows of (plugin, run, count, mean, change, p99, change, period,
+            change) comparing each plugin's durations and periods in every
+            run of a CompareStore with the first run's, given the runs'
+            LatencyStats. Times are in ms and changes in percent; NaN where
+            a run has no intervals or periods of the plugin. """
+        nRuns, nPlugins = len(store.runs), len(store.plugins)
+        codes = np.arange(nRuns)[:, None] * store.stride + np.arange(nPlugins)[None, :] # (run, plugin)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            counts = stats.counts[codes]
+            measures = [
+                np.where(counts > 0, stats.totals[codes] / counts, np.nan),
+                np.where(counts > 0, stats.percentile(99)[codes], np.nan),
+                np.where(stats.periodCounts[codes] > 0, stats.periodMeans[codes], np.nan)
+            ]
+            changes = [(measure / measure[0] - 1) * 100 for measure in measures]
+        rows = []
+        for plugin, name in enumerate(store.plugins):
+            for number, label in enumerate(store.labels):
+                if counts[number, plugin] == 0:
+                    continue
+                rows.append((name, label, int(counts[number, plugin])) + tuple(value
+                    for measure, change in zip(measures, changes)
+                    for value in (measure[number, plugin] / 1e6, change[number, plugin])))
+        return rows
+    
+    def poll(self, store):
+        """ Appends the rows written to a live capture's databases since
+            the last poll to the store. Returns the earliest new start, or
+            None if none were written. Tables that cannot be read at the
+            moment are read at the next poll. """
+        tail = store.tail
+        tables = []
+        with self.timer.span('poll'):
+            for entry in tail.tables:
+                source, dbPath, layout, after = entry
+                last = tail.latest(dbPath, layout.table)
+                if last is None or last <= after:
+                    continue
+                try:
+                    columns, _ = read_columns(dbPath, layout.table, self.source_columns(layout), rowids=(after, last))
+                except (sqlite3.Error, TypeError, ValueError):
+                    continue
+                entry[3] = last
+                tables.append(self.source_table(source, layout, columns))
+            return store.append(tables, tail.rebase)
+    
+    def _load_lazy(self, namePath : str, dataPaths : dict, progress):
+        """ Helper function for load that opens, or first builds, the
+            indexed sidecar database of a LazyTraceStore. """
+        if progress is None:
+            progress = lambda percent, message: None
+        timerStart = time.perf_counter()
+        
+        # Check each table's layout up front, as a full load would
+        tables = []
+        self._check_table(namePath, self.pluginTable, [self.pluginID, self.pluginName], "plugin names",
+            "'" + self.pluginID + "' and '" + self.pluginName + "'")
+        for dataType, dataPath in dataPaths.items():
+            if dataType not in self.sources:
+                continue
+            layout = self.source_layout(dataType)
+            if layout is None:
+                continue
+            columns = list(self.source_columns(layout))
+            self._check_table(dataPath, layout.table, columns, dataType + " logs",
+                ", ".join("'" + column + "'" for column in columns[:-1]) + " and '" + columns[-1] + "'")
+            
+            # The table's row as SQL expressions, as source_table makes it
+            start = "t." + layout.start
+            if layout.stop:
+                stop = "t." + layout.stop
+            elif layout.duration:
+                stop = start + " + t." + layout.duration
+            else:
+                stop = start
+            tables.append((SOURCES.index(dataType), dataPath, layout.table,
+                "t." + layout.idColumn if layout.idColumn else str(-1 - SOURCES.index(dataType)),
+                start, stop, "t." + layout.skips if layout.skips else "0",
+                "t." + layout.iteration if layout.iteration else "-1"))
+        
+        # Sidecar databases live beside the memory-mapped sidecars, or in a temporary directory
+        cacheRoot = self.cacheRoot or os.path.join(tempfile.gettempdir(), 'illixr_visualizer')
+        path = sidecar_directory(cacheRoot, namePath, dataPaths, self.sidecar_columns(dataPaths)) + '.sqlite'
+        with self.timer.span('sidecar open'):
+            store = LazyTraceStore.open(path)
+        if store is not None:
+            return store, ("Opened indexed trace of " + f"{len(store):,}" + " rows in " +
+                f"{time.perf_counter() - timerStart:.2f}" + " s" + self._skipped_note(dataPaths))
+        
+        try:
+            os.makedirs(cacheRoot, exist_ok=True)
+            with self.timer.span('sidecar build'):
+                LazyTraceStore.build(path, namePath, (self.pluginTable, self.pluginID, self.pluginName), tables,
+                    self.timeBase == 'wall', progress)
+        except (sqlite3.Error, OSError) as e:
+            raise MalformedDatabaseError("Cannot index the databases: " + str(e))
+        store = LazyTraceStore(path)
+        return store, ("Indexed " + f"{len(store):,}" + " rows in " +
+            f"{time.perf_counter() - timerStart:.2f}" + " s (lazy mode)" + self._skipped_note(dataPaths))
+    
+    def _skipped_note(self, dataPaths : dict):
+        """ Helper function for load summaries naming the sources skipped
+            for lack of the time base's clock. """
+        skipped = [source for source in dataPaths if source in self.sources and self.source_layout(source) is None]
+        if not skipped:
+            return ""
+        return "; " + ", ".join(skipped) + " not logged with " + self.timeBase + " time"
+    
+    def extent(self, store):
+        """ Takes a TraceExtent of store. """
+        return TraceExtent(tuple(store.names), store.plugin_order(), store.index.minStart, store.index.maxStop)
+    
+    def statistics(self, store, a=None, b=None):
+        """ Summarizes the durations, periods and skips of each plugin's
+            intervals starting in [a, b), or in the whole trace. Returns a
+            LatencyStats. """
+        with self.timer.span('statistics'):
+            return LatencyStats.from_chunks(len(store.names), store.chunks(a, b))
+    
+    def concurrency(self, store):
+        """ The store's ConcurrencyProfile, swept over the whole trace
+            the first time it is asked for. Returns None for stores
+            without one. """
+        if store.concurrency is not None:
+            return store.concurrency
+        with self.timer.span('concurrency'):
+            return store.concurrency_profile()
+    
+    def export(self, store, path : str, fmt : str, a=None, b=None, plugins=None, progress=None):
+        """ Streams the intervals starting in [a, b), or in the whole
+            trace, of the named plugins, or of all, to path in the
+            TraceExporter format fmt. Returns the number written. """
+        with self.timer.span('export'):
+            return TraceExporter(store, fmt).write(path, a, b, plugins, progress)
+    
+    def find(self, store, query : str, plugin, value):
+        """ Finds intervals of the plugin named plugin, or of every
+            plugin if None, from the store's outlier index. query is
+            'longest' for each plugin's value longest intervals,
+            'percentile' for those longer than its value-th percentile
+            duration, or 'iteration' for those numbered value. Returns
+            (plugin, iteration, start, stop) rows, longest or earliest
+            first, at most findLimit of them, and the number found.
+            Raises ValueError on an unknown query or a percentile outside
+            [0, 100]. """
+        if query not in ('longest', 'percentile', 'iteration'):
+            raise ValueError("Unknown query " + repr(query) + ".")
+        if query == 'percentile' and not 0 <= value <= 100:
+            raise ValueError("Percentiles are from 0 to 100.")
+        with self.timer.span('find'):
+            if plugin is None:
+                hasData = set(store.plugin_order())
+                codes = [code for code, name in enumerate(store.names) if name in hasData]
+            else:
+                codes = np.flatnonzero(store.names == plugin).tolist()
+            found = []
+            total = 0
+            for code in codes:
+                if query == 'iteration':
+                    events = store.iteration_intervals(code, int(value))
+                    total += len(events.starts)
+                else:
+                    count = store.interval_count(code)
+                    if query == 'longest':
+                        k = min(int(value), count)
+                    else:
+                        k = int(count * (100 - value) / 100) # Longer than all but value% of the plugin's intervals
+                    total += k
+                    events = store.longest_intervals(code, min(k, self.findLimit))
+                found.append(events)
+            if not found:
+                return [], 0
+            codes, starts, stops, _, iterations = (np.concatenate(column) for column in zip(*found))
+            order = np.argsort(starts if query == 'iteration' else starts - stops, kind='stable')[:self.findLimit]
+            rows = [(store.names[code], iteration, start, stop) for code, iteration, start, stop in
+                zip(codes[order].tolist(), iterations[order].tolist(), starts[order].tolist(), stops[order].tolist())]
+            return rows, total
+    
+    def _check_table(self, dbPath, tableName : str, columns : list, contents : str, attribs : str):
+        """ Helper function for _load_lazy that raises MalformedDatabaseError
+            unless the table has the given columns. Reads no rows. """
+        try:
+            connection = sqlite3.connect("file:" + dbPath + "?mode=ro", uri=True)
+            try:
+                connection.execute("SELECT " + ", ".join(columns) + " FROM " + tableName + " LIMIT 0")
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            msg = ("Please load a database with " + contents + ". Must have a '" +
+                tableName + "' table with attributes " + attribs + "."
+            )
+            raise MalformedDatabaseError(msg)
+    
+    def _load(self, namePath : str, dataPaths : dict, progress, tail=None):
+        """ Helper function for load. A live load follows the databases
+            with tail. """
+        if progress is None:
+            progress = lambda percent, message: None
+        timerStart = time.perf_counter()
+        live = tail is not None
+        
+        # Reopen a sidecar written by an earlier load of the same databases
+        sidecar = None
+        if self.cacheRoot is not None and not live:
+            try:
+                sidecar = sidecar_directory(self.cacheRoot, namePath, dataPaths, self.sidecar_columns(dataPaths))
+            except OSError:
+                pass # Missing databases are reported when read below
+        if sidecar is not None:
+            with self.timer.span('sidecar open'):
+                store = TraceStore.open(sidecar)
+            if store is not None:
+                return store, ("Opened cached trace of " + f"{len(store):,}" + " rows in " +
+                    f"{time.perf_counter() - timerStart:.2f}" + " s" + self._skipped_note(dataPaths))
+        
+        # Rowid ranges to read of each logged table (switchboard, threadloop
+        # and the other sources). A live capture is read up to its current
+        # end, then followed
+        reads = [] # (source, database, layout, columns, contents, attribs, rowid range)
+        for dataType, dataPath in dataPaths.items():
+            if dataType not in self.sources:
+                continue
+            layout = self.source_layout(dataType)
+            if layout is None:
+                continue
+            tableColumns = self.source_columns(layout)
+            attribs = ", ".join("'" + column + "'" for column in list(tableColumns)[:-1]) + " and '" + list(tableColumns)[-1] + "'"
+            if live:
+                lastRowid = tail.latest(dataPath, layout.table)
+                tail.follow(dataType, dataPath, layout, lastRowid)
+            else:
+                lastRowid = self._max_rowid(dataPath, layout.table)
+            for rowids in self._rowid_ranges(lastRowid):
+                reads.append((dataType, dataPath, layout, tableColumns, dataType + " logs", attribs, rowids))
+        
+        # The whole load shares the progress bar
+        expectedRows = max(sum(last - after for *_, (after, last) in reads), 1)
+        rowsRead = [0] * len(reads)
+        failed = threading.Event() # Set to stop the other reads once one fails
+        def readProgress(nRows, _, read, contents):
+            if failed.is_set():
+                raise LoadCancelled()
+            rowsRead[read] = nRows
+            progress(int(90 * min(sum(rowsRead) / expectedRows, 1)), "Loading " + contents + " (" + f"{sum(rowsRead):,}" + " rows)")
+        
+        # Plugin names and every range are read at once by a pool of
+        # threads, each range over its own read-only connection; SQLite
+        # releases the GIL while it steps through rows. Each range is a
+        # sorted run of its own for the merge
+        readStart = time.perf_counter()
+        pool = ThreadPoolExecutor(self.readThreads, thread_name_prefix='read')
+        try:
+            names = pool.submit(self._db_to_columns, namePath, self.nameColumns, "plugin names", self.pluginTable,
+                "'" + self.pluginID + "' and '" + self.pluginName + "'")
+            futures = [pool.submit(self._db_to_columns, dataPath, tableColumns, contents, layout.table, attribs,
+                    partial(readProgress, read=read, contents=contents), rowids)
+                for read, (_, dataPath, layout, tableColumns, contents, attribs, rowids) in enumerate(reads)]
+            nameColumns, _ = names.result()
+            tables = [self.source_table(dataType, layout, future.result()[0])
+                for (dataType, _, layout, *_), future in zip(reads, futures)]
+        except BaseException:
+            failed.set()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        rowsPerSec = sum(rowsRead) / max(time.perf_counter() - readStart, 1e-9)
+        
+        # Merge into one store sorted by start time, indexed for page slicing
+        progress(90, "Sorting and indexing")
+        with self.timer.span('merge, sort and index'):
+            store = TraceStore.from_tables(nameColumns[self.pluginID], nameColumns[self.pluginName], tables,
+                rebase = self.timeBase == 'wall')
+        store.tail = tail
+        
+        # Sorted columns are written once so later loads can map them
+        if sidecar is not None:
+            progress(95, "Writing cache")
+            try:
+                os.makedirs(self.cacheRoot, exist_ok=True)
+                with self.timer.span('sidecar save'):
+                    store.save(sidecar)
+            except OSError:
+                pass # Caching is best effort
+        
+        summary = ("Loaded " + f"{len(store):,}" + " rows (" +
+            f"{rowsPerSec:,.0f}" + " rows/s, " +
+            f"{store.nbytes / max(len(store), 1):.0f}" + " bytes/row)" + self._skipped_note(dataPaths))
+        if live:
+            summary += ", following live capture"
+        return store, summary
+    
+    def _max_rowid(self, dbPath, tableName : str):
+        """ Helper function for load giving the table's largest rowid, or
+            None if it is empty or cannot be read; reading it then reports
+            why. """
+        try:
+            connection = sqlite3.connect("file:" + dbPath + "?mode=ro", uri=True)
+            try:
+                return connection.execute("SELECT max(rowid) FROM " + tableName).fetchone()[0]
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return None
+    
+    def _rowid_ranges(self, lastRowid):
+        """ Helper function for load splitting the rowids up to lastRowid
+            into (after, last] ranges, one per read thread but none of
+            fewer than partitionRows rows. rowids are usually dense, so
+            the ranges hold about as many rows. """
+        last = lastRowid or 0
+        size = max(self.partitionRows, -(-last // self.readThreads))
+        return [(after, min(after + size, last)) for after in range(0, last, size)] or [(0, 0)]
+    
+    def _db_to_columns(self, dbPath, columns : dict, contents : str, tableName : str, attribs : str, progress=None, rowids=None):
+        """ Helper function for load that streams a database table into
+            NumPy columns. Returns the columns and the ingestion rate
+            in rows per second. """
+        try:
+            with self.timer.span('read ' + tableName):
+                return read_columns(dbPath, tableName, columns, progress=progress, rowids=rowids)
+        except (sqlite3.Error, TypeError, ValueError):
+            msg = ("Please load a database with " + contents + ". Must have a '" +
+                tableName + "' table with attributes " + attribs + "."
+            )
+            raise MalformedDatabaseError(msg)
+    
+    def data_range(self, request):
+        """ The [start, end) ns a request's figure draws: the zoomed
+            view and its margins, the page, or the whole trace. """
+        if request.span is not None:
+            start, end = request.span
+            margin = int((end - start) * self.viewMargin)
+            return start - margin, end + margin
+        if request.page is None:
+            return request.store.index.minStart, request.store.index.maxStop + 1
+        # Range of ns to include:
+        # [page * pageSz, page * pageSz + pageSz)
+        return request.page * request.pageSz, request.page * request.pageSz + request.pageSz
+    
+    def is_exact(self, store, start, end):
+        """ Whether a figure of [start, end) draws every interval one by
+            one, rather than their occupancy. """
+        return store.index.estimate(start, end) <= self.rawEventLimit
+    
+    def exact_range(self, request):
+        """ The [start, end) ns a request's figure draws, if it draws every
+            interval in it one by one, or None. Reads the store, so it is
+            called on the thread that appends to it. """
+        start, end = self.data_range(request)
+        return (start, end) if self.is_exact(request.store, start, end) else None
+    
+    def create_fig(self, request):
+        """ Generates the figure for the requested page or view. Views
+            holding more intervals than can be drawn one by one are drawn
+            from the occupancy pyramid, so a figure's size is bounded
+            whatever its range. Returns None if no data falls on the
+            page. """
+        pageStart, pageEnd = self.data_range(request)
+        if not self.is_exact(request.store, pageStart, pageEnd):
+            with self.timer.span('overview figure'):
+                fig = self._create_overview_fig(request, pageStart, pageEnd)
+        else:
+            # All intervals overlapping the page, clipped to its boundaries
+            with self.timer.span('window'):
+                window = request.store.window(pageStart, pageEnd)
+            if len(window.starts) == 0:
+                return None
+            with self.timer.span('figure'):
+                fig = self._create_timeline_fig(request, window)
+        if fig is not None and request.concurrency:
+            self._add_concurrency_lane(fig, request.store, pageStart, pageEnd)
+        if fig is not None and request.span is not None:
+            # Show the view itself, keeping the user's other settings as it moves
+            fig.layout.xaxis.range = list(request.span)
+            fig.layout.xaxis.uirevision = str(request.span) # A jump elsewhere moves the axis
+            fig.layout.uirevision = 'view'
+        return fig
+    
+    def _add_concurrency_lane(self, fig, store, start, end):
+        """ Draws the running concurrency over [start, end) as a step
+            line in a lane under the plugins, from the cached profile, so
+            it costs no more at one zoom level than at another. Views with
+            more than concurrencyPoints steps show each bin's peak and
+            mean. """
+        import plotly.graph_objs as go
+        profile = self.concurrency(store)
+        if profile is None:
+            return
+        steps = profile.window(start, end, self.concurrencyPoints)
+        if len(steps.peaks) == 0:
+            return
+        fig.add_trace(go.Scattergl(
+            x = steps.times,
+            y = steps.peaks,
+            yaxis = 'y2',
+            mode = 'lines',
+            name = 'Concurrency' if steps.means is None else 'Peak concurrency',
+            line = {'shape': 'hv', 'width': 1, 'color': '#444444'},
+            showlegend = False,
+            hovertemplate = 'Time (ns): %{x:.0f}<br>Running: %{y}<extra></extra>'
+        ))
+        if steps.means is not None:
+            fig.add_trace(go.Scattergl(
+                x = steps.times,
+                y = steps.means,
+                yaxis = 'y2',
+                mode = 'lines',
+                name = 'Mean concurrency',
+                line = {'shape': 'hv', 'width': 1, 'color': '#1f77b4'},
+                showlegend = False,
+                hovertemplate = 'Time (ns): %{x:.0f}<br>Mean running: %{y:.2f}<extra></extra>'
+            ))
+        fig.layout.yaxis.domain = [0.25, 1]
+        fig.layout.yaxis2 = {'domain': [0, 0.2], 'title': 'Running', 'rangemode': 'tozero', 'anchor': 'x'}
+        fig.layout.xaxis.anchor = 'y2'
+    
+    def _create_timeline_fig(self, request, window):
+        """ Generates a Gantt figure of the intervals in window with one
+            WebGL line trace per plugin lane. Each interval is a segment
+            of a thick line, separated from the next by a NaN point, so
+            the browser draws 10^5 - 10^6 intervals interactively. Lanes of
+            instantaneous events, such as vsync, are drawn as ticks. """
+        import plotly.graph_objs as go
+        store = request.store
+        
+        # Group the intervals by plugin, then lay lanes out in plot order
+        order = np.argsort(window.codes, kind='stable')
+        codes = window.codes[order]
+        laneCodes, firsts = np.unique(codes, return_index=True)
+        bounds = dict(zip(laneCodes.tolist(), zip(firsts.tolist(), np.append(firsts[1:], len(codes)).tolist())))
+        codeOf = {name: code for code, name in enumerate(store.names)}
+        lanes = [plugin for plugin in request.pluginOrder if codeOf.get(plugin) in bounds]
+        if not lanes:
+            return None
+        lineWidth = max(2, min(20, 400 // len(lanes)))
+        
+        fig = go.Figure()
+        for lane, plugin in enumerate(lanes):
+            first, last = bounds[codeOf[plugin]]
+            starts = window.starts[order[first:last]].astype(np.float64)
+            stops = window.stops[order[first:last]].astype(np.float64)
+            color = PLUGIN_COLORS[codeOf[plugin] % len(PLUGIN_COLORS)]
+            
+            source = DATA_SOURCES[SOURCES[window.sources[order[first]]]]
+            if source.stop is None and source.duration is None:
+                fig.add_trace(go.Scattergl(
+                    x = starts,
+                    y = np.full(len(starts), lane),
+                    mode = 'markers',
+                    name = plugin,
+                    meta = 'instants', # Sent to the display by figure_to_payload as times alone
+                    marker = {'symbol': 'line-ns-open', 'size': lineWidth + 4, 'line': {'width': 2, 'color': color}},
+                    hovertemplate = 'Time (ns): %{x:.0f}'
+                ))
+                continue
+            
+            # Segment endpoints interleaved with NaN breaks: start, stop, NaN
+            x = np.full(3 * len(starts), np.nan)
+            x[0::3] = starts
+            x[1::3] = stops
+            # Each endpoint hovers its time and its interval's duration
+            customdata = np.full(3 * len(starts), np.nan)
+            customdata[0::3] = customdata[1::3] = stops - starts
+            
+            fig.add_trace(go.Scattergl(
+                x = x,
+                y = np.full(len(x), lane),
+                mode = 'lines',
+                name = plugin,
+                meta = 'intervals', # Sent to the display by figure_to_payload as starts and durations alone
+                line = {'width': lineWidth, 'color': color},
+                customdata = customdata,
+                hovertemplate = 'Time (ns): %{x:.0f}<br>Duration (ns): %{customdata:.0f}'
+            ))
+        fig.layout.xaxis.type = 'linear'
+        fig.layout.xaxis.title = self._time_title(store)
+        fig.layout.yaxis.title = None
+        fig.layout.yaxis.showticklabels = False
+        fig.layout.yaxis.showgrid = False
+        fig.layout.yaxis.zeroline = False
+        fig.layout.yaxis.range = [len(lanes) - 0.5, -0.5] # First lane on top
+        fig.layout.legend.title = 'Plugin Name'
+        
+        # Keep the user's zoom while the same page is redrawn
+        fig.layout.uirevision = request.page
+        return fig
+    
+    def _time_title(self, store):
+        """ Title of the time axis, giving the clock time of time 0 when
+            times were rebased. """
+        if store.origin:
+            return 'Time (ns after ' + str(store.origin) + ')'
+        return 'Time (ns)'
+    
+    def _create_overview_fig(self, request, start, end):
+        """ Generates a figure of each plugin's occupancy over [start, end)
+            from the occupancy pyramid, at a resolution of at most
+            overviewBins bins whatever the number of intervals. """
+        import plotly.graph_objs as go
+        store = request.store
+        bins = store.pyramid.bins(start, end, self.overviewBins)
+        
+        # One lane per plugin with data, in plot order
+        active = set(store.names[bins.counts.sum(axis=1) + bins.busy.sum(axis=1) > 0])
+        lanes = [plugin for plugin in request.pluginOrder if plugin in active]
+        if not lanes:
+            return None
+        codeOf = {name: code for code, name in enumerate(store.names)}
+        codes = [codeOf[plugin] for plugin in lanes]
+        widths = np.diff(bins.edges)
+        
+        fig = go.Figure(go.Heatmap(
+            x = bins.edges[:-1] + widths / 2,
+            y = lanes,
+            z = bins.busy[codes] / widths,
+            customdata = bins.counts[codes],
+            zmin = 0,
+            colorscale = 'Blues',
+            colorbar = {'title': 'Busy', 'tickformat': '.0%'},
+            hovertemplate = '%{y}<br>Time (ns): %{x:.0f}<br>Busy: %{z:.1%}<br>Intervals started: %{customdata}<extra></extra>'
+        ))
+        fig.layout.xaxis.type = 'linear'
+        fig.layout.xaxis.title = self._time_title(store) + ', ' + f"{int(widths[0]):,}" + ' ns bins'
+        fig.layout.yaxis.autorange = 'reversed'
+        fig.layout.uirevision = request.page
+        return fig
+
+
+def _load_run(namePath : str, dataPaths : dict, timeBase : str, cacheRoot : str):
+    """ Loads one run of a comparison in a pool process, writing its
+        sidecar under cacheRoot for the comparing process to map. Returns
+        the load's summary. """
+    model = VisualizerModel()
+    model.timeBase = timeBase
+    model.cacheRoot = cacheRoot
+    _, summary = model.load(namePath, dataPaths)
+    return summary
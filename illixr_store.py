@@ -0,0 +1,1783 @@
+# Filename: illixr_store.py
+""" Storage of ILLIXR Visualizer's Model: the interval index, occupancy
+    pyramid, concurrency profile and outlier index over a trace, the
+    in-memory, on-disk and comparison stores holding them, and the reading
+    of ILLIXR's databases into them. Needs neither Qt nor plotly. """
+
+from collections import namedtuple, OrderedDict
+from math import ceil
+import hashlib
+import json
+import numpy as np
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+__author__ = 'Alanna Zoscak'
+
+
+class IntervalIndex():
+    """ Part of ILLIXR Visualizer's Model.
+        A static index over intervals that are sorted by start time.
+        Intervals are grouped into power-of-two duration classes; within a
+        class every interval overlapping [a, b) must start inside
+        [a - longest duration in class, b), so each class is answered with
+        binary search and the result costs O(log n + k) for k overlaps. """
+    def __init__(self, starts, stops):
+        """ Builds the index. starts must be sorted in ascending order. """
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops  = np.asarray(stops, dtype=np.int64)
+        if len(self.starts) != len(self.stops):
+            raise ValueError("starts and stops must have the same length.")
+        if np.any(self.starts[1:] < self.starts[:-1]):
+            raise ValueError("Interval starts must be sorted.")
+        
+        self.minStart = int(self.starts[0]) if len(self.starts) else 0
+        self.maxStop  = int(self.stops.max()) if len(self.stops) else 0
+        
+        # Duration class of each interval: 0 for empty intervals,
+        # otherwise 1 + floor(log2(duration))
+        durations = np.maximum(self.stops - self.starts, 0)
+        classes = np.zeros(len(durations), dtype=np.int8)
+        nonEmpty = durations > 0
+        classes[nonEmpty] = np.floor(np.log2(durations[nonEmpty])).astype(np.int8) + 1
+        
+        # Positions of each class's intervals, kept in start order
+        posType = np.int32 if len(self.starts) < np.iinfo(np.int32).max else np.int64
+        self.classPositions = [] # Sorted positions into starts/stops, one array per class
+        self.classBounds = []    # Longest duration within each class
+        self.classBuffers = []   # Spare capacity behind each class's positions, once extended
+        for durationClass in np.unique(classes):
+            positions = np.flatnonzero(classes == durationClass).astype(posType)
+            self.classPositions.append(positions)
+            self.classBounds.append(int(durations[positions].max()))
+            self.classBuffers.append(None)
+    
+    @classmethod
+    def from_state(cls, starts, stops, state : dict, positions):
+        """ Restores an index saved with state() without rescanning the
+            intervals. positions holds every class's positions, concatenated. """
+        index = cls.__new__(cls)
+        index.starts = starts
+        index.stops = stops
+        index.minStart = state['minStart']
+        index.maxStop = state['maxStop']
+        offsets = np.cumsum([0] + state['classSizes'])
+        index.classPositions = [positions[first:last] for first, last in zip(offsets[:-1], offsets[1:])]
+        index.classBounds = state['classBounds']
+        index.classBuffers = [None] * len(index.classBounds)
+        return index
+    
+    def state(self):
+        """ Returns the index's scalars, as a JSON-serializable dict, and
+            its class positions concatenated into one array. """
+        state = {
+            'minStart': self.minStart,
+            'maxStop': self.maxStop,
+            'classSizes': [len(positions) for positions in self.classPositions],
+            'classBounds': self.classBounds
+        }
+        positions = np.concatenate(self.classPositions) if self.classPositions else np.empty(0, dtype=np.int32)
+        return state, positions
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def extend(self, starts, stops, first : int):
+        """ Re-indexes the intervals from position first onward, after they
+            were merged with new ones, given the grown starts and stops.
+            Each class's positions grow geometrically into spare capacity,
+            so the cost is that of the re-indexed intervals. """
+        self.starts = starts
+        self.stops = stops
+        self.minStart = int(starts[0]) if len(starts) else 0
+        if len(starts) > first:
+            self.maxStop = max(self.maxStop, int(stops[first:].max()))
+        durations = np.maximum(stops[first:] - starts[first:], 0)
+        classes = np.zeros(len(durations), dtype=np.int8)
+        nonEmpty = durations > 0
+        classes[nonEmpty] = np.floor(np.log2(durations[nonEmpty])).astype(np.int8) + 1
+        
+        # The re-indexed intervals grouped by class, in start order within each
+        byClass = np.argsort(classes, kind='stable')
+        edges = np.searchsorted(classes[byClass], np.arange(66)).tolist() # Each class's range of byClass
+        
+        # A class's longest duration gives its class back
+        slotOf = {(int(np.floor(np.log2(bound))) + 1 if bound > 0 else 0): slot for slot, bound in enumerate(self.classBounds)}
+        for durationClass in np.flatnonzero(np.diff(edges)).tolist():
+            if durationClass not in slotOf:
+                slotOf[durationClass] = len(self.classPositions)
+                self.classPositions.append(np.empty(0, dtype=np.int64))
+                self.classBounds.append(0)
+                self.classBuffers.append(None)
+        for durationClass, slot in slotOf.items():
+            positions = self.classPositions[slot]
+            keep = int(np.searchsorted(positions, first))
+            added = first + byClass[edges[durationClass]:edges[durationClass + 1]]
+            total = keep + len(added)
+            buffer = self.classBuffers[slot]
+            if buffer is None or len(buffer) < total:
+                buffer = np.empty(max(total, 2 * len(positions), 16), dtype=np.int64)
+                buffer[:keep] = positions[:keep]
+                self.classBuffers[slot] = buffer
+            buffer[keep:total] = added
+            self.classPositions[slot] = buffer[:total]
+            if len(added):
+                self.classBounds[slot] = max(self.classBounds[slot], int(durations[added - first].max()))
+    
+    def overlapping(self, a, b):
+        """ Returns the positions, in start order, of all intervals that
+            overlap the time range [a, b): start < b and stop >= a. """
+        matches = []
+        hi = np.searchsorted(self.starts, b, side='left')
+        for positions, bound in zip(self.classPositions, self.classBounds):
+            # Global range of candidate intervals, narrowed to this class
+            lo = np.searchsorted(self.starts, a - bound, side='left')
+            first = np.searchsorted(positions, lo, side='left')
+            last  = np.searchsorted(positions, hi, side='left')
+            candidates = positions[first:last]
+            matches.append(candidates[self.stops[candidates] >= a])
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(matches)).astype(np.int64, copy=False)
+    
+    def estimate(self, a, b):
+        """ Upper bound on the number of intervals overlapping [a, b),
+            found with binary search alone. """
+        total = 0
+        hi = np.searchsorted(self.starts, b, side='left')
+        for positions, bound in zip(self.classPositions, self.classBounds):
+            lo = np.searchsorted(self.starts, a - bound, side='left')
+            total += int(np.searchsorted(positions, hi) - np.searchsorted(positions, lo))
+        return total
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every interval,
+            with page 0 starting at time 0. """
+        return max(ceil(self.maxStop / pageSz), 1)
+
+
+# Occupancy of each plugin over a range of equal-width bins.
+# edges has one more entry than the bins; busy and counts are (plugin code, bin).
+OccupancyBins = namedtuple('OccupancyBins', ['edges', 'busy', 'counts'])
+
+
+class OccupancyPyramid():
+    """ Part of ILLIXR Visualizer's Model.
+        Level-of-detail summary of a trace: per-plugin busy time (ns) and
+        number of intervals started, in bins at power-of-two resolutions.
+        Level 0 holds at most maxBins bins; each coarser level halves the
+        number of bins, so any view of the trace is drawn from a bounded
+        number of bins whatever the number of events. """
+    def __init__(self, codes, starts, stops, nCodes : int, maxBins=2**16, minWidth=2**10, chunkSz=2**22):
+        """ Builds every level, vectorized over chunks of chunkSz events. """
+        minStart = int(starts[0]) if len(starts) else 0
+        maxStop = int(stops.max()) if len(stops) else 0
+        chunks = ((codes[chunk:chunk + chunkSz], starts[chunk:chunk + chunkSz], stops[chunk:chunk + chunkSz])
+            for chunk in range(0, len(starts), chunkSz))
+        self._build(chunks, nCodes, minStart, maxStop, maxBins, minWidth)
+    
+    @classmethod
+    def from_chunks(cls, chunks, nCodes : int, minStart : int, maxStop : int, maxBins=2**16, minWidth=2**10):
+        """ Builds a pyramid from an iterable of (codes, starts, stops)
+            chunks in any order, given the trace's bounds, so the events
+            never need to be held in memory at once. """
+        pyramid = cls.__new__(cls)
+        pyramid._build(chunks, nCodes, minStart, maxStop, maxBins, minWidth)
+        return pyramid
+    
+    def _build(self, chunks, nCodes : int, minStart : int, maxStop : int, maxBins : int, minWidth : int):
+        """ Accumulates the finest level over the chunks, then builds
+            every coarser one. """
+        self.nCodes = nCodes
+        self.maxBins = maxBins
+        
+        # Finest bin width: the smallest power of two giving at most maxBins bins
+        self.width = minWidth
+        while (maxStop - minStart) / self.width > maxBins:
+            self.width *= 2
+        self.origin = (minStart // self.width) * self.width
+        nBins = (maxStop - self.origin) // self.width + 1
+        self._build_levels(*self._accumulate(chunks, nCodes, self.origin, self.width, nBins))
+    
+    @staticmethod
+    def _accumulate(chunks, nCodes : int, origin : int, width : int, nBins : int):
+        """ Busy time and interval counts of the chunks' intervals in nBins
+            bins of width ns from origin, as (plugin code, bin) arrays.
+            Every interval must fall within the bins. """
+        busy = np.zeros(nCodes * nBins)
+        cover = np.zeros(nCodes * nBins + 1) # Differences of fully covered interval counts
+        counts = np.zeros(nCodes * nBins, dtype=np.int64)
+        for chunkCodes, chunkStarts, chunkStops in chunks:
+            chunkCodes = chunkCodes.astype(np.int64)
+            chunkStops = np.maximum(chunkStops, chunkStarts)
+            first = (chunkStarts - origin) // width # Bin holding the start
+            last = (chunkStops - origin) // width   # Bin holding the stop
+            
+            # Part of each interval in its first bin
+            firstKeys = chunkCodes * nBins + first
+            firstEnd = origin + (first + 1) * width
+            busy += np.bincount(firstKeys, weights=np.minimum(chunkStops, firstEnd) - chunkStarts, minlength=len(busy))
+            counts += np.bincount(firstKeys, minlength=len(counts))
+            
+            # Part in its last bin, and the bins it covers in between
+            spans = last > first
+            lastKeys = chunkCodes[spans] * nBins + last[spans]
+            busy += np.bincount(lastKeys, weights=chunkStops[spans] - (origin + last[spans] * width), minlength=len(busy))
+            cover += np.bincount(firstKeys[spans] + 1, minlength=len(cover))
+            cover -= np.bincount(lastKeys, minlength=len(cover))
+        covered = np.cumsum(cover[:-1].reshape(nCodes, nBins), axis=1)
+        return busy.reshape(nCodes, nBins) + covered * width, counts.reshape(nCodes, nBins)
+    
+    def add(self, codes, starts, stops, nCodes : int):
+        """ Adds intervals, none starting before the origin, to the finest
+            level. Its bins double in width whenever the trace outgrows
+            maxBins of them, and spare bins are kept past the end so a
+            growing trace is added to in place. Coarser levels are rebuilt
+            when next drawn. """
+        busy, counts = self.levels[0]
+        if not busy.flags.writeable or nCodes > busy.shape[0]:
+            # Mapped from a sidecar, or plugins were added
+            busy = np.pad(busy, ((0, max(nCodes - busy.shape[0], 0)), (0, 0)))
+            counts = np.pad(counts, ((0, max(nCodes - counts.shape[0], 0)), (0, 0)))
+        stops = np.maximum(stops, starts)
+        maxStop = int(stops.max())
+        while (maxStop - self.origin) // self.width + 1 > self.maxBins:
+            # Pairs of bins merge into bins starting at a multiple of their width
+            if self.origin % (2 * self.width):
+                busy = np.pad(busy, ((0, 0), (1, 0)))
+                counts = np.pad(counts, ((0, 0), (1, 0)))
+                self.origin -= self.width
+            if busy.shape[1] % 2:
+                busy = np.pad(busy, ((0, 0), (0, 1)))
+                counts = np.pad(counts, ((0, 0), (0, 1)))
+            busy = busy.reshape(busy.shape[0], -1, 2).sum(axis=2)
+            counts = counts.reshape(counts.shape[0], -1, 2).sum(axis=2)
+            self.width *= 2
+        nBins = (maxStop - self.origin) // self.width + 1
+        if nBins > busy.shape[1]:
+            spare = min(max(nBins, 2 * busy.shape[1]), self.maxBins) - busy.shape[1]
+            busy = np.pad(busy, ((0, 0), (0, spare)))
+            counts = np.pad(counts, ((0, 0), (0, spare)))
+        
+        # Only the bins the new intervals touch are accumulated
+        first = int(starts.min() - self.origin) // self.width
+        last = (maxStop - self.origin) // self.width
+        addedBusy, addedCounts = self._accumulate([(codes, starts, stops)], nCodes,
+            self.origin + first * self.width, self.width, last - first + 1)
+        busy[:nCodes, first:last + 1] += addedBusy
+        counts[:nCodes, first:last + 1] += addedCounts
+        self.nCodes = busy.shape[0]
+        self.levels = [(busy, counts)]
+        self.stale = True
+    
+    @classmethod
+    def from_state(cls, width : int, origin : int, busy, counts):
+        """ Restores a pyramid from its finest level. """
+        pyramid = cls.__new__(cls)
+        pyramid.nCodes = busy.shape[0]
+        pyramid.maxBins = max(2**16, busy.shape[1])
+        pyramid.width = width
+        pyramid.origin = origin
+        pyramid._build_levels(busy, counts)
+        return pyramid
+    
+    def _build_levels(self, busy, counts):
+        """ Builds every level from the finest one. """
+        nCodes = busy.shape[0]
+        
+        # Coarser levels sum pairs of bins
+        self.levels = [(busy, counts)]
+        self.stale = False # Whether coarser levels miss intervals added since
+        while busy.shape[1] > 1:
+            if busy.shape[1] % 2:
+                busy = np.pad(busy, ((0, 0), (0, 1)))
+                counts = np.pad(counts, ((0, 0), (0, 1)))
+            busy = busy.reshape(nCodes, -1, 2).sum(axis=2)
+            counts = counts.reshape(nCodes, -1, 2).sum(axis=2)
+            self.levels.append((busy, counts))
+    
+    def bins(self, a, b, maxBins : int):
+        """ Returns the bins covering [a, b) at the finest level
+            that needs no more than maxBins of them. """
+        if self.stale:
+            self._build_levels(*self.levels[0])
+        level = 0
+        while level < len(self.levels) - 1 and (b - a) / (self.width << level) > maxBins:
+            level += 1
+        width = self.width << level
+        busy, counts = self.levels[level]
+        first = min(max((a - self.origin) // width, 0), busy.shape[1])
+        last = min(max(-((self.origin - b) // width), first), busy.shape[1])
+        return OccupancyBins(
+            edges = self.origin + np.arange(first, last + 1, dtype=np.int64) * width,
+            busy = busy[:, first:last],
+            counts = counts[:, first:last]
+        )
+
+
+# Running concurrency over a range of time, as a step function: peaks[i]
+# intervals run from times[i] until times[i + 1], the last step ending the
+# range. means is None for exact steps; otherwise each step is a bin, with
+# its peak and its mean over the bin.
+ConcurrencySteps = namedtuple('ConcurrencySteps', ['times', 'peaks', 'means'])
+
+
+class ConcurrencyProfile():
+    """ Part of ILLIXR Visualizer's Model.
+        How many intervals run at once across a whole trace, from one
+        sweep over its start and stop events in time order: O(n log n) to
+        order the events, then O(n) vectorized over blocks of them. Holds
+        the running concurrency as a step function, the time spent at
+        each concurrency, and how long each pair of plugins ran at the
+        same time. Peaks and mean concurrency are also kept in bins at
+        power-of-two resolutions, as in the OccupancyPyramid, so any view
+        is drawn from a bounded number of points. """
+    version = 1 # Version of the files written by build()
+    
+    def __init__(self, times, levels, levelTimes, overlaps, origin : int, width : int, peaks, integrals):
+        self.times = times           # Times the concurrency changes at, ascending
+        self.levels = levels         # Concurrency from each of times until the next
+        self.levelTimes = levelTimes # ns spent at each concurrency
+        self.overlaps = overlaps     # (code, code) ns both plugins ran; the diagonal is each plugin's busy time
+        self.origin = origin         # Start of the first bin
+        self.width = width           # Width of the finest bins
+        self.binLevels = [(peaks, integrals)] # Peak and time integral (ns) of the concurrency in each bin, finest first
+        while len(peaks) > 1:
+            if len(peaks) % 2:
+                peaks = np.append(peaks, 0)
+                integrals = np.append(integrals, 0)
+            peaks = peaks.reshape(-1, 2).max(axis=1)
+            integrals = integrals.reshape(-1, 2).sum(axis=1)
+            self.binLevels.append((peaks, integrals))
+    
+    @classmethod
+    def build(cls, events, nCodes : int, capacity : int, directory=None, maxBins=2**16):
+        """ Sweeps (times, codes, deltas) chunks of start (+1) and stop (-1)
+            events of nCodes plugins, in time order with starts first at
+            equal times. capacity bounds the number of events. If directory
+            is given, the step function is written straight into it as
+            memory-mapped files, for traces larger than memory, and the
+            profile is saved there for open(). """
+        tempDirectory = None
+        if directory is not None:
+            tempDirectory = directory + '.tmp' + str(os.getpid())
+            try:
+                os.makedirs(tempDirectory, exist_ok=True)
+                times = np.lib.format.open_memmap(os.path.join(tempDirectory, 'times.npy'), 'w+', np.int64, (capacity,))
+                levels = np.lib.format.open_memmap(os.path.join(tempDirectory, 'levels.npy'), 'w+', np.int32, (capacity,))
+            except OSError:
+                shutil.rmtree(tempDirectory, ignore_errors=True)
+                tempDirectory = None
+        if tempDirectory is None:
+            times = np.empty(capacity, dtype=np.int64)
+            levels = np.empty(capacity, dtype=np.int32)
+        
+        levelTimes = np.zeros(1)
+        overlaps = np.zeros((nCodes, nCodes))
+        count = 0
+        lastTime, lastLevel, lastActive = None, 0, np.zeros(nCodes, dtype=np.int32) # Event carried to the next block
+        for blockTimes, blockCodes, blockDeltas in events:
+            if len(blockTimes) == 0:
+                continue
+            if lastTime is None:
+                lastTime = int(blockTimes[0])
+            
+            # Concurrency and each plugin's running intervals after every
+            # event, behind the event carried from the previous block
+            deltas = np.asarray(blockDeltas, dtype=np.int32)
+            steps = np.zeros((len(deltas), nCodes), dtype=np.int32)
+            steps[np.arange(len(deltas)), blockCodes] = deltas
+            eventTimes = np.concatenate(([lastTime], blockTimes))
+            eventLevels = np.concatenate(([lastLevel], lastLevel + np.cumsum(deltas)))
+            active = np.vstack((lastActive, lastActive + np.cumsum(steps, axis=0))) > 0
+            
+            # Each event's level holds until the next event
+            durations = np.diff(eventTimes).astype(np.float64)
+            running = eventLevels[:-1]
+            if running.max() >= len(levelTimes):
+                levelTimes = np.append(levelTimes, np.zeros(running.max() + 1 - len(levelTimes)))
+            levelTimes += np.bincount(running, weights=durations, minlength=len(levelTimes))
+            overlaps += active[:-1].T.astype(np.float64) @ (active[:-1] * durations[:, None])
+            
+            # A step per distinct time, at the level after its last event
+            changes = np.flatnonzero(durations > 0)
+            times[count:count + len(changes)] = eventTimes[changes]
+            levels[count:count + len(changes)] = running[changes]
+            count += len(changes)
+            lastTime, lastLevel = int(eventTimes[-1]), int(eventLevels[-1])
+            lastActive = lastActive + steps.sum(axis=0)
+        if lastTime is not None:
+            times[count], levels[count] = lastTime, lastLevel # Back to 0
+            count += 1
+        
+        times, levels = times[:count], levels[:count]
+        origin, width, peaks, integrals = cls._bins(times, levels, maxBins)
+        if tempDirectory is None:
+            return cls(times, levels, levelTimes, overlaps, origin, width, peaks, integrals)
+        for name, array in (('levelTimes', levelTimes), ('overlaps', overlaps), ('peaks', peaks), ('integrals', integrals)):
+            np.save(os.path.join(tempDirectory, name + '.npy'), array)
+        times.base.flush()
+        levels.base.flush()
+        # meta.json is written last and marks the profile complete
+        with open(os.path.join(tempDirectory, 'meta.json'), 'w') as metaFile:
+            json.dump({'version': cls.version, 'count': count, 'origin': origin, 'width': width}, metaFile)
+        del times, levels
+        try:
+            os.rename(tempDirectory, directory)
+        except OSError:
+            shutil.rmtree(tempDirectory, ignore_errors=True) # Another process saved the same profile first
+        return cls.open(directory)
+    
+    @classmethod
+    def open(cls, directory : str):
+        """ Opens a profile saved by build(), memory-mapping its step
+            function. Returns None if it is missing, incomplete or
+            outdated. """
+        try:
+            with open(os.path.join(directory, 'meta.json')) as metaFile:
+                meta = json.load(metaFile)
+            if meta['version'] != cls.version:
+                return None
+            arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+                for name in ('times', 'levels', 'levelTimes', 'overlaps', 'peaks', 'integrals')}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(arrays['times'][:meta['count']], arrays['levels'][:meta['count']],
+            np.asarray(arrays['levelTimes']), np.asarray(arrays['overlaps']), meta['origin'], meta['width'],
+            np.asarray(arrays['peaks']), np.asarray(arrays['integrals']))
+    
+    @staticmethod
+    def _bins(times, levels, maxBins : int, chunkSz=2**22):
+        """ Returns the origin and power-of-two width of at most maxBins
+            bins covering the steps, with each bin's peak concurrency and
+            the integral of concurrency over it, in chunks of chunkSz
+            steps. """
+        if len(times) == 0:
+            return 0, 1, np.zeros(1, dtype=np.int32), np.zeros(1)
+        origin = int(times[0])
+        span = int(times[-1]) - origin
+        width = 1
+        while span / width > maxBins:
+            width <<= 1
+        nBins = span // width + 1
+        edges = origin + np.arange(nBins + 1, dtype=np.int64) * width
+        
+        # A bin's peak is the level at its start or of a step inside it
+        at = np.searchsorted(times, edges, side='right') - 1 # Step in force at each edge
+        peaks = np.asarray(levels[at[:-1]], dtype=np.int32)
+        integralAt = np.empty(nBins + 1) # Integral from the origin to each edge
+        carry = 0.0
+        for chunk in range(0, len(times), chunkSz):
+            end = min(chunk + chunkSz, len(times))
+            chunkTimes = np.asarray(times[chunk:end])
+            chunkLevels = np.asarray(levels[chunk:end])
+            nextTimes = np.append(chunkTimes[1:], times[end] if end < len(times) else chunkTimes[-1])
+            integrals = carry + np.concatenate(([0], np.cumsum(chunkLevels * (nextTimes - chunkTimes).astype(np.float64))))
+            
+            bins = (chunkTimes - origin) // width
+            firsts = np.flatnonzero(np.diff(bins, prepend=-1))
+            np.maximum.at(peaks, bins[firsts], np.maximum.reduceat(chunkLevels, firsts))
+            
+            first, last = np.searchsorted(at, [chunk, end])
+            steps = at[first:last] - chunk
+            integralAt[first:last] = integrals[steps] + chunkLevels[steps] * (edges[first:last] - chunkTimes[steps])
+            carry = integrals[-1]
+        return origin, width, peaks, np.diff(integralAt)
+    
+    def time_at_least(self):
+        """ ns spent with at least k intervals running, indexed by k. """
+        return np.cumsum(self.levelTimes[::-1])[::-1]
+    
+    def window(self, a, b, maxPoints : int):
+        """ Returns the ConcurrencySteps over [a, b): the exact steps if
+            there are no more than maxPoints, otherwise the bins at the
+            finest level needing no more than maxPoints of them. """
+        first = max(int(np.searchsorted(self.times, a, side='right')) - 1, 0)
+        last = int(np.searchsorted(self.times, b, side='left'))
+        if last - first <= maxPoints:
+            levels = np.asarray(self.levels[first:last])
+            return ConcurrencySteps(
+                times = np.append(np.maximum(self.times[first:last], a), b),
+                peaks = np.append(levels, levels[-1:]),
+                means = None
+            )
+        level = 0
+        while level < len(self.binLevels) - 1 and (b - a) / (self.width << level) > maxPoints:
+            level += 1
+        width = self.width << level
+        peaks, integrals = self.binLevels[level]
+        first = min(max((a - self.origin) // width, 0), len(peaks))
+        last = min(max(-((self.origin - b) // width), first), len(peaks))
+        return ConcurrencySteps(
+            times = self.origin + np.arange(first, last + 1, dtype=np.int64) * width,
+            peaks = np.append(peaks[first:last], peaks[last - 1:last]),
+            means = np.append(integrals[first:last], integrals[last - 1:last]) / width
+        )
+
+
+class OutlierIndex():
+    """ Part of ILLIXR Visualizer's Model.
+        Two orderings of a store's rows, each grouped by plugin code: by
+        duration, longest first, and by iteration number. A plugin's k
+        longest intervals are the first k of its group, the intervals at
+        any rank are found directly and those of an iteration by binary
+        search, so queries read O(k log n) entries of the orderings and
+        answer at once on traces of 10^8 intervals. """
+    def __init__(self, codes, starts, stops, iterations, nCodes : int):
+        """ Orders the rows of the given columns. """
+        rowType = np.int32 if len(codes) <= np.iinfo(np.int32).max else np.int64
+        self.bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=nCodes)))) # Each code's group
+        self.byDuration = np.lexsort((starts - stops, codes)).astype(rowType)
+        self.byIteration = np.lexsort((iterations, codes)).astype(rowType)
+    
+    @classmethod
+    def from_state(cls, bounds, byDuration, byIteration):
+        """ Rebuilds an index from its saved orderings. """
+        index = cls.__new__(cls)
+        index.bounds = bounds
+        index.byDuration = byDuration
+        index.byIteration = byIteration
+        return index
+    
+    def count(self, code : int):
+        """ The number of intervals of plugin code. """
+        return int(self.bounds[code + 1] - self.bounds[code]) if code + 1 < len(self.bounds) else 0
+    
+    def longest(self, code : int, k : int, first=0):
+        """ Rows of the intervals of plugin code ranked [first, first + k)
+            by duration, longest first. """
+        start = self.bounds[code] + first
+        return self.byDuration[start:max(min(start + k, self.bounds[code + 1]), start)]
+    
+    def iteration(self, code : int, iteration : int, iterations):
+        """ Rows of the intervals of plugin code numbered iteration, given
+            the store's iteration column. """
+        def search(lo, hi, right):
+            while lo < hi:
+                mid = (lo + hi) // 2
+                value = iterations[self.byIteration[mid]]
+                if value < iteration or (right and value == iteration):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+        lo, hi = int(self.bounds[code]), int(self.bounds[code + 1])
+        first = search(lo, hi, False)
+        return self.byIteration[first:search(first, hi, True)]
+
+
+# A table logged by ILLIXR that can be drawn on the timeline. Its times
+# are read from the start and stop columns, named for the clock ('cpu' or
+# 'wall') in place of {}, under each of the clocks it was logged with.
+# Tables without a plugin ID column are drawn in a lane of their own. An
+# interval may instead stop a duration column after its start, and
+# tables with neither are drawn as markers of instantaneous events. device
+# is what an interval occupies while it runs: 'cpu' for a thread, 'gpu',
+# or None for markers. iteration is the column numbering each plugin's
+# intervals.
+DataSource = namedtuple('DataSource', ['table', 'idColumn', 'lane', 'clocks', 'start', 'stop', 'duration', 'skips', 'device',
+    'iteration'])
+
+# Data sources, by the name their database is given under
+DATA_SOURCES = OrderedDict([
+    ('switchboard', DataSource('switchboard_callback', 'plugin_id', None, ('cpu', 'wall'),
+        '{}_time_start', '{}_time_stop', None, None, 'cpu', 'iteration_no')),
+    ('threadloop', DataSource('threadloop_iteration', 'plugin_id', None, ('cpu', 'wall'),
+        '{}_time_start', '{}_time_stop', None, 'skips', 'cpu', 'iteration_no')),
+    ('timewarp_gpu', DataSource('timewarp_gpu', None, 'timewarp (GPU)', ('wall',),
+        'wall_time_start', None, 'gpu_time_duration', None, 'gpu', 'iteration_no')),
+    ('check_queues', DataSource('switchboard_check_queues', None, 'switchboard queues', ('cpu', 'wall'),
+        '{}_time_start', '{}_time_stop', None, None, 'cpu', 'iteration_no')),
+    ('mtp_record', DataSource('mtp_record', None, 'vsync', ('wall',),
+        'vsync', None, None, None, None, 'iteration_no'))
+])
+
+SOURCES = tuple(DATA_SOURCES) # Data sources, indexed by source tag
+
+# Tags of the sources whose intervals occupy a CPU thread
+CPU_SOURCES = tuple(tag for tag, source in enumerate(DATA_SOURCES.values()) if source.device == 'cpu')
+
+# Lanes of the sources without plugin IDs, under IDs no plugin uses
+LANE_NAMES = {-1 - tag: source.lane for tag, source in enumerate(DATA_SOURCES.values()) if source.lane}
+
+# Plugin colors, indexed by plugin code: plotly.colors.qualitative.Plotly
+PLUGIN_COLORS = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52']
+
+
+# A clipped window of a TraceStore, as parallel arrays in start order.
+TraceWindow = namedtuple('TraceWindow', ['codes', 'starts', 'stops', 'sources'])
+
+# Intervals of a TraceStore with everything logged about them, as parallel
+# arrays.
+TraceEvents = namedtuple('TraceEvents', ['codes', 'starts', 'stops', 'sources', 'iterations'])
+
+
+class TraceStore():
+    """ ILLIXR Visualizer's Model.
+        Columnar store of the logged intervals, sorted by start time.
+        Plugins are kept as small integer codes into one code -> name
+        table, times as int64 columns and each row is tagged with the
+        source it was logged by (see SOURCES) and numbered by its
+        iteration: about 28 bytes per event, and 8 more for the outlier
+        index. Threadloop skips, mostly zero, are kept sparsely. Times are
+        in ns after origin, which is nonzero for wall clock times. """
+    sidecarVersion = 3 # Version of the files written by save()
+    
+    def __init__(self, pluginIds, names, codes, starts, stops, sources, index=None, pyramid=None,
+            skipRows=None, skipCounts=None, origin=0, iterations=None, outliers=None):
+        """ Wraps columns already sorted by start time. The index,
+            pyramid and outlier index are built unless supplied. Rows
+            without an iteration number are numbered -1. """
+        self.pluginIds = pluginIds # Plugin ID of each code
+        self.names = names         # Plugin name of each code
+        self.codes = codes
+        self.starts = starts
+        self.stops = stops
+        self.sources = sources
+        self.iterations = iterations if iterations is not None else np.full(len(starts), -1, dtype=np.int64)
+        self.skipRows = skipRows if skipRows is not None else np.empty(0, dtype=np.int64)       # Sorted rows with skips
+        self.skipCounts = skipCounts if skipCounts is not None else np.empty(0, dtype=np.int64) # Skips of each of those rows
+        self.origin = origin # Clock time of time 0, in ns
+        self.tail = None     # TraceTail following a capture still being written
+        self.buffers = None  # Columns with spare capacity, once appended to
+        self.index = index if index is not None else IntervalIndex(starts, stops)
+        self.pyramid = pyramid if pyramid is not None else OccupancyPyramid(codes, starts, stops, len(names))
+        self.outliers = outliers if outliers is not None else OutlierIndex(codes, starts, stops, self.iterations, len(names))
+        self.order = None # Cached plugin_order()
+        self.directory = None   # Sidecar directory the store was saved to or opened from
+        self.concurrency = None # Cached concurrency_profile()
+    
+    def save(self, directory : str):
+        """ Writes the store as a sidecar directory of .npy columns and a
+            meta.json, which open() memory-maps. The directory is written
+            under a temporary name and renamed into place when complete. """
+        tempDirectory = directory + '.tmp' + str(os.getpid())
+        os.makedirs(tempDirectory, exist_ok=True)
+        indexState, positions = self.index.state()
+        busy, counts = self.pyramid.levels[0]
+        outliers = self.outlier_index()
+        arrays = {
+            'codes': self.codes, 'starts': self.starts, 'stops': self.stops, 'sources': self.sources,
+            'iterations': self.iterations, 'positions': positions, 'busy': busy, 'counts': counts,
+            'skipRows': self.skipRows, 'skipCounts': self.skipCounts, 'outlierBounds': outliers.bounds,
+            'byDuration': outliers.byDuration, 'byIteration': outliers.byIteration
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tempDirectory, name + '.npy'), array)
+        meta = {
+            'version': self.sidecarVersion,
+            'pluginIds': np.asarray(self.pluginIds).tolist(),
+            'names': self.names.tolist(),
+            'order': self.plugin_order(),
+            'origin': self.origin,
+            'index': indexState,
+            'pyramid': {'width': self.pyramid.width, 'origin': self.pyramid.origin}
+        }
+        # meta.json is written last and marks the sidecar complete
+        with open(os.path.join(tempDirectory, 'meta.json'), 'w') as metaFile:
+            json.dump(meta, metaFile)
+        try:
+            os.rename(tempDirectory, directory)
+        except OSError:
+            # Another process saved the same sidecar first
+            shutil.rmtree(tempDirectory, ignore_errors=True)
+        self.directory = directory
+    
+    @classmethod
+    def open(cls, directory : str):
+        """ Opens a sidecar written by save(), memory-mapping its columns
+            so pages are read lazily through the OS page cache. Returns
+            None if the sidecar is missing, incomplete or outdated. """
+        try:
+            with open(os.path.join(directory, 'meta.json')) as metaFile:
+                meta = json.load(metaFile)
+            if meta['version'] != cls.sidecarVersion:
+                return None
+            arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+                for name in ('codes', 'starts', 'stops', 'sources', 'iterations', 'positions', 'busy', 'counts',
+                    'skipRows', 'skipCounts', 'outlierBounds', 'byDuration', 'byIteration')}
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        index = IntervalIndex.from_state(arrays['starts'], arrays['stops'], meta['index'], arrays['positions'])
+        pyramid = OccupancyPyramid.from_state(meta['pyramid']['width'], meta['pyramid']['origin'],
+            np.asarray(arrays['busy']), np.asarray(arrays['counts']))
+        store = cls(np.array(meta['pluginIds'], dtype=np.int64), np.array(meta['names'], dtype=object),
+            arrays['codes'], arrays['starts'], arrays['stops'], arrays['sources'], index, pyramid,
+            arrays['skipRows'], arrays['skipCounts'], meta.get('origin', 0), arrays['iterations'],
+            OutlierIndex.from_state(np.asarray(arrays['outlierBounds']), arrays['byDuration'], arrays['byIteration']))
+        store.order = meta['order']
+        store.directory = directory
+        return store
+    
+    @classmethod
+    def from_tables(cls, pluginIds, pluginNames, tables : list, rebase=False):
+        """ Builds a store from the plugin name table's columns and a list
+            of (source, pluginIds, starts, stops, skips, iterations) data
+            tables, where skips and iterations are None for tables without
+            them. Every column is
+            allocated once for all tables, then merged by start time.
+            IDs missing from the name table are named after their ID, or
+            their lane (see LANE_NAMES). If rebase is set, times are
+            shifted so the first interval starts at 0. """
+        dataIds = [np.unique(ids) for _, ids, _, _, _, _ in tables]
+        allIds = np.unique(np.concatenate([np.asarray(pluginIds, dtype=np.int64)] + dataIds))
+        nameOf = {**LANE_NAMES, **dict(zip(np.asarray(pluginIds).tolist(), pluginNames))}
+        names = np.array([nameOf.get(pluginId, str(pluginId)) for pluginId in allIds.tolist()], dtype=object)
+        origin = min((int(starts.min()) for _, _, starts, _, _, _ in tables if len(starts)), default=0) if rebase else 0
+        
+        total = sum(len(starts) for _, _, starts, _, _, _ in tables)
+        codeType = np.int16 if len(allIds) <= np.iinfo(np.int16).max else np.int32
+        codes = np.empty(total, dtype=codeType)
+        starts = np.empty(total, dtype=np.int64)
+        stops = np.empty(total, dtype=np.int64)
+        sources = np.empty(total, dtype=np.uint8)
+        skips = np.zeros(total, dtype=np.int32)
+        iterations = np.full(total, -1, dtype=np.int64)
+        offset = 0
+        for source, tableIds, tableStarts, tableStops, tableSkips, tableIterations in tables:
+            end = offset + len(tableStarts)
+            codes[offset:end] = np.searchsorted(allIds, tableIds)
+            starts[offset:end] = tableStarts
+            stops[offset:end] = tableStops
+            sources[offset:end] = source
+            if tableSkips is not None:
+                skips[offset:end] = tableSkips
+            if tableIterations is not None:
+                iterations[offset:end] = tableIterations
+            offset = end
+        if origin:
+            starts -= origin
+            stops -= origin
+        
+        # Each table is logged in close to start order, so the stable sort,
+        # a timsort, merges the tables' sorted runs rather than sorting anew
+        if np.all(starts[1:] >= starts[:-1]):
+            order = slice(None) # Already merged, as for a single sorted table
+        else:
+            order = np.argsort(starts, kind='stable')
+        skips = skips[order]
+        skipRows = np.flatnonzero(skips)
+        return cls(allIds, names, codes[order], starts[order], stops[order], sources[order],
+            skipRows=skipRows, skipCounts=skips[skipRows].astype(np.int64), origin=origin, iterations=iterations[order])
+    
+    def append(self, tables : list, rebase=False):
+        """ Adds the rows of (source, pluginIds, starts, stops, skips,
+            iterations) data tables, as from_tables takes them, to a trace
+            still being captured. New rows start close to the end of the
+            trace, so only the rows starting after the earliest new one are
+            merged again, and the columns, index and pyramid grow into
+            spare capacity: the cost is amortized over the new rows. The
+            outlier index is ordered again when next used. An empty store
+            is rebased if rebase is set. Returns the earliest new start, or
+            None if there are no new rows. """
+        tables = [table for table in tables if len(table[2])]
+        if not tables:
+            return None
+        ids = np.concatenate([tableIds for _, tableIds, _, _, _, _ in tables]).astype(np.int64)
+        starts = np.concatenate([tableStarts for _, _, tableStarts, _, _, _ in tables]).astype(np.int64)
+        stops = np.concatenate([tableStops for _, _, _, tableStops, _, _ in tables]).astype(np.int64)
+        sources = np.concatenate([np.full(len(tableStarts), source, dtype=np.uint8) for source, _, tableStarts, _, _, _ in tables])
+        skips = np.concatenate([tableSkips if tableSkips is not None else np.zeros(len(tableStarts), dtype=np.int64)
+            for _, _, tableStarts, _, tableSkips, _ in tables]).astype(np.int64)
+        iterations = np.concatenate([tableIterations if tableIterations is not None else np.full(len(tableStarts), -1)
+            for _, _, tableStarts, _, _, tableIterations in tables]).astype(np.int64)
+        if rebase and len(self) == 0:
+            self.origin = int(starts.min())
+        starts -= self.origin
+        stops -= self.origin
+        
+        # Plugins first seen now get new codes, after the existing ones
+        codeOf = {pluginId: code for code, pluginId in enumerate(self.pluginIds.tolist())}
+        uniqueIds, inverse = np.unique(ids, return_inverse=True)
+        for pluginId in uniqueIds.tolist():
+            if pluginId not in codeOf:
+                codeOf[pluginId] = len(self.pluginIds)
+                self.pluginIds = np.append(self.pluginIds, pluginId)
+                self.names = np.append(self.names, np.array([LANE_NAMES.get(pluginId, str(pluginId))], dtype=object))
+        codes = np.array([codeOf[pluginId] for pluginId in uniqueIds.tolist()], dtype=np.int64)[inverse]
+        if self.order is not None:
+            self.order += [name for name in self.names[np.unique(codes)] if name not in self.order]
+        
+        # Columns grow geometrically, copying the existing rows only then
+        n = len(self)
+        total = n + len(starts)
+        if self.buffers is None or len(self.buffers['starts']) < total:
+            capacity = max(total, 2 * n, 1024)
+            codeType = self.codes.dtype if len(self.names) <= np.iinfo(self.codes.dtype).max else np.int32
+            buffers = {
+                'codes': np.empty(capacity, dtype=codeType), 'starts': np.empty(capacity, dtype=np.int64),
+                'stops': np.empty(capacity, dtype=np.int64), 'sources': np.empty(capacity, dtype=np.uint8),
+                'iterations': np.empty(capacity, dtype=np.int64)
+            }
+            for name, buffer in buffers.items():
+                buffer[:n] = getattr(self, name)
+            self.buffers = buffers
+        
+        # Merge the new rows into the rows starting at or after the earliest of them
+        first = int(np.searchsorted(self.starts, starts.min(), side='right'))
+        merged = np.argsort(np.concatenate((self.buffers['starts'][first:n], starts)), kind='stable')
+        for name, column in (('codes', codes), ('starts', starts), ('stops', stops), ('sources', sources),
+                ('iterations', iterations)):
+            buffer = self.buffers[name]
+            buffer[first:total] = np.concatenate((buffer[first:n], column))[merged]
+            setattr(self, name, buffer[:total])
+        
+        # Skips of the merged rows, kept sparsely as before
+        keep, moved = np.searchsorted(self.skipRows, [first, n])
+        mergedSkips = np.zeros(total - first, dtype=np.int64)
+        mergedSkips[self.skipRows[keep:moved] - first] = self.skipCounts[keep:moved]
+        mergedSkips[n - first:] = skips
+        mergedSkips = mergedSkips[merged]
+        skipRows = np.flatnonzero(mergedSkips)
+        self.skipRows = np.concatenate((self.skipRows[:keep], first + skipRows))
+        self.skipCounts = np.concatenate((self.skipCounts[:keep], mergedSkips[skipRows]))
+        
+        self.index.extend(self.starts, self.stops, first)
+        self.concurrency = None
+        self.outliers = None
+        if n == 0 or starts.min() < self.pyramid.origin:
+            self.pyramid = OccupancyPyramid(self.codes, self.starts, self.stops, len(self.names))
+        else:
+            self.pyramid.add(codes, starts, stops, len(self.names))
+        return int(starts.min())
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    @property
+    def nbytes(self):
+        """ Memory held by the columns, excluding the index. """
+        return self.codes.nbytes + self.starts.nbytes + self.stops.nbytes + self.sources.nbytes + self.iterations.nbytes
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every interval. """
+        return self.index.page_count(pageSz)
+    
+    def plugin_order(self):
+        """ Names of the plugins with data, in order of first appearance. """
+        if self.order is None:
+            codes, firsts = np.unique(self.codes, return_index=True)
+            self.order = self.names[codes[np.argsort(firsts)]].tolist()
+        return list(self.order)
+    
+    def chunks(self, a=None, b=None, chunkSz=2**22):
+        """ Yields the intervals starting in [a, b), or in the whole trace,
+            as (codes, starts, stops, skips) chunks of at most chunkSz rows.
+            Rows come in start order. """
+        first = 0 if a is None else int(np.searchsorted(self.starts, a, side='left'))
+        last = len(self.starts) if b is None else int(np.searchsorted(self.starts, b, side='left'))
+        for chunk in range(first, last, chunkSz):
+            end = min(chunk + chunkSz, last)
+            skips = np.zeros(end - chunk, dtype=np.int64)
+            skipFirst, skipLast = np.searchsorted(self.skipRows, [chunk, end])
+            skips[self.skipRows[skipFirst:skipLast] - chunk] = self.skipCounts[skipFirst:skipLast]
+            yield self.codes[chunk:end], self.starts[chunk:end], self.stops[chunk:end], skips
+    
+    def events(self, chunkSz=2**20):
+        """ Yields the start (+1) and stop (-1) events of the intervals
+            run on the CPU, as (times, codes, deltas) chunks of at most
+            chunkSz events. Events come in time order, starts before stops
+            at equal times. Starts are already in order, so only the stops
+            are sorted, and the two are merged by where each falls in the
+            other. """
+        rows = np.flatnonzero(np.isin(self.sources, CPU_SOURCES) & (self.stops > self.starts))
+        starts = self.starts[rows]
+        stopOrder = np.argsort(self.stops[rows], kind='stable')
+        stops = self.stops[rows][stopOrder]
+        times = np.empty(2 * len(rows), dtype=np.int64)
+        codes = np.empty(2 * len(rows), dtype=np.int32)
+        deltas = np.empty(2 * len(rows), dtype=np.int8)
+        startAt = np.arange(len(rows)) + np.searchsorted(stops, starts, side='left')
+        stopAt = np.arange(len(rows)) + np.searchsorted(starts, stops, side='right')
+        times[startAt], codes[startAt], deltas[startAt] = starts, self.codes[rows], 1
+        times[stopAt], codes[stopAt], deltas[stopAt] = stops, self.codes[rows][stopOrder], -1
+        for chunk in range(0, len(times), chunkSz):
+            yield times[chunk:chunk + chunkSz], codes[chunk:chunk + chunkSz], deltas[chunk:chunk + chunkSz]
+    
+    def outlier_index(self):
+        """ The OutlierIndex of the rows, ordered again if rows were
+            appended since it was last used. """
+        if self.outliers is None:
+            self.outliers = OutlierIndex(self.codes, self.starts, self.stops, self.iterations, len(self.names))
+        return self.outliers
+    
+    def interval_count(self, code : int):
+        """ The number of intervals of plugin code. """
+        return self.outlier_index().count(code)
+    
+    def longest_intervals(self, code : int, k : int, first=0):
+        """ The intervals of plugin code ranked [first, first + k) by
+            duration, longest first. """
+        return self._events(self.outlier_index().longest(code, k, first))
+    
+    def iteration_intervals(self, code : int, iteration : int):
+        """ The intervals of plugin code numbered iteration, in start
+            order. """
+        return self._events(np.sort(self.outlier_index().iteration(code, iteration, self.iterations)))
+    
+    def intervals(self, a=None, b=None, chunkSz=2**20):
+        """ Yields the intervals starting in [a, b), or in the whole trace,
+            as TraceEvents chunks of at most chunkSz rows, in start order. """
+        first = 0 if a is None else int(np.searchsorted(self.starts, a, side='left'))
+        last = len(self.starts) if b is None else int(np.searchsorted(self.starts, b, side='left'))
+        for chunk in range(first, last, chunkSz):
+            yield self._events(slice(chunk, min(chunk + chunkSz, last)))
+    
+    def _events(self, rows):
+        """ The given rows as TraceEvents. """
+        return TraceEvents(codes=self.codes[rows], starts=self.starts[rows], stops=self.stops[rows],
+            sources=self.sources[rows], iterations=self.iterations[rows])
+    
+    def concurrency_profile(self):
+        """ The ConcurrencyProfile of the trace, built on first use and
+            saved beside the sidecar, if any, for later loads. """
+        if self.concurrency is None:
+            directory = os.path.join(self.directory, 'concurrency') if self.directory and self.tail is None else None
+            if directory is not None:
+                self.concurrency = ConcurrencyProfile.open(directory)
+            if self.concurrency is None:
+                capacity = 2 * int(np.count_nonzero(np.isin(self.sources, CPU_SOURCES))) + 1
+                self.concurrency = ConcurrencyProfile.build(self.events(), len(self.names), capacity, directory)
+        return self.concurrency
+    
+    def window(self, a, b):
+        """ Returns the intervals overlapping [a, b), clipped to it. """
+        rows = self.index.overlapping(a, b)
+        return TraceWindow(
+            codes = self.codes[rows],
+            starts = np.maximum(self.starts[rows], a),
+            stops = np.minimum(self.stops[rows], b),
+            sources = self.sources[rows]
+        )
+
+
+class LazyIntervalIndex():
+    """ Part of ILLIXR Visualizer's Model.
+        Stands in for an IntervalIndex over a LazyTraceStore, answering
+        size estimates from the occupancy pyramid without touching the
+        intervals. """
+    def __init__(self, pyramid, minStart : int, maxStop : int, longest : int):
+        self.pyramid = pyramid
+        self.minStart = minStart
+        self.maxStop = maxStop
+        self.longest = longest # Longest duration of any interval
+    
+    def estimate(self, a, b):
+        """ Upper bound on the number of intervals overlapping [a, b):
+            those started in the finest bins covering [a - longest, b). """
+        _, counts = self.pyramid.levels[0]
+        width = self.pyramid.width
+        first = min(max((a - self.longest - self.pyramid.origin) // width, 0), counts.shape[1])
+        last = min(max(-((self.pyramid.origin - b) // width), first), counts.shape[1])
+        return int(counts[:, first:last].sum())
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every interval,
+            with page 0 starting at time 0. """
+        return max(ceil(self.maxStop / pageSz), 1)
+
+
+class LazyTraceStore():
+    """ ILLIXR Visualizer's Model.
+        Stands in for a TraceStore when a trace is larger than memory.
+        The intervals are copied once into an indexed sidecar database and
+        every window is fetched from it with range queries, so only the
+        pages being drawn are held in memory. Each plugin's longest
+        duration bounds how long before a window an overlapping interval
+        can start, and the occupancy pyramid, built in the same pass,
+        draws the overview. Expression indexes on each plugin's durations
+        and iteration numbers find its outliers. """
+    sidecarVersion = 3 # Version of the databases written by build()
+    
+    def __init__(self, path : str):
+        """ Opens a database written by build(), reading only its plugin,
+            span and pyramid tables. Raises sqlite3.Error, KeyError or
+            ValueError if it is not one. """
+        self.path = path
+        self.lock = threading.Lock() # The connection is shared by the GUI and worker threads
+        self.connection = sqlite3.connect("file:" + path + "?mode=ro", uri=True, check_same_thread=False)
+        try:
+            meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+            if int(meta['version']) != self.sidecarVersion:
+                raise ValueError("Outdated sidecar")
+            plugins = self.connection.execute("SELECT plugin_id, name FROM plugin ORDER BY code").fetchall()
+            spans = self.connection.execute(
+                "SELECT code, intervals, first_start, last_stop, longest FROM plugin_span ORDER BY first_start").fetchall()
+            width, origin, nBins, busy, counts = self.connection.execute(
+                "SELECT width, origin, bins, busy, counts FROM pyramid").fetchone()
+        except (sqlite3.Error, KeyError, ValueError, TypeError):
+            self.connection.close()
+            raise
+        
+        self.pluginIds = np.array([pluginId for pluginId, _ in plugins], dtype=np.int64)
+        self.names = np.array([name for _, name in plugins], dtype=object)
+        self.longest = {code: longest for code, _, _, _, longest in spans} # Longest duration per plugin code
+        self.counts = {code: intervals for code, intervals, _, _, _ in spans}
+        self.nRows = sum(intervals for _, intervals, _, _, _ in spans)
+        self.order = [self.names[code] for code, _, _, _, _ in spans]
+        pyramid = OccupancyPyramid.from_state(width, origin,
+            np.frombuffer(busy, dtype=np.float64).reshape(-1, nBins),
+            np.frombuffer(counts, dtype=np.int64).reshape(-1, nBins))
+        self.pyramid = pyramid
+        self.origin = int(meta.get('origin', 0)) # Clock time of time 0, in ns
+        self.tail = None # Lazy stores are never live
+        self.concurrency = None # Cached concurrency_profile()
+        self.index = LazyIntervalIndex(pyramid,
+            min((first for _, _, first, _, _ in spans), default=0),
+            max((last for _, _, _, last, _ in spans), default=0),
+            max(self.longest.values(), default=0))
+    
+    @classmethod
+    def open(cls, path : str):
+        """ Opens a database written by build(). Returns None if it is
+            missing, incomplete or outdated. """
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (sqlite3.Error, KeyError, ValueError, TypeError):
+            return None
+    
+    @staticmethod
+    def build(path : str, namePath : str, nameTable : tuple, tables : list, rebase=False, progress=None):
+        """ Copies a trace into a new sidecar database at path. nameTable
+            is the (table, ID column, name column) of the plugin name
+            database and tables a list of (source, database path, table,
+            ID, start, stop, skips, iteration) data tables, where the last
+            five are SQL expressions over the table's row, t. Rows without both times
+            are skipped. If rebase is set, times are shifted so the first
+            interval starts at 0. The copy is made and indexed by SQLite in
+            bounded memory and renamed into place when complete. If given,
+            progress(percent, message) is called as the build advances and
+            may raise to abort it. Raises sqlite3.Error on a malformed
+            database. """
+        if progress is None:
+            progress = lambda percent, message: None
+        nameTableName, idColumn, nameColumn = nameTable
+        tempPath = path + '.tmp' + str(os.getpid())
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        connection = sqlite3.connect("file:" + tempPath, uri=True) # URIs let ATTACH open read-only
+        
+        # Long statements check for cancellation as they run
+        state = {'percent': 0, 'message': '', 'error': None}
+        def handler():
+            try:
+                progress(state['percent'], state['message'])
+            except Exception as e:
+                state['error'] = e
+                return 1 # Interrupts the statement
+            return 0
+        def step(percent, message):
+            state['percent'], state['message'] = percent, message
+            progress(percent, message)
+        
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.execute("PRAGMA temp_store = FILE") # Index sorts spill to disk
+            connection.set_progress_handler(handler, 1000000)
+            connection.execute("ATTACH DATABASE ? AS names", ("file:" + namePath + "?mode=ro",))
+            for i, (_, dbPath, _, _, _, _, _, _) in enumerate(tables):
+                connection.execute("ATTACH DATABASE ? AS data" + str(i), ("file:" + dbPath + "?mode=ro",))
+            
+            # Plugin codes, as in TraceStore.from_tables
+            step(0, "Reading plugin IDs")
+            nameOf = dict(connection.execute("SELECT " + idColumn + ", " + nameColumn + " FROM names." + nameTableName))
+            allIds = set(nameOf)
+            nameOf = {**LANE_NAMES, **nameOf}
+            for i, (_, _, tableName, tableId, _, _, _, _) in enumerate(tables):
+                allIds.update(pluginId for pluginId, in
+                    connection.execute("SELECT DISTINCT " + tableId + " FROM data" + str(i) + "." + tableName + " AS t"))
+            allIds.discard(None)
+            connection.execute("CREATE TABLE plugin(code INTEGER PRIMARY KEY, plugin_id INTEGER UNIQUE, name TEXT)")
+            connection.executemany("INSERT INTO plugin VALUES (?, ?, ?)",
+                ((code, pluginId, str(nameOf.get(pluginId, pluginId))) for code, pluginId in enumerate(sorted(allIds))))
+            
+            # Time 0 is the first interval's start when rebased
+            origin = 0
+            if rebase:
+                firsts = [connection.execute("SELECT min(" + start + ") FROM data" + str(i) + "." + tableName + " AS t").fetchone()[0]
+                    for i, (_, _, tableName, _, start, _, _, _) in enumerate(tables)]
+                origin = min((first for first in firsts if first is not None), default=0)
+            
+            # Every table's intervals, tagged with their plugin code and source
+            connection.execute("CREATE TABLE interval(code INTEGER, start INTEGER, stop INTEGER, source INTEGER, skips INTEGER, " +
+                "iteration INTEGER)")
+            for i, (source, _, tableName, tableId, start, stop, skips, iteration) in enumerate(tables):
+                step(5 + 40 * i // len(tables), "Copying " + tableName)
+                connection.execute("INSERT INTO interval SELECT plugin.code, " + start + " - ?, " + stop + " - ?, ?, " +
+                    "coalesce(" + skips + ", 0), coalesce(" + iteration + ", -1) FROM data" + str(i) + "." + tableName +
+                    " AS t JOIN plugin ON plugin.plugin_id = " + tableId + " WHERE " + start + " IS NOT NULL AND " +
+                    stop + " IS NOT NULL", (origin, origin, source))
+            
+            # Covering index answering each plugin's range query alone
+            step(45, "Indexing")
+            connection.execute("CREATE INDEX interval_range ON interval(code, start, stop, source, skips)")
+            
+            # Each plugin's intervals by duration and by iteration number
+            step(60, "Indexing outliers")
+            connection.execute("CREATE INDEX interval_duration ON interval(code, stop - start)")
+            connection.execute("CREATE INDEX interval_iteration ON interval(code, iteration)")
+            step(75, "Summarizing plugins")
+            connection.execute("CREATE TABLE plugin_span AS SELECT code, count(*) AS intervals, min(start) AS first_start, " +
+                "max(stop) AS last_stop, max(stop - start) AS longest FROM interval GROUP BY code")
+            
+            # Occupancy pyramid, built from the intervals in batches
+            step(80, "Building overview")
+            nCodes = len(allIds)
+            minStart, maxStop, nRows = connection.execute(
+                "SELECT min(first_start), max(last_stop), sum(intervals) FROM plugin_span").fetchone()
+            cursor = connection.execute("SELECT code, start, stop FROM interval")
+            def chunks(batchSz=2**20):
+                done = 0
+                while True:
+                    batch = cursor.fetchmany(batchSz)
+                    if not batch:
+                        return
+                    block = np.array(batch, dtype=np.int64)
+                    yield block[:, 0], block[:, 1], block[:, 2]
+                    done += len(batch)
+                    step(80 + int(19 * done / max(nRows, 1)), "Building overview")
+            pyramid = OccupancyPyramid.from_chunks(chunks(), nCodes, minStart or 0, maxStop or 0)
+            busy, counts = pyramid.levels[0]
+            connection.execute("CREATE TABLE pyramid(width INTEGER, origin INTEGER, bins INTEGER, busy BLOB, counts BLOB)")
+            connection.execute("INSERT INTO pyramid VALUES (?, ?, ?, ?, ?)", (pyramid.width, pyramid.origin, busy.shape[1],
+                np.ascontiguousarray(busy, dtype=np.float64).tobytes(), np.ascontiguousarray(counts, dtype=np.int64).tobytes()))
+            
+            # The meta table is written last and marks the sidecar complete
+            connection.execute("CREATE TABLE meta(key TEXT PRIMARY KEY, value TEXT)")
+            connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                [('version', str(LazyTraceStore.sidecarVersion)), ('origin', str(origin))])
+            connection.commit()
+        except sqlite3.OperationalError:
+            connection.close()
+            os.remove(tempPath)
+            if state['error'] is not None:
+                raise state['error'] # Raised by progress while a statement ran
+            raise
+        except BaseException:
+            connection.close()
+            os.remove(tempPath)
+            raise
+        connection.close()
+        os.replace(tempPath, path)
+    
+    def __len__(self):
+        return self.nRows
+    
+    @property
+    def nbytes(self):
+        """ Memory held by the columns: none, they stay on disk. """
+        return 0
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every interval. """
+        return self.index.page_count(pageSz)
+    
+    def plugin_order(self):
+        """ Names of the plugins with data, in order of first appearance. """
+        return list(self.order)
+    
+    def chunks(self, a=None, b=None, chunkSz=2**20):
+        """ Yields the intervals starting in [a, b), or in the whole trace,
+            as (codes, starts, stops, skips) chunks of at most chunkSz rows,
+            streamed from the covering index one plugin at a time. Each
+            plugin's rows come in start order. """
+        a = self.index.minStart if a is None else a
+        b = self.index.maxStop + 1 if b is None else b
+        for code in self.longest:
+            # A cursor of its own, so windows can be read between chunks
+            with self.lock:
+                cursor = self.connection.execute("SELECT code, start, stop, skips FROM interval " +
+                    "WHERE code = ? AND start >= ? AND start < ?", (code, a, b))
+            while True:
+                with self.lock:
+                    batch = cursor.fetchmany(chunkSz)
+                if not batch:
+                    break
+                block = np.array(batch, dtype=np.int64)
+                yield block[:, 0], block[:, 1], block[:, 2], block[:, 3]
+    
+    def events(self, chunkSz=2**20):
+        """ Yields the start (+1) and stop (-1) events of the intervals
+            run on the CPU, as (times, codes, deltas) chunks of at most
+            chunkSz events, in time order with starts before stops at
+            equal times. SQLite sorts them on disk. """
+        where = " FROM interval WHERE source IN (" + ", ".join(str(tag) for tag in CPU_SOURCES) + ") AND stop > start"
+        with self.lock:
+            cursor = self.connection.execute("SELECT start AS t, code, 1 AS d" + where +
+                " UNION ALL SELECT stop, code, -1" + where + " ORDER BY t, d DESC")
+        while True:
+            with self.lock:
+                batch = cursor.fetchmany(chunkSz)
+            if not batch:
+                return
+            block = np.array(batch, dtype=np.int64)
+            yield block[:, 0], block[:, 1], block[:, 2]
+    
+    def concurrency_profile(self):
+        """ The ConcurrencyProfile of the trace, built on first use and
+            saved beside the sidecar database for later loads. """
+        if self.concurrency is None:
+            directory = self.path + '.concurrency'
+            self.concurrency = ConcurrencyProfile.open(directory)
+            if self.concurrency is None:
+                with self.lock:
+                    events, = self.connection.execute("SELECT count(*) FROM interval WHERE source IN (" +
+                        ", ".join(str(tag) for tag in CPU_SOURCES) + ") AND stop > start").fetchone()
+                self.concurrency = ConcurrencyProfile.build(self.events(), len(self.names), 2 * events + 1, directory)
+        return self.concurrency
+    
+    def interval_count(self, code : int):
+        """ The number of intervals of plugin code. """
+        return self.counts.get(code, 0)
+    
+    def longest_intervals(self, code : int, k : int, first=0):
+        """ The intervals of plugin code ranked [first, first + k) by
+            duration, longest first, read backwards from the duration
+            index. """
+        return self._events("WHERE code = ? ORDER BY stop - start DESC LIMIT ? OFFSET ?", (code, k, first))
+    
+    def iteration_intervals(self, code : int, iteration : int):
+        """ The intervals of plugin code numbered iteration, in start
+            order. """
+        return self._events("WHERE code = ? AND iteration = ? ORDER BY start", (code, iteration))
+    
+    def intervals(self, a=None, b=None, chunkSz=2**20):
+        """ Yields the intervals starting in [a, b), or in the whole trace,
+            as TraceEvents chunks of at most chunkSz rows, streamed from
+            the covering index one plugin at a time. Each plugin's rows
+            come in start order. """
+        a = self.index.minStart if a is None else a
+        b = self.index.maxStop + 1 if b is None else b
+        for code in self.longest:
+            with self.lock:
+                cursor = self.connection.execute("SELECT code, start, stop, source, iteration FROM interval " +
+                    "WHERE code = ? AND start >= ? AND start < ? ORDER BY start", (code, a, b))
+            while True:
+                with self.lock:
+                    batch = cursor.fetchmany(chunkSz)
+                if not batch:
+                    break
+                yield self._block(batch)
+    
+    def _events(self, query : str, parameters : tuple):
+        """ The intervals selected by the rest of a query, as TraceEvents. """
+        with self.lock:
+            rows = self.connection.execute("SELECT code, start, stop, source, iteration FROM interval " + query, parameters).fetchall()
+        return self._block(rows)
+    
+    @staticmethod
+    def _block(rows : list):
+        """ Rows of (code, start, stop, source, iteration) as TraceEvents. """
+        block = np.array(rows, dtype=np.int64).reshape(-1, 5)
+        return TraceEvents(codes=block[:, 0], starts=block[:, 1], stops=block[:, 2],
+            sources=block[:, 3].astype(np.uint8), iterations=block[:, 4])
+    
+    def window(self, a, b):
+        """ Returns the intervals overlapping [a, b), clipped to it. Each
+            plugin's intervals are a range of the covering index: those
+            starting in [a - longest duration, b) and stopping at or after a. """
+        parts = []
+        with self.lock:
+            for code, longest in self.longest.items():
+                rows = self.connection.execute("SELECT code, start, stop, source FROM interval " +
+                    "WHERE code = ? AND start >= ? AND start < ? AND stop >= ?", (code, a - longest, b, a)).fetchall()
+                if rows:
+                    parts.append(np.array(rows, dtype=np.int64))
+        block = np.concatenate(parts) if parts else np.empty((0, 4), dtype=np.int64)
+        block = block[np.argsort(block[:, 1], kind='stable')]
+        return TraceWindow(
+            codes = block[:, 0].astype(np.int16 if len(self.names) <= np.iinfo(np.int16).max else np.int32),
+            starts = np.maximum(block[:, 1], a),
+            stops = np.minimum(block[:, 2], b),
+            sources = block[:, 3].astype(np.uint8)
+        )
+
+
+class CompareIndex():
+    """ Part of ILLIXR Visualizer's Model.
+        Stands in for an IntervalIndex over a CompareStore, answering from
+        each run's index with the run's times shifted into line. """
+    def __init__(self, runs : list, offsets : list):
+        self.runs = runs
+        self.offsets = offsets
+        self.minStart = min(run.index.minStart - offset for run, offset in zip(runs, offsets))
+        self.maxStop = max(run.index.maxStop - offset for run, offset in zip(runs, offsets))
+    
+    def estimate(self, a, b):
+        """ Upper bound on the number of intervals overlapping [a, b). """
+        return sum(run.index.estimate(a + offset, b + offset) for run, offset in zip(self.runs, self.offsets))
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every interval,
+            with page 0 starting at time 0. """
+        return max(ceil(self.maxStop / pageSz), 1)
+
+
+class ComparePyramid():
+    """ Part of ILLIXR Visualizer's Model.
+        Stands in for an OccupancyPyramid over a CompareStore. Each run's
+        bins are placed differently once shifted into line, so they are
+        resampled onto common edges, taking intervals to be spread evenly
+        within a bin. """
+    def __init__(self, runs : list, offsets : list, codeMaps : list, nCodes : int):
+        self.runs = runs
+        self.offsets = offsets
+        self.codeMaps = codeMaps # Combined code of each run's plugin codes
+        self.nCodes = nCodes
+    
+    def bins(self, a, b, maxBins : int):
+        """ Returns the bins covering [a, b), as wide as the coarsest
+            run's bins at the finest level needing no more than maxBins. """
+        shifted = [run.pyramid.bins(a + offset, b + offset, maxBins) for run, offset in zip(self.runs, self.offsets)]
+        width = max([int(bins.edges[1] - bins.edges[0]) for bins in shifted if len(bins.edges) > 1], default=1)
+        edges = np.arange(a // width, -(-b // width) + 1, dtype=np.int64) * width
+        busy = np.zeros((self.nCodes, len(edges) - 1))
+        counts = np.zeros((self.nCodes, len(edges) - 1), dtype=np.int64)
+        for bins, offset, codeMap in zip(shifted, self.offsets, self.codeMaps):
+            if len(bins.edges) < 2:
+                continue
+            # Plugins without intervals share a code, so rows are added rather than assigned
+            np.add.at(busy, codeMap, np.diff(self._cumulative(bins.edges - offset, bins.busy, edges), axis=1))
+            np.add.at(counts, codeMap, np.diff(np.round(self._cumulative(bins.edges - offset, bins.counts, edges)), axis=1).astype(np.int64))
+        return OccupancyBins(edges=edges, busy=busy, counts=counts)
+    
+    @staticmethod
+    def _cumulative(edges, values, points):
+        """ Cumulative sums of each row of values, binned by edges, at the
+            given points, interpolated linearly within bins. """
+        cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(values, axis=1, out=cumulative[:, 1:])
+        points = np.clip(points, edges[0], edges[-1])
+        right = np.clip(np.searchsorted(edges, points, side='right'), 1, len(edges) - 1)
+        fraction = (points - edges[right - 1]) / (edges[right] - edges[right - 1])
+        return cumulative[:, right - 1] + (cumulative[:, right] - cumulative[:, right - 1]) * fraction
+
+
+class CompareStore():
+    """ ILLIXR Visualizer's Model.
+        Stands in for a TraceStore holding several runs of ILLIXR, for
+        comparing builds or settings. Each run keeps its own store; times
+        are shifted so every run's anchor, such as its first vsync, falls
+        at the same time, and each run's plugins get lanes of their own,
+        named "plugin [run]". Codes are laid out run by run in blocks of a
+        multiple of the palette's size, so a plugin has the same color in
+        every run. """
+    def __init__(self, labels : list, runs : list, anchors : list, interleave=True):
+        """ Combines the runs' stores, labelled by labels, lining up the
+            times in anchors. Interleaved, each plugin's lanes are listed
+            together, run by run; otherwise each run's lanes are. """
+        self.labels = labels
+        self.runs = runs
+        self.interleave = interleave
+        self.origin = 0
+        self.tail = None
+        self.concurrency = None # Runs have no concurrency profile, see concurrency_profile()
+        
+        # Anchors line up after the earliest run's longest lead, so no time is negative
+        lead = max(anchor - run.index.minStart for run, anchor in zip(runs, anchors))
+        self.anchor = lead # Time every run's anchor falls at
+        self.offsets = [anchor - lead for anchor in anchors] # Run time of aligned time 0
+        
+        # Plugins by name across runs, in order of first appearance
+        self.plugins = []
+        for run in runs:
+            self.plugins += [name for name in run.plugin_order() if name not in self.plugins]
+        pluginOf = {name: plugin for plugin, name in enumerate(self.plugins)}
+        self.stride = -(-len(self.plugins) // len(PLUGIN_COLORS)) * len(PLUGIN_COLORS)
+        self.names = np.full(len(runs) * self.stride, '', dtype=object)
+        self.codeMaps = []
+        for number, (label, run) in enumerate(zip(labels, runs)):
+            codeMap = np.array([number * self.stride + pluginOf.get(name, 0) for name in run.names], dtype=np.int32)
+            hasData = set(run.plugin_order())
+            for code, name in enumerate(run.names):
+                if name in hasData:
+                    self.names[codeMap[code]] = name + " [" + label + "]"
+            self.codeMaps.append(codeMap)
+        
+        self.index = CompareIndex(runs, self.offsets)
+        self.pyramid = ComparePyramid(runs, self.offsets, self.codeMaps, len(self.names))
+    
+    @staticmethod
+    def anchor_of(store, lane=None):
+        """ Start of the store's first interval, or of the first interval
+            in the lane named lane. Returns None if the lane is empty. """
+        if lane is None:
+            return store.index.minStart if len(store) else None
+        codes = np.flatnonzero(store.names == lane)
+        if len(codes) == 0:
+            return None
+        for chunkCodes, starts, _, _ in store.chunks():
+            rows = np.flatnonzero(chunkCodes == codes[0])
+            if len(rows):
+                return int(starts[rows[0]])
+        return None
+    
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+    
+    @property
+    def nbytes(self):
+        """ Memory held by the runs' columns. """
+        return sum(run.nbytes for run in self.runs)
+    
+    def page_count(self, pageSz):
+        """ The number of pages of pageSz ns needed to cover every run. """
+        return self.index.page_count(pageSz)
+    
+    def plugin_order(self):
+        """ Names of the lanes with data: each plugin's runs together if
+            interleaved, otherwise each run's plugins together. """
+        runs, plugins = range(len(self.runs)), range(len(self.plugins))
+        if self.interleave:
+            codes = [number * self.stride + plugin for plugin in plugins for number in runs]
+        else:
+            codes = [number * self.stride + plugin for number in runs for plugin in plugins]
+        return [self.names[code] for code in codes if self.names[code]]
+    
+    def chunks(self, a=None, b=None):
+        """ Yields the intervals starting in [a, b), or in every run, as
+            (codes, starts, stops, skips) chunks, run by run. Each lane's
+            rows come in start order. """
+        for run, offset, codeMap in zip(self.runs, self.offsets, self.codeMaps):
+            runA = None if a is None else a + offset
+            runB = None if b is None else b + offset
+            for codes, starts, stops, skips in run.chunks(runA, runB):
+                yield codeMap[codes], starts - offset, stops - offset, skips
+    
+    def window(self, a, b):
+        """ Returns every run's intervals overlapping [a, b), clipped to it. """
+        windows = [(run.window(a + offset, b + offset), offset, codeMap)
+            for run, offset, codeMap in zip(self.runs, self.offsets, self.codeMaps)]
+        starts = np.concatenate([window.starts - offset for window, offset, _ in windows])
+        order = np.argsort(starts, kind='stable')
+        return TraceWindow(
+            codes = np.concatenate([codeMap[window.codes] for window, _, codeMap in windows])[order],
+            starts = starts[order],
+            stops = np.concatenate([window.stops - offset for window, offset, _ in windows])[order],
+            sources = np.concatenate([window.sources for window, _, _ in windows])[order]
+        )
+    
+    def interval_count(self, code : int):
+        """ The number of intervals in lane code. """
+        run, runCodes, _ = self._lane(code)
+        return sum(run.interval_count(runCode) for runCode in runCodes)
+    
+    def longest_intervals(self, code : int, k : int, first=0):
+        """ The intervals in lane code ranked [first, first + k) by
+            duration, longest first. """
+        run, runCodes, offset = self._lane(code)
+        events = self._events([run.longest_intervals(runCode, first + k) for runCode in runCodes], code, offset)
+        order = np.argsort(events.starts - events.stops, kind='stable')[first:first + k]
+        return TraceEvents(*(column[order] for column in events))
+    
+    def iteration_intervals(self, code : int, iteration : int):
+        """ The intervals in lane code numbered iteration, in start
+            order. """
+        run, runCodes, offset = self._lane(code)
+        events = self._events([run.iteration_intervals(runCode, iteration) for runCode in runCodes], code, offset)
+        order = np.argsort(events.starts, kind='stable')
+        return TraceEvents(*(column[order] for column in events))
+    
+    def intervals(self, a=None, b=None, chunkSz=2**20):
+        """ Yields the intervals starting in [a, b), or in every run, as
+            TraceEvents chunks, run by run. Each lane's rows come in start
+            order. """
+        for run, offset, codeMap in zip(self.runs, self.offsets, self.codeMaps):
+            runA = None if a is None else a + offset
+            runB = None if b is None else b + offset
+            for events in run.intervals(runA, runB, chunkSz):
+                yield events._replace(codes=codeMap[events.codes], starts=events.starts - offset, stops=events.stops - offset)
+    
+    def _lane(self, code : int):
+        """ The run holding lane code, its codes drawn in the lane and
+            its offset. """
+        number = code // self.stride
+        return self.runs[number], np.flatnonzero(self.codeMaps[number] == code), self.offsets[number]
+    
+    @staticmethod
+    def _events(parts : list, code : int, offset : int):
+        """ A run's TraceEvents, combined and shifted into lane code. """
+        starts = np.concatenate([part.starts for part in parts] + [np.empty(0, dtype=np.int64)]) - offset
+        return TraceEvents(
+            codes = np.full(len(starts), code, dtype=np.int64),
+            starts = starts,
+            stops = np.concatenate([part.stops for part in parts] + [np.empty(0, dtype=np.int64)]) - offset,
+            sources = np.concatenate([part.sources for part in parts] + [np.empty(0, dtype=np.uint8)]),
+            iterations = np.concatenate([part.iterations for part in parts] + [np.empty(0, dtype=np.int64)])
+        )
+    
+    def concurrency_profile(self):
+        """ None: the runs did not share a CPU, so their intervals do not
+            run concurrently with each other. """
+        return None
+
+
+class LatencyStats():
+    """ Part of ILLIXR Visualizer's Model.
+        Per-plugin summary of interval durations and inter-arrival
+        periods. Counts, means, maxima, period jitter and skips are exact;
+        duration quantiles come from an HDR-style log histogram with
+        bucketsPerOctave buckets per power of two nanoseconds, within about
+        1% of the true value. Summaries of consecutive stretches of a trace
+        merge into the summary of the whole, so any window is summarized
+        in one vectorized pass over chunks of bounded size. """
+    bucketsPerOctave = 64
+    
+    def __init__(self, nCodes : int):
+        """ An empty summary of nCodes plugins. """
+        nBuckets = 64 * self.bucketsPerOctave
+        self.counts = np.zeros(nCodes, dtype=np.int64)
+        self.totals = np.zeros(nCodes)                   # Sum of durations
+        self.maxima = np.zeros(nCodes, dtype=np.int64)
+        self.histogram = np.zeros((nCodes, nBuckets), dtype=np.int64)
+        self.skips = np.zeros(nCodes, dtype=np.int64)
+        self.periodCounts = np.zeros(nCodes, dtype=np.int64)
+        self.periodMeans = np.zeros(nCodes)
+        self.periodM2 = np.zeros(nCodes)                 # Sum of squared deviations from periodMeans
+        self.firstStarts = np.full(nCodes, -1, dtype=np.int64) # -1 where a plugin has no intervals yet
+        self.lastStarts = np.full(nCodes, -1, dtype=np.int64)
+    
+    @classmethod
+    def from_chunk(cls, nCodes : int, codes, starts, stops, skips):
+        """ Summarizes one chunk of intervals. Each plugin's intervals
+            must be in start order. """
+        stats = cls(nCodes)
+        if len(codes) == 0:
+            return stats
+        codes = np.asarray(codes, dtype=np.int64)
+        durations = np.maximum(np.asarray(stops) - starts, 0)
+        stats.counts = np.bincount(codes, minlength=nCodes)
+        stats.totals = np.bincount(codes, weights=durations, minlength=nCodes)
+        stats.skips = np.bincount(codes, weights=skips, minlength=nCodes).astype(np.int64)
+        buckets = (np.log2(np.maximum(durations, 1)) * cls.bucketsPerOctave).astype(np.int64)
+        nBuckets = stats.histogram.shape[1]
+        stats.histogram = np.bincount(codes * nBuckets + buckets, minlength=nCodes * nBuckets).reshape(nCodes, nBuckets)
+        
+        # Group by plugin, keeping each plugin's start order
+        order = np.argsort(codes, kind='stable')
+        codes, starts, durations = codes[order], np.asarray(starts)[order], durations[order]
+        present, firsts = np.unique(codes, return_index=True)
+        lasts = np.append(firsts[1:], len(codes)) - 1
+        stats.maxima[present] = np.maximum.reduceat(durations, firsts)
+        stats.firstStarts[present] = starts[firsts]
+        stats.lastStarts[present] = starts[lasts]
+        
+        # Periods between consecutive starts of the same plugin
+        same = codes[1:] == codes[:-1]
+        stats._add_periods(codes[1:][same], np.diff(starts)[same])
+        return stats
+    
+    @classmethod
+    def from_chunks(cls, nCodes : int, chunks):
+        """ Summarizes (codes, starts, stops, skips) chunks that follow one
+            another in time for each plugin. """
+        stats = cls(nCodes)
+        for codes, starts, stops, skips in chunks:
+            stats.merge(cls.from_chunk(nCodes, codes, starts, stops, skips))
+        return stats
+    
+    def merge(self, other):
+        """ Adds the summary of the intervals following this summary's
+            (per plugin) in time, including the periods across the join. """
+        joined = (self.lastStarts >= 0) & (other.firstStarts >= 0)
+        self._add_periods(np.flatnonzero(joined), (other.firstStarts - self.lastStarts)[joined])
+        self._merge_periods(other.periodCounts, other.periodMeans, other.periodM2)
+        
+        self.counts += other.counts
+        self.totals += other.totals
+        self.maxima = np.maximum(self.maxima, other.maxima)
+        self.histogram += other.histogram
+        self.skips += other.skips
+        self.firstStarts = np.where(self.firstStarts >= 0, self.firstStarts, other.firstStarts)
+        self.lastStarts = np.where(other.lastStarts >= 0, other.lastStarts, self.lastStarts)
+    
+    def _add_periods(self, codes, periods):
+        """ Adds periods of the given plugin codes to the period moments. """
+        if len(periods) == 0:
+            return
+        nCodes = len(self.counts)
+        count = np.bincount(codes, minlength=nCodes)
+        mean = np.bincount(codes, weights=periods, minlength=nCodes) / np.maximum(count, 1)
+        self._merge_periods(count, mean, np.bincount(codes, weights=(periods - mean[codes]) ** 2, minlength=nCodes))
+    
+    def _merge_periods(self, count, mean, m2):
+        """ Merges the count, mean and sum of squared deviations of other
+            periods into the period moments (Chan et al.). """
+        total = self.periodCounts + count
+        both = total > 0
+        delta = mean - self.periodMeans
+        self.periodMeans[both] += delta[both] * count[both] / total[both]
+        self.periodM2[both] += m2[both] + delta[both] ** 2 * self.periodCounts[both] * count[both] / total[both]
+        self.periodCounts = total
+    
+    def percentile(self, q : float):
+        """ The q-th percentile duration of each plugin in ns, at most one
+            histogram bucket above the true value. """
+        cumulative = np.cumsum(self.histogram, axis=1)
+        target = np.maximum(np.ceil(q / 100 * self.counts), 1)
+        buckets = np.argmax(cumulative >= target[:, None], axis=1)
+        return np.minimum(2 ** ((buckets + 1) / self.bucketsPerOctave), self.maxima)
+    
+    def rows(self, names, order=None):
+        """ Rows of (plugin, count, mean, p50, p90, p99, max, period,
+            jitter, skips) with times in ms, for plugins with intervals, in
+            the given order of plugin names. jitter is the standard
+            deviation of the period. """
+        quantiles = [self.percentile(q) for q in (50, 90, 99)]
+        means = self.totals / np.maximum(self.counts, 1)
+        periodStds = np.sqrt(self.periodM2 / np.maximum(self.periodCounts, 1))
+        codeOf = {name: code for code, name in enumerate(names)}
+        codes = [codeOf[name] for name in order if name in codeOf] if order is not None else range(len(names))
+        rows = []
+        for code in codes:
+            if self.counts[code] == 0:
+                continue
+            hasPeriod = self.periodCounts[code] > 0
+            rows.append((names[code], int(self.counts[code]), means[code] / 1e6) +
+                tuple(quantile[code] / 1e6 for quantile in quantiles) +
+                (self.maxima[code] / 1e6,
+                self.periodMeans[code] / 1e6 if hasPeriod else float('nan'),
+                periodStds[code] / 1e6 if hasPeriod else float('nan'),
+                int(self.skips[code])))
+        return rows
+
+
+def sidecar_directory(cacheRoot : str, namePath : str, dataPaths : dict, columns):
+    """ Part of ILLIXR Visualizer's Model.
+        Returns the sidecar directory for a set of databases. It is keyed
+        by each database's path, size and modification time, and by the
+        columns loaded, so a changed database or setting gets a new one. """
+    sources = []
+    for role, path in [('names', namePath)] + sorted(dataPaths.items()):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        sources.append([role, path, stat.st_size, stat.st_mtime_ns])
+    key = json.dumps([TraceStore.sidecarVersion, sources, list(columns)])
+    return os.path.join(cacheRoot, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+
+def default_cache_root():
+    """ Per-user directory holding sidecars, following the XDG convention. """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'illixr_visualizer')
+
+
+def read_columns(dbPath, tableName : str, columns : dict, batchSz=65536, progress=None, rowids=None):
+    """ Part of ILLIXR Visualizer's Model.
+        Streams columns of an SQLite table into NumPy arrays, reading
+        fixed-size cursor batches straight into preallocated columns.
+        columns maps each column name to its NumPy dtype. Capacity starts
+        at the table's largest rowid and grows geometrically, so peak memory
+        stays close to the size of the final arrays. Returns the arrays keyed
+        by column name and the number of rows read per second. If given,
+        progress(rowsRead, expectedRows) is called after every batch and may
+        raise to abort. If given, only rows with rowids in the (after,
+        last] range rowids are read. Raises sqlite3.Error, TypeError or
+        ValueError on a malformed table. """
+    db_uri = "file:" + dbPath + "?mode=ro"
+    connection = sqlite3.connect(db_uri, uri=True)
+    try:
+        timerStart = time.perf_counter()
+        cursor = connection.cursor()
+        
+        # rowids are usually dense, making the largest one a row count estimate
+        if rowids is None:
+            maxRowid = cursor.execute("SELECT max(rowid) FROM " + tableName).fetchone()[0]
+            where, parameters = "", ()
+        else:
+            maxRowid = rowids[1] - rowids[0]
+            where, parameters = " WHERE rowid > ? AND rowid <= ?", rowids
+        capacity = max(maxRowid or 0, 1)
+        arrays = {name: np.empty(capacity, dtype=dtype) for name, dtype in columns.items()}
+        
+        # Purely numeric tables are converted a whole batch at a time
+        blockType = None
+        if all(np.dtype(dtype).kind in 'iuf' for dtype in columns.values()):
+            blockType = np.result_type(*columns.values())
+        
+        cursor.arraysize = batchSz
+        cursor.execute("SELECT " + ", ".join(columns) + " FROM " + tableName + where, parameters)
+        nRows = 0
+        while True:
+            batch = cursor.fetchmany(batchSz)
+            if not batch:
+                break
+            batchLen = len(batch)
+            if nRows + batchLen > capacity:
+                # Grow geometrically to keep appends amortized O(1)
+                capacity = max(2 * capacity, nRows + batchLen)
+                for name in arrays:
+                    grown = np.empty(capacity, dtype=arrays[name].dtype)
+                    grown[:nRows] = arrays[name][:nRows]
+                    arrays[name] = grown
+            if blockType is not None:
+                # Convert the batch in one pass; raises TypeError on NULLs
+                block = np.array(batch, dtype=blockType)
+                for i, name in enumerate(arrays):
+                    arrays[name][nRows:nRows + batchLen] = block[:, i]
+            else:
+                for name, values in zip(arrays, zip(*batch)):
+                    arrays[name][nRows:nRows + batchLen] = values
+            nRows += batchLen
+            if progress is not None:
+                progress(nRows, max(maxRowid or 0, nRows))
+        
+        # Release unused capacity in place; no views of the arrays exist yet
+        if nRows < capacity:
+            for array in arrays.values():
+                array.resize(nRows, refcheck=False)
+        elapsed = time.perf_counter() - timerStart
+    finally:
+        connection.close()
+    return arrays, nRows / max(elapsed, 1e-9)
+
+
+class TraceTail():
+    """ Part of ILLIXR Visualizer's Model.
+        Follows the databases of a capture that ILLIXR is still writing.
+        Rows are only ever appended, so the largest rowid read from each
+        table marks where the next poll starts reading. Connections are
+        read-only, as for a full load, and safe beside ILLIXR's writer. """
+    def __init__(self, rebase : bool):
+        """ Starts following no tables. """
+        self.tables = []      # [source, database path, DataSource layout, largest rowid read]
+        self.rebase = rebase  # Whether times are rebased to the first interval
+        self.connections = {} # Database path -> connection
+    
+    def follow(self, source : str, dbPath, layout, lastRowid):
+        """ Follows a table from after the given rowid. """
+        self.tables.append([source, dbPath, layout, lastRowid or 0])
+    
+    def latest(self, dbPath, tableName : str):
+        """ The table's largest rowid, or None if it is empty or cannot be
+            read at the moment. """
+        try:
+            if dbPath not in self.connections:
+                self.connections[dbPath] = sqlite3.connect("file:" + dbPath + "?mode=ro", uri=True, check_same_thread=False)
+            return self.connections[dbPath].execute("SELECT max(rowid) FROM " + tableName).fetchone()[0]
+        except sqlite3.Error:
+            return None
+    
+    def close(self):
+        """ Closes the connections and stops following the tables, so a
+            poll still queued for the tail reads nothing. """
+        self.tables = []
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+
+class LoadCancelled(Exception):
+    """ Raised by a load's progress callback to cancel the load. """
+
+
+class MalformedDatabaseError(Exception):
+    """ Raised when a database lacks the expected table or attributes.
+        The message tells the user what to load instead. """
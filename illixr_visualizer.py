@@ -2,30 +2,38 @@
 """ ILLIXR Visualizer is a visualization interface for analyzing ILLIXR data
     logged in databases. It is a desktop application following an MVC
     design pattern, serving as a modular addition to the ILLIXR project.
-    It is built using Python, PyQt5, and Plotly. """
+    It is built using Python, PyQt5, and Plotly.
+    This module is the View and Controller; the Model is illixr_model.py,
+    its stores illixr_store.py, its exporters illixr_export.py and its
+    headless command line illixr_cli.py. """
 
-from math import ceil
-import pandas as pd
-import sqlite3
+from collections import OrderedDict
+from math import ceil, floor
+import numpy as np
+import os
+import threading
+import time
 
-import plotly.offline as po
-import plotly.graph_objs as go
-import plotly.express as px
+# plotly and QtWebEngine are imported where they are first used: they
+# take most of a cold start, and headless exports never load QtWebEngine
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget
 from PyQt5.QtWidgets import QGridLayout, QHBoxLayout, QVBoxLayout
 from PyQt5.QtWidgets import QLabel, QListWidget, QAbstractItemView
-from PyQt5.QtWidgets import QToolButton, QPushButton, QLineEdit
+from PyQt5.QtWidgets import QToolButton, QPushButton, QLineEdit, QProgressBar, QCheckBox, QComboBox, QSpinBox
 from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QFileDialog, QMessageBox
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 import sys
-import warnings
-from pandas.core.common import SettingWithCopyWarning
+
+from illixr_store import CompareStore, DATA_SOURCES, LoadCancelled, MalformedDatabaseError
+from illixr_export import figure_to_payload, TraceExporter
+from illixr_model import PageRequest, VisualizerModel
 
 __author__ = 'Alanna Zoscak'
-        
+
+
 class VisualizerGUILoadDialog(QDialog):
     """ Part of ILLIXR Visualizer's View. 
         A helper class defining the data upload menu. """
@@ -36,19 +44,20 @@ class VisualizerGUILoadDialog(QDialog):
         self.pluginDBPath = None
         self.switchboardDBPath = None
         self.threadloopDBPath = None
+        self.extraDBPaths = {} # Source -> path of the optional databases
         self.tempPathDict = {} # Store paths until OK is clicked & paths validated
         
         self.setWindowTitle("Load Data")
         w = 500
-        h = int(w*2/5)
+        h = int(w*0.86)
         self.setFixedSize(w, h)
         self.move(400, 200)
         
         self.layout = QGridLayout()
-        instructions = QLabel("Please select the database containing the plugin names. Then select the corresponding switchboard and/or threadloop databases.")
+        instructions = QLabel("Please select the database containing the plugin names. Then select the corresponding switchboard and/or threadloop databases. Optional databases found beside them are drawn as extra lanes.")
         instructions.setWordWrap(True)
         self.layout.addWidget(instructions, 0, 0, 1, 3)
-
+        
         pluginLabel = QLabel("Plugin Database:")
         self.pluginDisplay = QLineEdit()
         self.pluginDisplay.setReadOnly(True)
@@ -77,6 +86,40 @@ class VisualizerGUILoadDialog(QDialog):
         self.layout.addWidget(self.threadloopDisplay, 4, 1)
         self.layout.addWidget(self.threadloopBrowseButton, 4, 2)
         
+        # Optional databases, by name and source
+        self.extraSources = OrderedDict([
+            ("Timewarp GPU", 'timewarp_gpu'),
+            ("Check Queues", 'check_queues'),
+            ("MTP Record", 'mtp_record')
+        ])
+        self.extraDisplays = {}
+        self.extraBrowseButtons = {}
+        for row, name in enumerate(self.extraSources, 5):
+            extraLabel = QLabel(name + " Database:")
+            self.extraDisplays[name] = QLineEdit()
+            self.extraDisplays[name].setReadOnly(True)
+            self.extraBrowseButtons[name] = QPushButton("Browse")
+            self.extraBrowseButtons[name].clicked.connect(lambda checked, name=name: self._browse(name))
+            self.layout.addWidget(extraLabel, row, 0)
+            self.layout.addWidget(self.extraDisplays[name], row, 1)
+            self.layout.addWidget(self.extraBrowseButtons[name], row, 2)
+        
+        timeBaseLabel = QLabel("Time Base:")
+        self.timeBaseBox = QComboBox()
+        self.timeBaseBox.addItems(["CPU time", "Wall clock time"])
+        self.timeBaseBox.currentIndexChanged.connect(self._time_base_changed)
+        self.layout.addWidget(timeBaseLabel, 8, 0)
+        self.layout.addWidget(self.timeBaseBox, 8, 1)
+        self._time_base_changed(0)
+        
+        self.lazyCheckBox = QCheckBox("Keep data on disk (for traces larger than memory)")
+        self.layout.addWidget(self.lazyCheckBox, 9, 0, 1, 3)
+        
+        self.liveCheckBox = QCheckBox("Follow a capture ILLIXR is still writing (live mode)")
+        self.layout.addWidget(self.liveCheckBox, 10, 0, 1, 3)
+        self.lazyCheckBox.toggled.connect(lambda lazy: self.liveCheckBox.setEnabled(not lazy))
+        self.liveCheckBox.toggled.connect(lambda live: self.lazyCheckBox.setEnabled(not live))
+        
         subLayout = QVBoxLayout()
         subLayout.addSpacing(5)
         buttons = QDialogButtonBox()
@@ -84,10 +127,10 @@ class VisualizerGUILoadDialog(QDialog):
         buttons.button(QDialogButtonBox.Cancel).clicked.connect(self._cancel)
         buttons.button(QDialogButtonBox.Ok).clicked.connect(self._load)
         subLayout.addWidget(buttons, alignment=QtCore.Qt.AlignRight)
-        self.layout.addLayout(subLayout, 5, 0, 1, 3)
+        self.layout.addLayout(subLayout, 11, 0, 1, 3)
         
         self.setLayout(self.layout)
-
+    
     def _browse(self, name):
         """ Launches QFileDialog, updates paths and display """ 
         filename, _ = QFileDialog.getOpenFileName(self, "Open " + name + " Database", QtCore.QDir.currentPath(), "Database files (*.sqlite *.sql *.db)")
@@ -102,7 +145,27 @@ class VisualizerGUILoadDialog(QDialog):
             elif name == "Threadloop":
                 self.tempPathDict[name] = filename
                 self.threadloopDisplay.setText(filename)
-
+            elif name in self.extraDisplays:
+                self.tempPathDict[name] = filename
+                self.extraDisplays[name].setText(filename)
+            self._find_extras(os.path.dirname(filename))
+    
+    def _find_extras(self, directory : str):
+        """ Fills in optional databases not yet chosen that ILLIXR wrote
+            into the given directory under their table's name. """
+        for name, source in self.extraSources.items():
+            path = os.path.join(directory, DATA_SOURCES[source].table + ".sqlite")
+            if name not in self.tempPathDict and os.path.isfile(path):
+                self.tempPathDict[name] = path
+                self.extraDisplays[name].setText(path)
+    
+    def _time_base_changed(self, index : int):
+        """ Enables only the optional databases logged with the chosen clock. """
+        for name, source in self.extraSources.items():
+            enabled = self.getTimeBase() in DATA_SOURCES[source].clocks
+            self.extraDisplays[name].setEnabled(enabled)
+            self.extraBrowseButtons[name].setEnabled(enabled)
+    
     def _load(self):
         """ Stores the database paths after validating that
             necessary information has been provided """
@@ -116,6 +179,8 @@ class VisualizerGUILoadDialog(QDialog):
                 self.threadloopDBPath = self.tempPathDict["Threadloop"]
             else:
                 self.threadloopDBPath = None
+            self.extraDBPaths = {source: self.tempPathDict[name] for name, source in self.extraSources.items()
+                if name in self.tempPathDict and self.extraDisplays[name].isEnabled()}
             self.tempPathDict= {}
             self.accept()
         else:
@@ -126,22 +191,23 @@ class VisualizerGUILoadDialog(QDialog):
             error_msg.setWindowTitle("Cannot Load")
             error_msg.setStandardButtons(QMessageBox.Ok)
             error_msg.exec_()
-
+    
     def _cancel(self):
         """ Cancels load """
         self.tempPathDict = {}
         self.reject()
-
+    
     def _validate(self):
         """ Validates that necessary databases have been provided """
         if "Plugin" in self.tempPathDict:
             return "Switchboard" in self.tempPathDict or "Threadloop" in self.tempPathDict
         return False
-
+    
     def getDatabasePaths(self):
         """ Provides the database paths in a tuple where first is the plugin 
             database path and the second is a dictionary of the data 
-            (switchboard and threadloop) databases paths. If plugin database
+            (switchboard, threadloop and optional) databases paths, keyed
+            by source (see DATA_SOURCES). If plugin database
             path is not found, namePath is None. If data paths are not found,
             dataPaths is an empty dictionary. """
         namePath = None
@@ -152,8 +218,718 @@ class VisualizerGUILoadDialog(QDialog):
                 dataPaths["switchboard"] = self.switchboardDBPath
             if self.threadloopDBPath is not None:
                 dataPaths["threadloop"] = self.threadloopDBPath
+            dataPaths.update(self.extraDBPaths)
         return namePath, dataPaths
-                
+    
+    def getLazyMode(self):
+        """ Whether the data is to be kept on disk and read a page at a
+            time, rather than loaded into memory. """
+        return self.lazyCheckBox.isChecked()
+    
+    def getLiveMode(self):
+        """ Whether rows written after the load are to be read as they
+            arrive. """
+        return self.liveCheckBox.isChecked()
+    
+    def getTimeBase(self):
+        """ The clock that times are taken from, 'cpu' or 'wall'. """
+        return ('cpu', 'wall')[self.timeBaseBox.currentIndex()]
+
+
+class VisualizerGUICompareDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class choosing the runs to compare, by the directories
+        ILLIXR wrote their databases into, and how they are lined up. """
+    def __init__(self, runDatabases):
+        """ runDatabases(directory) returns the plugin name database and
+            data databases found in a run's directory. """
+        super().__init__()
+        self.runDatabases = runDatabases
+        self.runs = [] # (label, namePath, dataPaths) of each run, labelled by its directory
+        
+        self.setWindowTitle("Compare Runs")
+        w = 560
+        h = int(w*0.7)
+        self.setFixedSize(w, h)
+        self.move(400, 200)
+        
+        self.layout = QGridLayout()
+        instructions = QLabel("Please add the metrics directory of each run to compare. Each must hold the plugin names database and a switchboard and/or threadloop database. Runs are loaded in parallel and lined up on a common origin.")
+        instructions.setWordWrap(True)
+        self.layout.addWidget(instructions, 0, 0, 1, 3)
+        
+        self.runList = QListWidget()
+        self.layout.addWidget(self.runList, 1, 0, 2, 2)
+        self.addButton = QPushButton("Add Run")
+        self.addButton.clicked.connect(self._add)
+        self.removeButton = QPushButton("Remove")
+        self.removeButton.clicked.connect(self._remove)
+        self.layout.addWidget(self.addButton, 1, 2)
+        self.layout.addWidget(self.removeButton, 2, 2, alignment=QtCore.Qt.AlignTop)
+        
+        alignLabel = QLabel("Align On:")
+        self.alignBox = QComboBox()
+        self.alignBox.addItems(["First event", "First vsync", "First event of plugin"])
+        self.alignPluginEdit = QLineEdit()
+        self.alignPluginEdit.setPlaceholderText("Plugin name")
+        self.alignBox.currentIndexChanged.connect(lambda index: self.alignPluginEdit.setEnabled(index == 2))
+        self.alignPluginEdit.setEnabled(False)
+        self.layout.addWidget(alignLabel, 3, 0)
+        self.layout.addWidget(self.alignBox, 3, 1)
+        self.layout.addWidget(self.alignPluginEdit, 3, 2)
+        
+        timeBaseLabel = QLabel("Time Base:")
+        self.timeBaseBox = QComboBox()
+        self.timeBaseBox.addItems(["CPU time", "Wall clock time"])
+        self.layout.addWidget(timeBaseLabel, 4, 0)
+        self.layout.addWidget(self.timeBaseBox, 4, 1)
+        
+        lanesLabel = QLabel("Lanes:")
+        self.lanesBox = QComboBox()
+        self.lanesBox.addItems(["Stacked: each plugin's runs together", "Side by side: each run's plugins together"])
+        self.layout.addWidget(lanesLabel, 5, 0)
+        self.layout.addWidget(self.lanesBox, 5, 1, 1, 2)
+        
+        subLayout = QVBoxLayout()
+        subLayout.addSpacing(5)
+        buttons = QDialogButtonBox()
+        buttons.setStandardButtons(QDialogButtonBox.Cancel | QDialogButtonBox.Ok)
+        buttons.button(QDialogButtonBox.Cancel).clicked.connect(self.reject)
+        buttons.button(QDialogButtonBox.Ok).clicked.connect(self._compare)
+        subLayout.addWidget(buttons, alignment=QtCore.Qt.AlignRight)
+        self.layout.addLayout(subLayout, 6, 0, 1, 3)
+        
+        self.setLayout(self.layout)
+    
+    def _add(self):
+        """ Launches QFileDialog and adds the chosen run's databases. """
+        directory = QFileDialog.getExistingDirectory(self, "Open Run Directory", QtCore.QDir.currentPath())
+        if directory:
+            self.add_run(directory)
+    
+    def add_run(self, directory : str):
+        """ Adds the run ILLIXR wrote into directory, labelled by the
+            directory's name. Returns whether it has the databases needed. """
+        namePath, dataPaths = self.runDatabases(directory)
+        if namePath is None or not ('switchboard' in dataPaths or 'threadloop' in dataPaths):
+            self._warn("Cannot Add Run", directory + " does not hold a plugin names database and a switchboard or threadloop database.")
+            return False
+        label = os.path.basename(os.path.normpath(directory))
+        labels = [runLabel for runLabel, _, _ in self.runs]
+        copy = 2
+        while label in labels:
+            label = os.path.basename(os.path.normpath(directory)) + " (" + str(copy) + ")"
+            copy += 1
+        self.runs.append((label, namePath, dataPaths))
+        self.runList.addItem(label + ": " + directory)
+        return True
+    
+    def _remove(self):
+        """ Removes the selected run. """
+        row = self.runList.currentRow()
+        if row >= 0:
+            self.runList.takeItem(row)
+            del self.runs[row]
+    
+    def _compare(self):
+        """ Accepts the runs after validating that there are enough to
+            compare and that they can be lined up as chosen. """
+        if len(self.runs) < 2:
+            self._warn("Cannot Compare", "Additional information needed - At least two runs must be added.")
+        elif self.alignBox.currentIndex() == 2 and not self.alignPluginEdit.text().strip():
+            self._warn("Cannot Compare", "Please name the plugin whose first event the runs are aligned on.")
+        elif self.alignBox.currentIndex() == 1 and self.getTimeBase() not in DATA_SOURCES['mtp_record'].clocks:
+            self._warn("Cannot Compare", "Vsync is logged in wall clock time only. Please choose wall clock time to align on it.")
+        else:
+            self.accept()
+    
+    def _warn(self, title : str, text : str):
+        """ Displays a message explaining why the runs cannot be used. """
+        error_msg = QMessageBox()
+        error_msg.setIcon(QMessageBox.Warning)
+        error_msg.setText(text)
+        error_msg.setWindowTitle(title)
+        error_msg.setStandardButtons(QMessageBox.Ok)
+        error_msg.exec_()
+    
+    def getRuns(self):
+        """ The (label, namePath, dataPaths) of each run, in the order added. """
+        return list(self.runs)
+    
+    def getAlignment(self):
+        """ Name of the lane whose first interval the runs are lined up on,
+            or None for their first interval. """
+        index = self.alignBox.currentIndex()
+        if index == 1:
+            return DATA_SOURCES['mtp_record'].lane
+        if index == 2:
+            return self.alignPluginEdit.text().strip()
+        return None
+    
+    def getTimeBase(self):
+        """ The clock that times are taken from, 'cpu' or 'wall'. """
+        return ('cpu', 'wall')[self.timeBaseBox.currentIndex()]
+    
+    def getInterleave(self):
+        """ Whether each plugin's runs are listed together, rather than
+            each run's plugins. """
+        return self.lanesBox.currentIndex() == 0
+
+
+class VisualizerGUIDifferencesDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class listing how each plugin's durations and periods
+        change from the first run in every other run compared. """
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Run Differences")
+        self.resize(820, 400)
+        
+        self.layout = QVBoxLayout()
+        headers = ["Plugin", "Run", "Count", "Mean (ms)", "Change", "p99 (ms)", "Change",
+            "Period (ms)", "Change"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.layout.addWidget(self.table)
+        
+        self.summaryLabel = QLabel("Computing...")
+        self.layout.addWidget(self.summaryLabel)
+        
+        self.setLayout(self.layout)
+    
+    def set_rows(self, rows : list, summary : str):
+        """ Lists rows of (plugin, run, count, mean, change, p99, change,
+            period, change), leaving missing values blank. """
+        self.table.setRowCount(len(rows))
+        for row, (plugin, run, count, *values) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(plugin))
+            self.table.setItem(row, 1, QTableWidgetItem(run))
+            texts = [str(count)] + ["" if np.isnan(value) else f"{value:.3f}" if column % 2 == 0 else f"{value:+.1f}%"
+                for column, value in enumerate(values)]
+            for column, text in enumerate(texts, 2):
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.summaryLabel.setText(summary)
+
+
+class VisualizerGUIPerformanceDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class listing the latency of each stage of loading
+        and rendering. """
+    saveTraceSignal = QtCore.pyqtSignal(str) # Path to write a Chrome trace to
+    resetSignal = QtCore.pyqtSignal()
+    
+    def __init__(self, stats : list):
+        super().__init__()
+        self.setWindowTitle("Performance")
+        self.resize(600, 360)
+        
+        self.layout = QVBoxLayout()
+        headers = ["Stage", "Runs", "Mean (ms)", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.layout.addWidget(self.table)
+        self.set_stats(stats)
+        
+        buttons = QDialogButtonBox()
+        buttons.setStandardButtons(QDialogButtonBox.Close | QDialogButtonBox.Save | QDialogButtonBox.Reset)
+        buttons.button(QDialogButtonBox.Save).setText("Save Trace")
+        buttons.button(QDialogButtonBox.Save).clicked.connect(self._save)
+        buttons.button(QDialogButtonBox.Reset).clicked.connect(self.resetSignal.emit)
+        buttons.button(QDialogButtonBox.Close).clicked.connect(self.accept)
+        self.layout.addWidget(buttons)
+        
+        self.setLayout(self.layout)
+    
+    def set_stats(self, stats : list):
+        """ Lists rows of (stage, runs, mean, p50, p90, p99, max). """
+        self.table.setRowCount(len(stats))
+        for row, (stage, runs, *latencies) in enumerate(stats):
+            self.table.setItem(row, 0, QTableWidgetItem(stage))
+            self.table.setItem(row, 1, QTableWidgetItem(str(runs)))
+            for column, latency in enumerate(latencies, 2):
+                item = QTableWidgetItem(f"{latency:.2f}")
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+    
+    def _save(self):
+        """ Launches QFileDialog and signals the chosen trace path. """
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Chrome Trace", QtCore.QDir.currentPath(), "Trace files (*.json)")
+        if filename:
+            self.saveTraceSignal.emit(filename)
+
+
+class VisualizerGUIStatisticsDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class listing each plugin's latency statistics over the
+        whole trace, the current page or a chosen time range. """
+    computeSignal = QtCore.pyqtSignal(object, object) # Start and end ns, None for the whole trace
+    
+    def __init__(self, pageRange : tuple):
+        super().__init__()
+        self.pageRange = pageRange # Start and end ns of the current page
+        self.setWindowTitle("Statistics")
+        self.resize(820, 400)
+        
+        self.layout = QGridLayout()
+        self.scopeBox = QComboBox()
+        self.scopeBox.addItems(["Whole trace", "Current page", "Time range (ns)"])
+        self.scopeBox.currentIndexChanged.connect(self._scope_changed)
+        self.startEdit = QLineEdit(str(pageRange[0]))
+        self.endEdit = QLineEdit(str(pageRange[1]))
+        self.computeButton = QPushButton("Compute")
+        self.computeButton.clicked.connect(self._compute)
+        self.layout.addWidget(self.scopeBox, 0, 0)
+        self.layout.addWidget(self.startEdit, 0, 1)
+        self.layout.addWidget(self.endEdit, 0, 2)
+        self.layout.addWidget(self.computeButton, 0, 3)
+        self._scope_changed(0)
+        
+        headers = ["Plugin", "Count", "Mean (ms)", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)",
+            "Period (ms)", "Jitter (ms)", "Skips"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.layout.addWidget(self.table, 1, 0, 1, 4)
+        
+        self.summaryLabel = QLabel()
+        self.layout.addWidget(self.summaryLabel, 2, 0, 1, 4)
+        
+        self.setLayout(self.layout)
+    
+    def _scope_changed(self, scope : int):
+        """ Enables the range fields only for a chosen time range. """
+        self.startEdit.setEnabled(scope == 2)
+        self.endEdit.setEnabled(scope == 2)
+    
+    def _compute(self):
+        """ Signals the range to compute statistics over. """
+        scope = self.scopeBox.currentIndex()
+        if scope == 0:
+            a, b = None, None
+        elif scope == 1:
+            a, b = self.pageRange
+        else:
+            try:
+                a, b = int(self.startEdit.text()), int(self.endEdit.text())
+            except ValueError:
+                self.summaryLabel.setText("Start and end must be whole numbers of ns.")
+                return
+        self.computeButton.setEnabled(False)
+        self.summaryLabel.setText("Computing...")
+        self.computeSignal.emit(a, b)
+    
+    def set_stats(self, stats : list, summary : str):
+        """ Lists rows of (plugin, count, mean, p50, p90, p99, max, period,
+            jitter, skips). """
+        self.table.setRowCount(len(stats))
+        for row, (plugin, count, *latencies, skips) in enumerate(stats):
+            self.table.setItem(row, 0, QTableWidgetItem(plugin))
+            for column, value in enumerate([count] + latencies + [skips], 1):
+                item = QTableWidgetItem(str(value) if isinstance(value, int) else f"{value:.3f}")
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.summaryLabel.setText(summary)
+        self.computeButton.setEnabled(True)
+
+
+class VisualizerGUIConcurrencyDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class showing how many CPU intervals ran at once over the
+        whole trace: the time spent with at least k running, and how long
+        each pair of plugins ran at the same time. Time beyond the chosen
+        number of cores is oversubscribed. """
+    def __init__(self):
+        super().__init__()
+        self.profile = None
+        self.setWindowTitle("Concurrency")
+        self.resize(820, 560)
+        
+        self.layout = QGridLayout()
+        self.layout.addWidget(QLabel("Cores"), 0, 0)
+        self.coresBox = QSpinBox()
+        self.coresBox.setRange(1, 4096)
+        self.coresBox.setValue(os.cpu_count() or 1)
+        self.coresBox.valueChanged.connect(self._show_summary)
+        self.layout.addWidget(self.coresBox, 0, 1)
+        
+        self.levelTable = QTableWidget(0, 3)
+        self.levelTable.setHorizontalHeaderLabels(["Running at least", "Time (ms)", "Share"])
+        self.overlapTable = QTableWidget(0, 0)
+        for table in (self.levelTable, self.overlapTable):
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.levelTable.verticalHeader().hide()
+        self.layout.addWidget(self.levelTable, 1, 0, 1, 2)
+        self.layout.addWidget(QLabel("Time (ms) each pair of plugins ran together; busy time on the diagonal"), 2, 0, 1, 2)
+        self.layout.addWidget(self.overlapTable, 3, 0, 1, 2)
+        
+        self.summaryLabel = QLabel("Sweeping the trace...")
+        self.layout.addWidget(self.summaryLabel, 4, 0, 1, 2)
+        
+        self.setLayout(self.layout)
+    
+    def set_profile(self, profile, plugins : list, summary : str):
+        """ Shows a ConcurrencyProfile, with the overlaps of the plugins,
+            given as (name, code) pairs in plot order, or a message if
+            profile is None. """
+        self.profile = profile
+        self.summary = summary
+        if profile is None:
+            self.summaryLabel.setText(summary)
+            return
+        total = profile.levelTimes[1:].sum()
+        atLeast = profile.time_at_least()
+        self.levelTable.setRowCount(len(atLeast) - 1)
+        for row, level in enumerate(range(1, len(atLeast))):
+            values = [str(level), f"{atLeast[level] / 1e6:.3f}", f"{atLeast[level] / total:.1%}" if total else "-"]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.levelTable.setItem(row, column, item)
+        
+        plugins = [(name, code) for name, code in plugins if profile.overlaps[code, code] > 0]
+        self.overlapTable.setRowCount(len(plugins))
+        self.overlapTable.setColumnCount(len(plugins))
+        self.overlapTable.setHorizontalHeaderLabels([name for name, _ in plugins])
+        self.overlapTable.setVerticalHeaderLabels([name for name, _ in plugins])
+        for row, (_, rowCode) in enumerate(plugins):
+            for column, (name, columnCode) in enumerate(plugins):
+                overlap = profile.overlaps[rowCode, columnCode]
+                item = QTableWidgetItem(f"{overlap / 1e6:.3f}")
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                item.setToolTip(f"{overlap / profile.overlaps[rowCode, rowCode]:.1%}" + " of its busy time with " + name)
+                self.overlapTable.setItem(row, column, item)
+        self._show_summary()
+    
+    def _show_summary(self):
+        """ Summarizes the profile against the chosen number of cores. """
+        profile = self.profile
+        if profile is None:
+            return
+        cores = self.coresBox.value()
+        span = profile.levelTimes.sum()
+        atLeast = profile.time_at_least()
+        mean = (profile.levelTimes * np.arange(len(profile.levelTimes))).sum() / span if span else 0
+        oversubscribed = atLeast[cores + 1] if cores + 1 < len(atLeast) else 0
+        self.summaryLabel.setText("Peak " + str(len(atLeast) - 1) + " running, mean " + f"{mean:.2f}" + "; more than " +
+            str(cores) + " for " + f"{oversubscribed / 1e6:,.3f}" + " ms (" + (f"{oversubscribed / span:.1%}" if span else "-") +
+            " of the trace)" + self.summary)
+
+
+class VisualizerGUISaveDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class choosing what File -> Save writes: the format, the
+        whole trace, the range shown or a chosen range, and the plugins. """
+    def __init__(self, viewRange : tuple, plugins : list):
+        super().__init__()
+        self.viewRange = viewRange # Start and end ns of the range shown
+        self.setWindowTitle("Save Trace")
+        self.resize(420, 480)
+        
+        self.layout = QGridLayout()
+        self.layout.addWidget(QLabel("Format"), 0, 0)
+        self.formatBox = QComboBox()
+        self.formatBox.addItems(["Chrome trace JSON", "Perfetto protobuf"])
+        self.layout.addWidget(self.formatBox, 0, 1, 1, 2)
+        
+        self.scopeBox = QComboBox()
+        self.scopeBox.addItems(["Whole trace", "Range shown", "Time range (ns)"])
+        self.scopeBox.currentIndexChanged.connect(self._scope_changed)
+        self.startEdit = QLineEdit(str(viewRange[0]))
+        self.endEdit = QLineEdit(str(viewRange[1]))
+        self.layout.addWidget(self.scopeBox, 1, 0)
+        self.layout.addWidget(self.startEdit, 1, 1)
+        self.layout.addWidget(self.endEdit, 1, 2)
+        self._scope_changed(0)
+        
+        self.pluginList = QListWidget()
+        for plugin in plugins:
+            item = QtWidgets.QListWidgetItem(plugin)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked)
+            self.pluginList.addItem(item)
+        self.layout.addWidget(self.pluginList, 2, 0, 1, 3)
+        
+        self.messageLabel = QLabel()
+        self.layout.addWidget(self.messageLabel, 3, 0, 1, 3)
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self._accept)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons, 4, 0, 1, 3)
+        
+        self.setLayout(self.layout)
+    
+    def _scope_changed(self, scope : int):
+        """ Enables the range fields only for a chosen time range. """
+        self.startEdit.setEnabled(scope == 2)
+        self.endEdit.setEnabled(scope == 2)
+    
+    def _accept(self):
+        """ Closes the dialog if the range is valid. """
+        if self.scopeBox.currentIndex() == 2:
+            try:
+                int(self.startEdit.text()), int(self.endEdit.text())
+            except ValueError:
+                self.messageLabel.setText("Start and end must be whole numbers of ns.")
+                return
+        self.accept()
+    
+    def get_format(self):
+        """ The chosen TraceExporter format. """
+        return ['json', 'perfetto'][self.formatBox.currentIndex()]
+    
+    def get_range(self):
+        """ Start and end ns of the chosen range, None for the whole trace. """
+        scope = self.scopeBox.currentIndex()
+        if scope == 0:
+            return None, None
+        if scope == 1:
+            return self.viewRange
+        return int(self.startEdit.text()), int(self.endEdit.text())
+    
+    def get_plugins(self):
+        """ Names of the checked plugins, None if all are. """
+        items = [self.pluginList.item(row) for row in range(self.pluginList.count())]
+        checked = [item.text() for item in items if item.checkState() == QtCore.Qt.Checked]
+        return None if len(checked) == len(items) else checked
+
+
+class VisualizerGUIFindDialog(QDialog):
+    """ Part of ILLIXR Visualizer's View.
+        A helper class finding intervals by duration or iteration number:
+        each plugin's longest intervals, those above a percentile of its
+        durations, or those of one iteration. Double-clicking a found
+        interval jumps to it. """
+    findSignal = QtCore.pyqtSignal(str, object, object) # Query, plugin name or None for all, value
+    jumpSignal = QtCore.pyqtSignal(object, object)      # Start and stop ns of the interval to show
+    
+    queries = [("Longest", 'longest', "10"), ("Above percentile", 'percentile', "99"), ("Iteration", 'iteration', "0")]
+    
+    def __init__(self, plugins : list):
+        super().__init__()
+        self.setWindowTitle("Find Intervals")
+        self.resize(640, 480)
+        
+        self.layout = QGridLayout()
+        self.pluginBox = QComboBox()
+        self.pluginBox.addItems(["All plugins"] + plugins)
+        self.queryBox = QComboBox()
+        self.queryBox.addItems([label for label, _, _ in self.queries])
+        self.queryBox.currentIndexChanged.connect(lambda query: self.valueEdit.setText(self.queries[query][2]))
+        self.valueEdit = QLineEdit(self.queries[0][2])
+        self.findButton = QPushButton("Find")
+        self.findButton.clicked.connect(self._find)
+        self.layout.addWidget(self.pluginBox, 0, 0)
+        self.layout.addWidget(self.queryBox, 0, 1)
+        self.layout.addWidget(self.valueEdit, 0, 2)
+        self.layout.addWidget(self.findButton, 0, 3)
+        
+        headers = ["Plugin", "Iteration", "Start (ns)", "Duration (ms)"]
+        self.table = QTableWidget(0, len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.cellDoubleClicked.connect(self._jump)
+        self.layout.addWidget(self.table, 1, 0, 1, 4)
+        
+        self.summaryLabel = QLabel("Double-click an interval to show it.")
+        self.layout.addWidget(self.summaryLabel, 2, 0, 1, 4)
+        
+        self.setLayout(self.layout)
+        self.rows = []
+    
+    def _find(self):
+        """ Signals the search to run. """
+        _, query, _ = self.queries[self.queryBox.currentIndex()]
+        try:
+            value = float(self.valueEdit.text()) if query == 'percentile' else int(self.valueEdit.text())
+        except ValueError:
+            self.summaryLabel.setText("The value must be a number.")
+            return
+        if (query == 'percentile' and not 0 <= value <= 100) or (query == 'longest' and value < 1):
+            self.summaryLabel.setText("Percentiles are from 0 to 100; at least one longest interval is found.")
+            return
+        plugin = self.pluginBox.currentText() if self.pluginBox.currentIndex() > 0 else None
+        self.findButton.setEnabled(False)
+        self.summaryLabel.setText("Finding...")
+        self.findSignal.emit(query, plugin, value)
+    
+    def set_rows(self, rows : list, summary : str):
+        """ Lists rows of (plugin, iteration, start, stop). """
+        self.rows = rows
+        self.table.setRowCount(len(rows))
+        for row, (plugin, iteration, start, stop) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(plugin))
+            for column, value in enumerate([str(iteration) if iteration >= 0 else "-", f"{start:,}", f"{(stop - start) / 1e6:.3f}"], 1):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.summaryLabel.setText(summary)
+        self.findButton.setEnabled(True)
+    
+    def _jump(self, row : int, column : int):
+        """ Signals the double-clicked interval to show. """
+        _, _, start, stop = self.rows[row]
+        self.jumpSignal.emit(start, stop)
+
+
+class VisualizerSchemeHandler():
+    """ Part of ILLIXR Visualizer's View.
+        Serves the embedded page from memory under illixr://app/: the
+        viewer page, the bundled plotly.js and qwebchannel.js, and figure
+        payloads. Nothing is fetched from the network, and payloads are
+        not bound by setHtml's 2 MB limit. Handlers are made by create,
+        which mixes this into QWebEngineUrlSchemeHandler once QtWebEngine
+        is imported. """
+    scheme = b'illixr'
+    origin = 'illixr://app/'
+    assets = {} # Path -> (MIME type, contents), read once per process
+    assetLock = threading.Lock() # Held while assets is read or filled, from Qt's IO thread or the warm-up thread
+    handlerClass = None # This mixed into QWebEngineUrlSchemeHandler, once created
+    
+    @staticmethod
+    def create(parent=None):
+        """ Creates a handler, importing QtWebEngine if it is not yet. """
+        if VisualizerSchemeHandler.handlerClass is None:
+            from PyQt5.QtWebEngineCore import QWebEngineUrlSchemeHandler
+            VisualizerSchemeHandler.handlerClass = type('VisualizerSchemeHandler',
+                (VisualizerSchemeHandler, QWebEngineUrlSchemeHandler), {})
+        return VisualizerSchemeHandler.handlerClass(parent)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.figures = OrderedDict() # Path -> figure JSON, latest few only
+        self.figureLock = threading.Lock() # Held while figures is read or changed
+        self.figureCount = 0
+    
+    def publish_figure(self, payload : str):
+        """ Makes a figure payload available to the page and returns
+            its URL. Older payloads are dropped once superseded. """
+        self.figureCount += 1
+        path = '/figure/' + str(self.figureCount)
+        with self.figureLock:
+            self.figures[path] = payload.encode('utf-8')
+            while len(self.figures) > 4:
+                self.figures.popitem(last=False)
+        return self.origin.rstrip('/') + path
+    
+    def requestStarted(self, job):
+        """ Replies to a request with an asset or figure payload. """
+        path = job.requestUrl().path()
+        with self.figureLock:
+            figure = self.figures.get(path)
+        if figure is not None:
+            mimeType, contents = b'application/json', figure
+        else:
+            asset = self.asset(path)
+            if asset is None:
+                from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob
+                job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                return
+            mimeType, contents = asset
+        
+        # The job owns the buffer, freeing it once the reply is read
+        buffer = QtCore.QBuffer(job)
+        buffer.setData(contents)
+        buffer.open(QtCore.QIODevice.ReadOnly)
+        job.reply(mimeType, buffer)
+    
+    @classmethod
+    def asset(cls, path : str):
+        """ Loads and caches a static asset, or returns None if unknown. """
+        with cls.assetLock:
+            if path not in cls.assets:
+                if path == '/viewer.html':
+                    viewerPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'viewer.html')
+                    with open(viewerPath, 'rb') as viewerFile:
+                        cls.assets[path] = (b'text/html', viewerFile.read())
+                elif path == '/plotly.min.js':
+                    # Bundled with the plotly package
+                    from plotly.offline import get_plotlyjs
+                    cls.assets[path] = (b'application/javascript', get_plotlyjs().encode('utf-8'))
+                elif path == '/qwebchannel.js':
+                    # Compiled into QtWebChannel's resources
+                    resource = QtCore.QFile(':/qtwebchannel/qwebchannel.js')
+                    resource.open(QtCore.QIODevice.ReadOnly)
+                    cls.assets[path] = (b'application/javascript', bytes(resource.readAll()))
+                    resource.close()
+                else:
+                    return None
+            return cls.assets[path]
+
+
+def register_url_scheme():
+    """ Registers the illixr:// scheme served by VisualizerSchemeHandler.
+        Must be called before the QApplication is created. """
+    from PyQt5.QtWebEngineCore import QWebEngineUrlScheme
+    scheme = QWebEngineUrlScheme(VisualizerSchemeHandler.scheme)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class VisualizerBridge(QtCore.QObject):
+    """ Part of ILLIXR Visualizer's View.
+        Object shared with the embedded page over QWebChannel. Pushes
+        figures and messages to the page's persistent Plotly container,
+        holding back the latest one until the page is ready. Figures are
+        published through the scheme handler and the page is sent their
+        URL, so payloads of any size take one request. """
+    figureChanged = QtCore.pyqtSignal(str)  # URL of the Plotly figure JSON
+    messageChanged = QtCore.pyqtSignal(str) # Plain text message
+    drawn = QtCore.pyqtSignal(float, float, float) # ms the page took to fetch, parse and draw a figure
+    viewChanged = QtCore.pyqtSignal(object) # (start, end) zoomed or panned to, or None once reset
+    
+    def __init__(self, schemeHandler):
+        super().__init__()
+        self.schemeHandler = schemeHandler
+        self.pageReady = False
+        self.lastUpdate = None # (signal, argument) of the latest update
+    
+    def push_figure(self, payload : str):
+        """ Draws the figure JSON in place of the current display. """
+        self._send(self.figureChanged, self.schemeHandler.publish_figure(payload))
+    
+    def push_message(self, text : str):
+        """ Replaces the current display with a text message. """
+        self._send(self.messageChanged, text)
+    
+    def _send(self, signal, argument):
+        self.lastUpdate = (signal, argument)
+        if self.pageReady:
+            signal.emit(argument)
+    
+    @QtCore.pyqtSlot()
+    def ready(self):
+        """ Called by the page once its end of the channel is connected. """
+        self.pageReady = True
+        if self.lastUpdate is not None:
+            signal, argument = self.lastUpdate
+            signal.emit(argument)
+    
+    @QtCore.pyqtSlot(float, float, float)
+    def figure_drawn(self, fetchMs, parseMs, drawMs):
+        """ Called by the page once Plotly has drawn a figure. """
+        self.drawn.emit(fetchMs, parseMs, drawMs)
+    
+    @QtCore.pyqtSlot(QtCore.QVariant)
+    def view_changed(self, viewRange):
+        """ Called by the page when the time axis is zoomed or panned,
+            with its [start, end], or null once reset. """
+        self.viewChanged.emit(tuple(viewRange) if viewRange else None)
+
 
 class VisualizerGUI(QMainWindow):
     """ ILLIXR_Visualizer's View (GUI).
@@ -161,10 +937,25 @@ class VisualizerGUI(QMainWindow):
         Displays plots and interfaces with user. """
     # Define signals for signalling Controller
     loadSignal = QtCore.pyqtSignal()
+    saveSignal = QtCore.pyqtSignal()
     reorderSignal = QtCore.pyqtSignal()
     leftSignal = QtCore.pyqtSignal()
     rightSignal = QtCore.pyqtSignal()
-        
+    cancelSignal = QtCore.pyqtSignal()
+    overviewSignal = QtCore.pyqtSignal(bool)
+    followSignal = QtCore.pyqtSignal(bool)
+    performanceSignal = QtCore.pyqtSignal()
+    statisticsSignal = QtCore.pyqtSignal()
+    concurrencySignal = QtCore.pyqtSignal()
+    findSignal = QtCore.pyqtSignal()
+    concurrencyLaneSignal = QtCore.pyqtSignal(bool)
+    compareSignal = QtCore.pyqtSignal()
+    differencesSignal = QtCore.pyqtSignal()
+    profileSignal = QtCore.pyqtSignal(bool)
+    drawnSignal = QtCore.pyqtSignal(float, float, float) # ms the display took to fetch, parse and draw
+    viewSignal = QtCore.pyqtSignal(object) # (start, end) ns zoomed or panned to, or None once reset
+    paintedSignal = QtCore.pyqtSignal() # The window has been painted for the first time
+    
     def __init__(self):
         """ View initializer. """
         super().__init__()
@@ -186,11 +977,13 @@ class VisualizerGUI(QMainWindow):
         self._centralWidget.setLayout(self.generalLayout)
         
         self.has_figure = False
+        self.painted = False
         
         self._createMenu(w)
         self._createDisplay()
         self._createPageNav()
-        
+        self._createStatusBar()
+    
     def _createMenu(self, w):
         """ The menu bar at the top of the app.
             Exposes the functionality for uploading the databases,
@@ -218,15 +1011,80 @@ class VisualizerGUI(QMainWindow):
         
         self.actionSave = QtWidgets.QAction(self)
         self.actionSave.setText("Save")
+        self.actionSave.setShortcut("Ctrl+S")
+        self.actionSave.triggered.connect(self.saveSignal.emit)
         
         self.actionLoad = QtWidgets.QAction(self)
         self.actionLoad.setText("Load Data")
         self.actionLoad.setShortcut("Ctrl+L")
         self.actionLoad.triggered.connect(self._load)
         
+        self.actionStatistics = QtWidgets.QAction(self)
+        self.actionStatistics.setText("Statistics")
+        self.actionStatistics.setShortcut("Ctrl+T")
+        self.actionStatistics.triggered.connect(self.statisticsSignal.emit)
+        
+        self.actionConcurrency = QtWidgets.QAction(self)
+        self.actionConcurrency.setText("Concurrency")
+        self.actionConcurrency.setShortcut("Ctrl+K")
+        self.actionConcurrency.triggered.connect(self.concurrencySignal.emit)
+        
+        self.actionFind = QtWidgets.QAction(self)
+        self.actionFind.setText("Find Intervals")
+        self.actionFind.setShortcut("Ctrl+J")
+        self.actionFind.triggered.connect(self.findSignal.emit)
+        
+        self.actionCompare = QtWidgets.QAction(self)
+        self.actionCompare.setText("Compare Runs")
+        self.actionCompare.setShortcut("Ctrl+R")
+        self.actionCompare.triggered.connect(self.compareSignal.emit)
+        
+        self.actionDifferences = QtWidgets.QAction(self)
+        self.actionDifferences.setText("Run Differences")
+        self.actionDifferences.setShortcut("Ctrl+D")
+        self.actionDifferences.setEnabled(False) # Until runs are compared
+        self.actionDifferences.triggered.connect(self.differencesSignal.emit)
+        
+        self.actionOverview = QtWidgets.QAction(self)
+        self.actionOverview.setText("Whole Trace Overview")
+        self.actionOverview.setShortcut("Ctrl+O")
+        self.actionOverview.setCheckable(True)
+        self.actionOverview.toggled.connect(self.overviewSignal.emit)
+        
+        self.actionConcurrencyLane = QtWidgets.QAction(self)
+        self.actionConcurrencyLane.setText("Concurrency Lane")
+        self.actionConcurrencyLane.setCheckable(True)
+        self.actionConcurrencyLane.toggled.connect(self.concurrencyLaneSignal.emit)
+        
+        self.actionFollow = QtWidgets.QAction(self)
+        self.actionFollow.setText("Follow Live Capture")
+        self.actionFollow.setShortcut("Ctrl+F")
+        self.actionFollow.setCheckable(True)
+        self.actionFollow.setChecked(True)
+        self.actionFollow.toggled.connect(self.followSignal.emit)
+        
+        self.actionPerformance = QtWidgets.QAction(self)
+        self.actionPerformance.setText("Performance")
+        self.actionPerformance.triggered.connect(self.performanceSignal.emit)
+        
+        self.actionProfile = QtWidgets.QAction(self)
+        self.actionProfile.setText("Capture Profile")
+        self.actionProfile.setCheckable(True)
+        self.actionProfile.toggled.connect(self.profileSignal.emit)
+        
         self.menuFile.addAction(self.actionNew)
         self.menuFile.addAction(self.actionSave)
         self.menuData.addAction(self.actionLoad)
+        self.menuData.addAction(self.actionStatistics)
+        self.menuData.addAction(self.actionConcurrency)
+        self.menuData.addAction(self.actionFind)
+        self.menuData.addAction(self.actionCompare)
+        self.menuData.addAction(self.actionDifferences)
+        self.menuPlotSettings.addAction(self.actionOverview)
+        self.menuPlotSettings.addAction(self.actionConcurrencyLane)
+        self.menuPlotSettings.addAction(self.actionFollow)
+        self.menuHelp.addAction(self.actionPerformance)
+        self.menuHelp.addAction(self.actionProfile)
         
         self.menubar.addAction(self.menuFile.menuAction())
         self.menubar.addAction(self.menuData.menuAction())
@@ -241,7 +1099,7 @@ class VisualizerGUI(QMainWindow):
         # Creates plugin list with title: self.pluginListLayout
         self._createPluginList()
         self.displayLayout.addLayout(self.pluginListLayout)
-
+        
         # Create figure region: self.figureRegion
         self._createFigureRegion()
         self.displayLayout.addWidget(self.figureRegion, 1) # Only display stretches
@@ -267,7 +1125,7 @@ class VisualizerGUI(QMainWindow):
         self.pluginList.addItems(self.strList);
         self.pluginList.setDragDropMode(QAbstractItemView.InternalMove)
         self.pluginListLayout.addWidget(self.pluginList)
-    
+        
         # Button to reorder plot
         reorderButton = QPushButton('Reorder Plot')
         reorderButton.clicked.connect(self._reorder_plot)
@@ -278,16 +1136,53 @@ class VisualizerGUI(QMainWindow):
         # Embed figure within widget to create border
         self.figureRegion = QWidget()
         self.figureRegion.setStyleSheet("border: 1px solid darkgray")
-                
+        
         self.displaySubLayout = QVBoxLayout(self.figureRegion)
         self.displaySubLayout.setContentsMargins(1,1,1,1)
-
-        # Create display plot region
-        self.fig_view = QWebEngineView(self.figureRegion)
-        self.set_display(text='No data provided yet. Load data in Data menu option.')
+        
+        # Placeholder shown until the display is started
+        self.fig_view = None
+        self.bridge = None
+        self.placeholder = QLabel('No data provided yet. Load data in Data menu option.')
+        self.placeholder.setAlignment(QtCore.Qt.AlignCenter)
+        self.placeholder.setStyleSheet("border: none")
         
         # Add figure to sub layout
-        self.displaySubLayout.addWidget(self.fig_view)    
+        self.displaySubLayout.addWidget(self.placeholder)    
+    
+    def start_display(self):
+        """ Replaces the placeholder with the display plot region, a
+            persistent page that figures are pushed to through the
+            bridge, unless it already has been. Starting QtWebEngine and
+            parsing plotly.js in the page take seconds on a cold start, so
+            this waits for the load dialog or the first figure rather than
+            holding up the window. """
+        if self.fig_view is not None:
+            return
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
+        from PyQt5.QtWebChannel import QWebChannel
+        
+        self.fig_view = QWebEngineView(self.figureRegion)
+        self.schemeHandler = VisualizerSchemeHandler.create(self)
+        self.fig_view.page().profile().installUrlSchemeHandler(VisualizerSchemeHandler.scheme, self.schemeHandler)
+        self.bridge = VisualizerBridge(self.schemeHandler)
+        self.bridge.drawn.connect(self.drawnSignal.emit)
+        self.bridge.viewChanged.connect(self.viewSignal.emit)
+        self.channel = QWebChannel(self.fig_view.page())
+        self.channel.registerObject('bridge', self.bridge)
+        self.fig_view.page().setWebChannel(self.channel)
+        self.fig_view.setUrl(QtCore.QUrl(VisualizerSchemeHandler.origin + 'viewer.html'))
+        self.bridge.push_message(self.placeholder.text())
+        
+        self.displaySubLayout.replaceWidget(self.placeholder, self.fig_view)
+        self.placeholder.hide()
+    
+    def paintEvent(self, event):
+        """ Signals the Controller once the window is first painted. """
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.paintedSignal.emit()
     
     def _createPageNav(self):
         """ Creates the navigation bar beneath the plot which
@@ -314,50 +1209,95 @@ class VisualizerGUI(QMainWindow):
         self.pageNavLayout.addStretch()
         
         self.generalLayout.addLayout(self.pageNavLayout, 10, 0, 1, 23)
-
+    
+    def _createStatusBar(self):
+        """ Creates the status bar, holding a progress bar and
+            Cancel button that are shown while work is in progress. """
+        self.progressBar = QProgressBar()
+        self.progressBar.setMaximumWidth(200)
+        self.progressBar.hide()
+        
+        self.cancelButton = QPushButton("Cancel")
+        self.cancelButton.clicked.connect(self.cancelSignal.emit)
+        self.cancelButton.hide()
+        
+        self.timingLabel = QLabel() # Latency of the latest page
+        
+        self.statusBar().addPermanentWidget(self.progressBar)
+        self.statusBar().addPermanentWidget(self.cancelButton)
+        self.statusBar().addPermanentWidget(self.timingLabel)
+    
     # END METHODS FOR INITIALIZING GUI
     
     def _load(self):
         """ Signals Controller to handle load. """
         self.loadSignal.emit()
-       
-    def set_display(self, figure=None, text=None):
-        """ Embeds given figure in the display. """
-        if figure is not None and text is not None:
-            raise Exception("Only figure or text may be supplied.")
+    
+    def set_display(self, figure=None, text=None, payload=None):
+        """ Displays given figure, or text in its place. The figure may
+            also be supplied already serialized to a JSON payload. """
+        if sum(arg is not None for arg in (figure, text, payload)) > 1:
+            raise Exception("Only one of figure, text or payload may be supplied.")
         
-        html = '<html><head><meta charset="utf-8" />'
         if figure is not None:
+            payload = figure_to_payload(figure)
+        if payload is not None:
+            self.start_display()
             self.has_figure = True
-            html += '<script src="https://cdn.plot.ly/plotly-latest.min.js"></script></head>'
-            html += '<body>'
-            # 'div' is specified for embedding the graph
-            html += po.plot(figure, include_plotlyjs=False, output_type='div')
+            self.bridge.push_figure(payload)
         elif text is not None and isinstance(text, str):
-            html += '<body>'
-            html += '<p style="font-family: sans-serif">' + text + '</p>'
+            if self.bridge is None:
+                self.placeholder.setText(text)
+            else:
+                self.bridge.push_message(text)
         else:
             raise Exception("figure or text must be supplied.")
-        html += '</body></html>'
-          
-        self.fig_view.setHtml(html)
-        self.fig_view.raise_()
-        
+    
+    def show_progress(self, percent : int, message : str = None):
+        """ Shows progress of background work in the status bar.
+            A negative percent shows a busy indicator instead. """
+        if percent < 0:
+            self.progressBar.setRange(0, 0)
+        else:
+            self.progressBar.setRange(0, 100)
+            self.progressBar.setValue(percent)
+        if message is not None:
+            self.statusBar().showMessage(message)
+        self.progressBar.show()
+        self.cancelButton.show()
+    
+    def hide_progress(self):
+        """ Hides the progress bar and Cancel button. """
+        self.progressBar.hide()
+        self.cancelButton.hide()
+    
+    def show_timing(self, text : str):
+        """ Shows the latest page's latency in the status bar. """
+        self.timingLabel.setText(text)
+    
     def _page_left(self):
         """ Signals Controller to page left, updating the figure. """
         if self.has_figure is True:
             self.leftSignal.emit()
-        
+    
     def _page_right(self):
         """ Signals Controller to page right, updating the figure. """
         if self.has_figure is True:
             self.rightSignal.emit()
-                
+    
+    def set_comparing(self, comparing : bool):
+        """ Enables the run differences while runs are compared. """
+        self.actionDifferences.setEnabled(comparing)
+    
+    def set_follow(self, follow : bool):
+        """ Shows whether the end of a live capture is being followed. """
+        self.actionFollow.setChecked(follow)
+    
     def change_pagenum(self, pagenum : str):
         """ Changes the page number that is displayed in the page navigation bar. """
         self.illixr_img.clear
         self.illixr_img.setText(pagenum)
-        
+    
     def _reorder_plot(self):
         """ Signals Controller to reorder the plugins in the plot. """
         if self.has_figure is True:
@@ -367,268 +1307,861 @@ class VisualizerGUI(QMainWindow):
                 newPluginOrder.append(self.pluginList.item(i).text())
             self.strList = newPluginOrder
             self.reorderSignal.emit()
-            
+    
     def get_plugin_list(self):
         """ Returns the plugin list as it was last set,
             either by loading new data or clicking the 
             Reorder Plot button. """
         return self.strList
-            
+    
     def set_plugin_list(self, plugins : list):
         """ Sets the list of the plugins. """
         self.pluginList.clear()
         
         self.strList = plugins
         self.pluginList.addItems(self.strList)
+    
+    def add_plugins(self, plugins : list):
+        """ Adds plugins to the end of the list, keeping its order. """
+        self.strList = self.strList + plugins
+        self.pluginList.addItems(plugins)
+
+class VisualizerWorker(QtCore.QObject):
+    """ Part of ILLIXR Visualizer's Controller.
+        Loads databases and renders pages on a background thread so the
+        GUI's event loop never blocks. Requests arrive through the request
+        signals (queued onto the worker's thread) and results are sent
+        back through the result signals. """
+    # Requests, emitted by the Controller
+    requestLoad = QtCore.pyqtSignal(str, object, bool, str, bool) # Plugin name database, data databases, lazy mode, time base, live mode
+    requestCompare = QtCore.pyqtSignal(object, object, str, bool) # Runs, lane aligned on or None, time base, interleaved lanes
+    requestRender = QtCore.pyqtSignal(object)
+    requestSaveProfile = QtCore.pyqtSignal(str) # Path to write the captured profile to
+    requestStatistics = QtCore.pyqtSignal(object, object, object) # TraceStore, start and end ns or None
+    requestPoll = QtCore.pyqtSignal(object) # TraceStore of a live capture
+    requestConcurrency = QtCore.pyqtSignal(object) # TraceStore
+    requestFind = QtCore.pyqtSignal(object, str, object, object) # TraceStore, query, plugin name or None, value
+    requestExport = QtCore.pyqtSignal(object, str, str, object, object, object) # TraceStore, path, format, start, end, plugins
+    
+    # Results, handled by the Controller
+    progressSignal = QtCore.pyqtSignal(int, str) # Percent complete (-1 if unknown), message
+    loadedSignal = QtCore.pyqtSignal(object, object, str) # TraceStore, TraceExtent, summary
+    failedSignal = QtCore.pyqtSignal(str, str) # Title, message
+    cancelledSignal = QtCore.pyqtSignal()
+    renderedSignal = QtCore.pyqtSignal(object, object, object, object) # PageRequest, figure JSON, text (both None if superseded), exact range
+    statusSignal = QtCore.pyqtSignal(str) # Message for the status bar
+    statisticsSignal = QtCore.pyqtSignal(object, object, object, object, object) # TraceStore, start, end, LatencyStats, lane names
+    polledSignal = QtCore.pyqtSignal(object, object, object) # TraceStore, TraceExtent, earliest new start or None
+    concurrencySignal = QtCore.pyqtSignal(object, object, object) # TraceStore, ConcurrencyProfile or None, lane names
+    foundSignal = QtCore.pyqtSignal(object, object, int, str) # TraceStore, found rows, number found, error or empty
+    exportedSignal = QtCore.pyqtSignal(str, str) # Error or empty, message
+    
+    def __init__(self, model):
+        """ Worker initializer. The Model's settings are not changed
+            while the worker runs. """
+        super().__init__()
+        self.model = model
+        self.cancelEvent = threading.Event() # Set from the GUI thread to cancel a load
+        self.superseded = None # PageRequest no longer wanted, set from the GUI thread
+        self.tail = None # TraceTail of the latest store loaded, closed once another replaces it
+        
+        self.requestLoad.connect(self.load)
+        self.requestCompare.connect(self.compare)
+        self.requestRender.connect(self.render)
+        self.requestSaveProfile.connect(self.save_profile)
+        self.requestStatistics.connect(self.statistics)
+        self.requestPoll.connect(self.poll)
+        self.requestConcurrency.connect(self.concurrency)
+        self.requestFind.connect(self.find)
+        self.requestExport.connect(self.export)
+    
+    def cancel(self):
+        """ Cancels the current load. Safe to call from any thread. """
+        self.cancelEvent.set()
+    
+    def supersede(self, request):
+        """ Abandons rendering request, if it has yet to be serialized.
+            Safe to call from any thread. """
+        self.superseded = request
+    
+    @QtCore.pyqtSlot(str, object, bool, str, bool)
+    def load(self, namePath, dataPaths, lazy, timeBase, live):
+        """ Loads the databases through the Model, timed by the given clock. """
+        self._load(timeBase, lambda progress: self.model.load(namePath, dataPaths, progress, lazy, live))
+    
+    @QtCore.pyqtSlot(object, object, str, bool)
+    def compare(self, runs, align, timeBase, interleave):
+        """ Loads runs for comparison through the Model, timed by the given
+            clock. """
+        self._load(timeBase, lambda progress: self.model.load_runs(runs, align, interleave, progress))
+    
+    def _load(self, timeBase : str, load):
+        """ Helper function for load and compare that calls load(progress)
+            under the given clock, sending its result back. The previous
+            clock is kept if the load does not complete. """
+        self.cancelEvent.clear()
+        previousTimeBase, self.model.timeBase = self.model.timeBase, timeBase
+        
+        def progress(percent, message):
+            if self.cancelEvent.is_set():
+                raise LoadCancelled()
+            self.progressSignal.emit(percent, message)
+        
+        try:
+            with self.model.timer.profiling():
+                store, summary = load(progress)
+        except LoadCancelled:
+            self.model.timeBase = previousTimeBase
+            self.cancelledSignal.emit()
+            return
+        except MalformedDatabaseError as e:
+            self.model.timeBase = previousTimeBase
+            self.failedSignal.emit("Malformed Database", str(e))
+            return
+        if self.tail is not None:
+            self.tail.close()
+        self.tail = store.tail
+        self.loadedSignal.emit(store, self.model.extent(store), summary)
+    
+    @QtCore.pyqtSlot(object)
+    def render(self, request):
+        """ Renders the requested page to a figure JSON payload, or
+            to a message if the page holds no data. A request superseded
+            before it is rendered or serialized is dropped. The range the
+            figure draws one interval at a time, if it does, is decided
+            here, as polls append to the store on this thread. """
+        payload, text, exactRange = None, None, None
+        with self.model.timer.profiling():
+            fig = None
+            if self.superseded is not request:
+                fig = self.model.create_fig(request)
+                if fig is None:
+                    text = 'No data on this page.'
+            if fig is not None and self.superseded is not request:
+                exactRange = self.model.exact_range(request)
+                with self.model.timer.span('serialize'):
+                    payload = figure_to_payload(fig)
+        self.renderedSignal.emit(request, payload, text, exactRange)
+    
+    @QtCore.pyqtSlot(object)
+    def poll(self, store):
+        """ Appends the rows newly written to a live capture. """
+        with self.model.timer.profiling():
+            firstStart = self.model.poll(store)
+        self.polledSignal.emit(store, self.model.extent(store), firstStart)
+    
+    @QtCore.pyqtSlot(object, object, object)
+    def statistics(self, store, a, b):
+        """ Summarizes each plugin's intervals starting in [a, b). """
+        with self.model.timer.profiling():
+            stats = self.model.statistics(store, a, b)
+        self.statisticsSignal.emit(store, a, b, stats, tuple(store.names))
+    
+    @QtCore.pyqtSlot(object)
+    def concurrency(self, store):
+        """ Sweeps the trace for its concurrency, unless already swept. """
+        with self.model.timer.profiling():
+            profile = self.model.concurrency(store)
+        self.concurrencySignal.emit(store, profile, tuple(store.names))
+    
+    @QtCore.pyqtSlot(object, str, object, object)
+    def find(self, store, query, plugin, value):
+        """ Finds intervals by duration or iteration number. """
+        try:
+            with self.model.timer.profiling():
+                rows, total = self.model.find(store, query, plugin, value)
+        except ValueError as e:
+            self.foundSignal.emit(store, [], 0, str(e))
+            return
+        self.foundSignal.emit(store, rows, total, "")
+    
+    @QtCore.pyqtSlot(object, str, str, object, object, object)
+    def export(self, store, path, fmt, a, b, plugins):
+        """ Streams intervals to a trace file, until cancelled. """
+        self.cancelEvent.clear()
+        
+        def progress(percent, message):
+            if self.cancelEvent.is_set():
+                raise LoadCancelled()
+            self.progressSignal.emit(percent, message)
+        
+        timerStart = time.perf_counter()
+        try:
+            with self.model.timer.profiling():
+                written = self.model.export(store, path, fmt, a, b, plugins, progress)
+        except LoadCancelled:
+            self.exportedSignal.emit("", "Save cancelled.")
+            return
+        except OSError as e:
+            self.exportedSignal.emit(str(e), "")
+            return
+        self.exportedSignal.emit("", "Saved " + f"{written:,}" + " intervals to " + path + " in " +
+            f"{time.perf_counter() - timerStart:.2f}" + " s")
+    
+    @QtCore.pyqtSlot(str)
+    def save_profile(self, path : str):
+        """ Stops the profile capture, writing it to path. Runs on the
+            worker's thread, after any render that is being profiled. """
+        try:
+            self.model.timer.stop_profile(path)
+        except OSError as e:
+            self.statusSignal.emit("Cannot save profile: " + str(e))
+            return
+        if path:
+            self.statusSignal.emit("Profile saved to " + path)
+
+
+class PageCache():
+    """ Part of ILLIXR Visualizer's Controller.
+        Least-recently-used cache of rendered pages, bounded by the
+        total size of the cached pages rather than their number. """
+    def __init__(self, maxBytes=64 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.nbytes = 0
+        self.entries = OrderedDict() # key -> (page, size in bytes)
+    
+    def __contains__(self, key):
+        return key in self.entries
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def get(self, key):
+        """ Returns the cached page, or None if it is not cached. """
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+    
+    def put(self, key, page, nbytes : int):
+        """ Caches a page, evicting the least recently used pages
+            until the cache fits its memory limit. """
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        if nbytes > self.maxBytes:
+            return
+        self.entries[key] = (page, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.maxBytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+    
+    def discard(self, stale):
+        """ Drops the pages whose keys stale(key) is true for. """
+        for key in [key for key in self.entries if stale(key)]:
+            self.nbytes -= self.entries.pop(key)[1]
+    
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
 
 class VisualizerController():
     """ ILLIXR Visualizer's Controller.
-        Interfaces between the View and Model. """
+        Interfaces between the View and Model. Loading and rendering
+        run on a VisualizerWorker in a background thread. """
     def __init__(self, view):
         """ Controller initializer. """
         self.view = view
         self.view.loadSignal.connect(self._load)
+        self.view.saveSignal.connect(self._save)
         self.view.leftSignal.connect(self._page_left)
         self.view.rightSignal.connect(self._page_right)
         self.view.reorderSignal.connect(self._reorder_fig)
+        self.view.cancelSignal.connect(self._cancel)
+        self.view.overviewSignal.connect(self._set_overview)
+        self.view.followSignal.connect(self._set_follow)
+        self.view.performanceSignal.connect(self._show_performance)
+        self.view.statisticsSignal.connect(self._show_statistics)
+        self.view.concurrencySignal.connect(self._show_concurrency)
+        self.view.findSignal.connect(self._show_find)
+        self.view.concurrencyLaneSignal.connect(self._set_concurrency_lane)
+        self.view.compareSignal.connect(self._compare)
+        self.view.differencesSignal.connect(self._show_differences)
+        self.view.profileSignal.connect(self._set_profiling)
+        self.view.drawnSignal.connect(self._drawn)
+        self.view.viewSignal.connect(self._view_reported)
+        self.view.paintedSignal.connect(self._warm_up)
         
         # Default plot settings
         self.pageSz = 1000000 # Number of nanoseconds to include per page
         self.currentPage = 0  # Starts on the first page of data
         self.totalPages  = 0  # The minimum number of pages needed to graph all the data
+        self.overview = False # Whether the whole trace is shown instead of a page
+        self.follow = True    # Whether the last page of a live capture is shown as it grows
+        self.concurrencyLane = False # Whether the running concurrency is drawn under the plugins
+        self.viewRange = None # (start, end) ns zoomed or panned to, None while showing a page or the overview
+        self.exactRange = None # [start, end) ns the displayed figure draws one interval at a time, or None
         
-        # Configure plotly express with custom dataframe processor method 
-        # to avoid plotly express' auto-use of datetime objects
-        px._core.process_dataframe_timeline = integer_process_dataframe_timeline
-        
-        self.pluginTable = 'plugin_name' # Name of table containing plugin names 
-        self.pluginID = 'plugin_id' # Name of plugin identifier attribute, shared over databases
-        self.pluginName = 'plugin_name' # Name of column holding plugin names
+        self.model = VisualizerModel()
+        self.pluginName = self.model.pluginName
         self.pluginOrder = {self.pluginName : []} # Dictionary specifying plugin ordering
         
-        # Define SQL to extract plugin IDs and plugin names from table
-        self.nameSQL = ('SELECT ' +
-            self.pluginID + ', ' +
-            self.pluginName +
-            ' FROM ' + 
-            self.pluginTable
-        )
+        self.store = None # TraceStore holding the logged data, whose data is read on the worker thread only
+        self.extent = None # TraceExtent of the store, as of the latest load or poll
+        self.requestStart = None # perf_counter ns at which the page being drawn was requested
         
-        # Data table names
-        self.switchboardTable = 'switchboard_callback' # Name of table containing switchboard data
-        self.threadloopTable  = 'threadloop_iteration' # Name of table containing threadloop data
+        # Rendered pages, keyed by PageRequest settings
+        self.pageCache = PageCache()
         
-        self.startTime = 'cpu_time_start' # Name of data attribute containing start times
-        self.endTime   = 'cpu_time_stop'  # Name of attribute containing end times
+        # Background worker for loading and rendering
+        self.renderBusy = False     # A page render is in progress
+        self.pendingRequest = None  # Latest page requested while busy
+        self.inFlight = None        # Page being rendered
+        self.workerThread = QtCore.QThread()
+        self.worker = VisualizerWorker(self.model)
+        self.worker.moveToThread(self.workerThread)
+        self.worker.progressSignal.connect(self.view.show_progress)
+        self.worker.loadedSignal.connect(self._loaded)
+        self.worker.failedSignal.connect(self._load_failed)
+        self.worker.cancelledSignal.connect(self._load_cancelled)
+        self.worker.renderedSignal.connect(self._rendered)
+        self.worker.statusSignal.connect(self.view.statusBar().showMessage)
+        self.worker.statisticsSignal.connect(self._statistics_computed)
+        self.statisticsDialog = None  # Open statistics dialog
+        self.differencesDialog = None # Open run differences dialog
+        self.concurrencyDialog = None # Open concurrency dialog
+        self.worker.concurrencySignal.connect(self._concurrency_computed)
+        self.findDialog = None        # Open find intervals dialog
+        self.worker.foundSignal.connect(self._found)
+        self.worker.exportedSignal.connect(self._saved)
+        self.retryLoad = self._load   # Asks again for what failed to load
         
-        # Define base data extraction SQL statement, add data table name on use
-        self.dataSQL = ('SELECT ' +
-            self.pluginID  + ', ' +
-            self.startTime + ', ' +
-            self.endTime   +
-            ' FROM '
-        )
+        # A live capture is polled for new rows at up to 100 Hz
+        self.worker.polledSignal.connect(self._polled)
+        self.liveTimer = QtCore.QTimer()
+        self.liveTimer.setInterval(10)
+        self.liveTimer.timeout.connect(self._poll)
+        self.pollBusy = False   # A poll is in progress
+        self.liveStale = False  # New rows fall on the shown page, which is yet to be redrawn
         
-        # pandas DataFrames storing logged data
-        self.nameDF = None
-        self.dataDF = None
+        # Zooming and panning are drawn once the display has settled for 100 ms
+        self.reportedView = None # Latest range reported by the display, None once reset
+        self.viewTimer = QtCore.QTimer()
+        self.viewTimer.setSingleShot(True)
+        self.viewTimer.setInterval(100)
+        self.viewTimer.timeout.connect(self._change_view)
+        self.workerThread.start()
+        QApplication.instance().aboutToQuit.connect(self._shutdown)
+    
+    def _shutdown(self):
+        """ Stops the worker thread when the application exits. """
+        self.worker.cancel()
+        self.workerThread.quit()
+        self.workerThread.wait()
+    
+    def _warm_up(self):
+        """ Imports plotly in the background once the window is painted. """
+        threading.Thread(target=warm_up, name='warm up', daemon=True).start()
     
     def _load(self):
         """ Handles loading of databases. """
-        # Launches VisualizerGUILoadDialog
+        # Launches VisualizerGUILoadDialog, starting the display while it is open
         loadGUI = VisualizerGUILoadDialog()
+        QtCore.QTimer.singleShot(0, self.view.start_display)
         if loadGUI.exec_():
-            # Successful retrieval of databases
+            # Successful retrieval of databases, load them in the background
             namePath, dataPaths = loadGUI.getDatabasePaths()
-            
-            # Load plugin names
-            tempNameDF = self._db_to_df(
-                dbPath = namePath, 
-                sql_stmt = self.nameSQL,
-                index_column = self.pluginID,
-                contents = "plugin names",
-                tableName = self.pluginTable,
-                attribs = "'" + self.pluginID + "' and '" + self.pluginName + "'"
-            )
-            if tempNameDF is None:  # Failed to load, retry
-                return self._load()
-            
-            # Load logged data (switchboard and threadloop)
-            tempDataDF = None
-            for dataType, dataPath in dataPaths.items():
-                tempDF = None
-                if dataType == "switchboard":
-                    tempDF = self._db_to_df(
-                        dbPath = dataPath,
-                        sql_stmt = self.dataSQL + self.switchboardTable,
-                        contents = "switchboard logs",
-                        tableName = self.switchboardTable,
-                        attribs = "'" + self.pluginID + "', '" + self.startTime + "' and '" + self.endTime + "'"
-                    )
-                elif dataType == "threadloop":
-                    tempDF = self._db_to_df(
-                        dbPath = dataPath,
-                        sql_stmt = self.dataSQL + self.threadloopTable,
-                        contents = "threadloop logs",
-                        tableName = self.threadloopTable,
-                        attribs = "'" + self.pluginID + "', '" + self.startTime + "' and '" + self.endTime + "'"
-                    )
-                if tempDF is None:  # Failed to load, retry
-                    return self._load()
-                    
-                # Append to temporary DataFrame
-                if tempDataDF is not None:
-                    tempDataDF = tempDataDF.append(tempDF)
-                else:
-                    tempDataDF = tempDF
-             
-            # Set class fields
-            self.nameDF = tempNameDF
-            self.dataDF = tempDataDF
-            
-            # Replace plugin_id with plugin_name
-            self.dataDF = self.dataDF.rename(columns={self.pluginID : self.pluginName}, errors="raise")
-            self.dataDF = self.dataDF.replace(to_replace=self.nameDF.to_dict())
-            
-            # Sort data by startTime
-            self.dataDF = self.dataDF.sort_values(by=[self.startTime])
-            
-            self.pluginOrder[self.pluginName] = self.dataDF[self.pluginName].unique().tolist()
-            
-            # Tell view the order of the plugins
-            self.view.set_plugin_list(self.pluginOrder[self.pluginName])
-            
-            # Each time databases are loaded, render new figure
-            self._create_fig()
-            
+            self.retryLoad = self._load
+            self.view.show_progress(0, "Loading plugin names")
+            self.worker.requestLoad.emit(namePath, dataPaths, loadGUI.getLazyMode(), loadGUI.getTimeBase(),
+                loadGUI.getLiveMode())
     
-    def _db_to_df(self, dbPath, sql_stmt, contents : str, tableName : str, attribs : str, index_column=None):
-        """ Helper function for _load that connects to databases
-            and stores data in a pandas DataFrame. """
-        # Establish connection to the database
-        db_uri = "file:" + dbPath + "?mode=ro"
-        connection = sqlite3.connect(db_uri, uri=True)
-            
-        # Load data from database into pandas DataFrame
-        df = None
-        try:
-            if index_column is not None:
-                df = pd.read_sql(sql_stmt, con=connection, index_col=index_column)
+    def _compare(self):
+        """ Handles loading of several runs for comparison. """
+        compareGUI = VisualizerGUICompareDialog(self.model.run_databases)
+        QtCore.QTimer.singleShot(0, self.view.start_display)
+        if compareGUI.exec_():
+            self.retryLoad = self._compare
+            self.view.show_progress(0, "Loading runs")
+            self.worker.requestCompare.emit(compareGUI.getRuns(), compareGUI.getAlignment(), compareGUI.getTimeBase(),
+                compareGUI.getInterleave())
+    
+    def _loaded(self, store, extent, summary : str):
+        """ Receives newly loaded data from the worker. """
+        self.view.hide_progress()
+        self.view.statusBar().showMessage(summary)
+        
+        # Set class fields, dropping pages rendered from previous data
+        self.store = store
+        self.extent = extent
+        self.pageCache.clear()
+        self.currentPage = 0
+        self.viewRange = None
+        self.exactRange = None
+        self.totalPages = self.extent.page_count(self.pageSz) - 1
+        
+        self.pluginOrder[self.pluginName] = list(self.extent.pluginOrder)
+        
+        # Tell view the order of the plugins
+        self.view.set_plugin_list(self.pluginOrder[self.pluginName])
+        self.view.set_comparing(isinstance(self.store, CompareStore))
+        
+        # A live capture starts on its last page
+        self.liveStale = False
+        if self.store.tail is not None:
+            if self.follow:
+                self.currentPage = self.totalPages
+            self.liveTimer.start()
+        else:
+            self.liveTimer.stop()
+        
+        # Each time databases are loaded, render new figure
+        self._create_fig()
+    
+    def _load_failed(self, title : str, msg : str):
+        """ Displays a load error, then asks for the databases again. """
+        self.view.hide_progress()
+        error_msg = QMessageBox()
+        error_msg.setIcon(QMessageBox.Critical)
+        error_msg.setText(msg)
+        error_msg.setWindowTitle(title)
+        error_msg.setStandardButtons(QMessageBox.Ok)
+        error_msg.exec_()
+        self.retryLoad()  # Retry
+    
+    def _load_cancelled(self):
+        """ Acknowledges a cancelled load. Previously loaded data is kept. """
+        self.view.hide_progress()
+        self.view.statusBar().showMessage("Load cancelled.")
+    
+    def _cancel(self):
+        """ Cancels the running load and any page waiting to be rendered. """
+        self.worker.cancel()
+        self.pendingRequest = None
+        if self.renderBusy:
+            self.view.hide_progress()
+    
+    def _create_fig(self):
+        """ Displays the figure for the current page, from the page cache
+            if possible and otherwise by requesting it from the worker.
+            Requests made while a page is rendering are coalesced so
+            only the latest one is rendered next. """
+        self.requestStart = time.perf_counter_ns()
+        self.view.change_pagenum(self._page_label())
+        request = self._shown_request()
+        cached = self.pageCache.get(self._cache_key(request))
+        if cached is not None:
+            self._display(request, *cached)
+            QtCore.QTimer.singleShot(0, self._prefetch)
+        elif self.renderBusy:
+            self.pendingRequest = request
+            self.view.show_progress(-1)
+        else:
+            self._dispatch(request)
+    
+    def _shown_request(self):
+        """ Describes what is being shown: the range zoomed or panned
+            to, the whole trace overview or the current page. """
+        if self.viewRange is not None:
+            return self._page_request(None, span=self.viewRange)
+        return self._page_request(None if self.overview else self.currentPage)
+    
+    def _page_label(self):
+        """ Text of the page navigation bar for what is being shown. """
+        if self.viewRange is not None:
+            start, end = self.viewRange
+            return f"{start / 1e6:,.3f}" + ' - ' + f"{end / 1e6:,.3f}" + ' ms'
+        if self.overview:
+            return 'Overview'
+        return str(self.currentPage) + ' / ' + str(self.totalPages)
+    
+    def _page_request(self, page : int, prefetch=False, span=None):
+        """ Describes the given page, or the span of ns if given, under
+            the current plot settings. """
+        return PageRequest(
+            page = page,
+            pageSz = self.pageSz,
+            pluginOrder = list(self.pluginOrder[self.pluginName]),
+            timeBase = self.model.timeBase,
+            store = self.store,
+            prefetch = prefetch,
+            concurrency = self.concurrencyLane,
+            span = span
+        )
+    
+    def _cache_key(self, request):
+        """ Page cache key: everything that changes a page's rendering. """
+        return (request.page, request.pageSz, tuple(request.pluginOrder), request.timeBase, request.concurrency, request.span)
+    
+    def _dispatch(self, request):
+        """ Sends a page request to the worker. """
+        self.renderBusy = True
+        self.inFlight = request
+        if not request.prefetch:
+            self.view.show_progress(-1)
+        self.worker.requestRender.emit(request)
+    
+    def _rendered(self, request, payload, text, exactRange):
+        """ Caches a rendered page and displays it, unless a newer
+            page was requested in the meantime. """
+        self.renderBusy = False
+        self.inFlight = None
+        superseded = payload is None and text is None
+        if request.store is self.store and not superseded:
+            self.pageCache.put(self._cache_key(request), (payload, text, exactRange), len(payload or text))
+        if self.pendingRequest is not None:
+            request, self.pendingRequest = self.pendingRequest, None
+            self._dispatch(request)
+            return
+        self.view.hide_progress()
+        shown = self._shown_request()
+        if (not request.prefetch and not superseded and request.store is self.store and
+                (request.page, request.span) == (shown.page, shown.span)):
+            self._display(request, payload, text, exactRange)
+        QtCore.QTimer.singleShot(0, self._prefetch)
+    
+    def _display(self, request, payload, text, exactRange):
+        """ Sends a rendered page to the View. """
+        self.exactRange = exactRange
+        with self.model.timer.span('display'):
+            if payload is not None:
+                self.view.set_display(payload=payload)
             else:
-                df = pd.read_sql(sql_stmt, con=connection)
-        except:
-            # Display error message asking to reload
+                self.view.set_display(text=text)
+                self.requestStart = None # No figure will be drawn
+    
+    def _drawn(self, fetchMs : float, parseMs : float, drawMs : float):
+        """ Records the display's timing of a drawn figure, and the
+            page's latency from request to drawn figure. """
+        timer = self.model.timer
+        end = time.perf_counter_ns()
+        drawStart = end - int(drawMs * 1e6)
+        parseStart = drawStart - int(parseMs * 1e6)
+        timer.record('fetch', parseStart - int(fetchMs * 1e6), int(fetchMs * 1e6), 0, "Display")
+        timer.record('parse', parseStart, int(parseMs * 1e6), 0, "Display")
+        timer.record('draw', drawStart, int(drawMs * 1e6), 0, "Display")
+        if self.requestStart is None:
+            return
+        timer.record('page', self.requestStart, end - self.requestStart)
+        self.requestStart = None
+        self.view.show_timing("Page " + f"{timer.latest['page'] / 1e6:.1f}" + " ms (draw " + f"{drawMs:.1f}" + " ms)")
+    
+    def _show_statistics(self):
+        """ Shows each plugin's latency statistics, starting with the
+            whole trace. """
+        if self.store is None:
+            return
+        if self.overview:
+            pageRange = (self.extent.minStart, self.extent.maxStop + 1)
+        else:
+            pageRange = (self.currentPage * self.pageSz, (self.currentPage + 1) * self.pageSz)
+        self.statisticsDialog = VisualizerGUIStatisticsDialog(pageRange)
+        self.statisticsDialog.computeSignal.connect(
+            lambda a, b: self.worker.requestStatistics.emit(self.store, a, b))
+        self.statisticsDialog.computeButton.click()
+        self.statisticsDialog.exec_()
+        self.statisticsDialog = None
+    
+    def _statistics_computed(self, store, a, b, stats, names):
+        """ Shows statistics computed by the worker, or the run differences
+            drawn from them, if still wanted. """
+        if store is not self.store:
+            return
+        if self.differencesDialog is not None:
+            rows = self.model.run_differences(store, stats)
+            summary = ("Changes from " + store.labels[0] + " over " + f"{int(stats.counts.sum()):,}" + " intervals, in " +
+                f"{self.model.timer.latest['statistics'] / 1e9:.2f}" + " s")
+            self.differencesDialog.set_rows(rows, summary)
+            return
+        if self.statisticsDialog is None:
+            return
+        rows = stats.rows(names, self.pluginOrder[self.pluginName])
+        scope = "the whole trace" if a is None else "[" + f"{a:,}" + ", " + f"{b:,}" + ") ns"
+        summary = (f"{int(stats.counts.sum()):,}" + " intervals starting in " + scope + " in " +
+            f"{self.model.timer.latest['statistics'] / 1e9:.2f}" + " s")
+        self.statisticsDialog.set_stats(rows, summary)
+    
+    def _show_concurrency(self):
+        """ Shows how many intervals ran at once over the whole trace. """
+        if self.store is None:
+            return
+        self.concurrencyDialog = VisualizerGUIConcurrencyDialog()
+        self.worker.requestConcurrency.emit(self.store)
+        self.concurrencyDialog.exec_()
+        self.concurrencyDialog = None
+    
+    def _concurrency_computed(self, store, profile, names):
+        """ Shows a concurrency profile swept by the worker, if still
+            wanted. """
+        if store is not self.store or self.concurrencyDialog is None:
+            return
+        if profile is None:
+            self.concurrencyDialog.set_profile(None, [], "Concurrency is not swept across compared runs.")
+            return
+        codeOf = {name: code for code, name in enumerate(names)}
+        plugins = [(name, codeOf[name]) for name in self.pluginOrder[self.pluginName] if name in codeOf]
+        summary = "; swept in " + f"{self.model.timer.latest['concurrency'] / 1e9:.2f}" + " s" if 'concurrency' in self.model.timer.latest else ""
+        self.concurrencyDialog.set_profile(profile, plugins, summary)
+    
+    def _save(self):
+        """ Asks what to save and where, then streams it to a Chrome or
+            Perfetto trace in the background. """
+        if self.store is None:
+            return
+        if self.viewRange is not None:
+            viewRange = self.viewRange
+        elif self.overview:
+            viewRange = (self.extent.minStart, self.extent.maxStop + 1)
+        else:
+            viewRange = (self.currentPage * self.pageSz, (self.currentPage + 1) * self.pageSz)
+        dialog = VisualizerGUISaveDialog(viewRange, self.pluginOrder[self.pluginName])
+        if not dialog.exec_():
+            return
+        fmt = dialog.get_format()
+        path, _ = QFileDialog.getSaveFileName(self.view, "Save Trace", QtCore.QDir.currentPath(), TraceExporter.formats[fmt])
+        if not path:
+            return
+        a, b = dialog.get_range()
+        self.view.show_progress(-1, "Saving " + path)
+        self.worker.requestExport.emit(self.store, path, fmt, a, b, dialog.get_plugins())
+    
+    def _saved(self, error : str, message : str):
+        """ Reports a finished, cancelled or failed save. """
+        self.view.hide_progress()
+        if not error:
+            self.view.statusBar().showMessage(message)
+            return
+        error_msg = QMessageBox()
+        error_msg.setIcon(QMessageBox.Critical)
+        error_msg.setText(error)
+        error_msg.setWindowTitle("Cannot Save Trace")
+        error_msg.setStandardButtons(QMessageBox.Ok)
+        error_msg.exec_()
+    
+    def _show_find(self):
+        """ Finds intervals by duration or iteration number, jumping to
+            those chosen. """
+        if self.store is None:
+            return
+        self.findDialog = VisualizerGUIFindDialog(self.pluginOrder[self.pluginName])
+        self.findDialog.findSignal.connect(
+            lambda query, plugin, value: self.worker.requestFind.emit(self.store, query, plugin, value))
+        self.findDialog.jumpSignal.connect(self._jump)
+        self.findDialog.exec_()
+        self.findDialog = None
+    
+    def _found(self, store, rows, total : int, error : str):
+        """ Lists intervals found by the worker, if still wanted, or why
+            the query was invalid. """
+        if store is not self.store or self.findDialog is None:
+            return
+        if error:
+            self.findDialog.set_rows([], error)
+            return
+        summary = (f"{total:,}" + " intervals found in " + f"{self.model.timer.latest['find'] / 1e6:.1f}" + " ms" +
+            ("; the first " + f"{len(rows):,}" + " are listed" if len(rows) < total else "") + ". Double-click one to show it.")
+        self.findDialog.set_rows(rows, summary)
+    
+    def _jump(self, start, stop):
+        """ Shows the interval [start, stop) with as much again either
+            side of it, and at least 50 us, abandoning the render in
+            progress. """
+        pad = max(stop - start, 50000)
+        self.viewRange = (start - pad, stop + pad)
+        self.currentPage = min(max((start + stop) // 2 // self.pageSz, 0), self.totalPages)
+        if self.follow and self.store.tail is not None:
+            self.view.set_follow(False)
+        if self.inFlight is not None:
+            self.worker.supersede(self.inFlight)
+        self._create_fig()
+    
+    def _show_differences(self):
+        """ Shows how each plugin's durations and periods change from the
+            first run compared in each of the others. """
+        if not isinstance(self.store, CompareStore):
+            return
+        self.differencesDialog = VisualizerGUIDifferencesDialog()
+        self.worker.requestStatistics.emit(self.store, None, None)
+        self.differencesDialog.exec_()
+        self.differencesDialog = None
+    
+    def _show_performance(self):
+        """ Shows the latency of each stage timed so far. """
+        timer = self.model.timer
+        dialog = VisualizerGUIPerformanceDialog(timer.summary())
+        dialog.saveTraceSignal.connect(self._save_trace)
+        dialog.resetSignal.connect(lambda: (timer.reset(), dialog.set_stats(timer.summary())))
+        dialog.exec_()
+    
+    def _save_trace(self, path : str):
+        """ Writes the latest timed spans to path as a Chrome trace. """
+        try:
+            self.model.timer.save_chrome_trace(path)
+        except OSError as e:
             error_msg = QMessageBox()
             error_msg.setIcon(QMessageBox.Critical)
-            msg = ("Please load a database with " + contents + ". Must have a '" +
-                tableName + "' table with attributes " + attribs + "."
-            )
-            error_msg.setText(msg)
-            error_msg.setWindowTitle("Malformed Database")
+            error_msg.setText(str(e))
+            error_msg.setWindowTitle("Cannot Save Trace")
             error_msg.setStandardButtons(QMessageBox.Ok)
             error_msg.exec_()
-        connection.close()
-        return df
     
-    def _create_fig(self):
-        """ Generates figure for display.
-            Utilizes plot settings stored in Controller. """
-        # Calculate subset of data to display based on plot settings
-        # Always acquire settingsLock before dfLock
-        # Range of ns to include:
-        # [currentPage * pageSz, currentPage * pageSz + pageSz)
-        pageStart  = self.currentPage * self.pageSz
-        pageEnd    = self.currentPage * self.pageSz + self.pageSz
-        maxEndTime = (self.dataDF[self.endTime]).max()
-        self.totalPages = ceil((maxEndTime - self.pageSz) / self.pageSz)
-            
-        subDF = self.dataDF[(self.dataDF[self.startTime] >= pageStart) & (self.dataDF[self.startTime] < pageEnd) |
-                            (self.dataDF[self.endTime] >= pageStart) & (self.dataDF[self.endTime] < pageEnd)]
-        
-        # Suppress warning
-        warnings.simplefilter('ignore', SettingWithCopyWarning)
-            
-        # if any rows have an endTime > pageEnd, replace with endTime
-        subDF.loc[subDF[self.endTime] > pageEnd, self.endTime] = pageEnd
-        
-        # if any rows have a startTime < pageStart, replace with startTime
-        subDF.loc[subDF[self.startTime] < pageStart, self.startTime] = pageStart
-            
-        # Specify order of plot, dependent on plugins that are in this page
-        pluginSubset = subDF[self.pluginName].unique().tolist()
-        pluginSubsetOrdered = [plugin for plugin in self.pluginOrder[self.pluginName] if plugin in pluginSubset]
-        plotOrder = {self.pluginName : pluginSubsetOrdered}
+    def _set_profiling(self, profiling : bool):
+        """ Starts capturing a profile of loading and rendering, or stops
+            and saves it. """
+        if profiling:
+            self.model.timer.start_profile()
+            return
+        path, _ = QFileDialog.getSaveFileName(self.view, "Save Profile", QtCore.QDir.currentPath(), "Profiles (*.prof)")
+        self.worker.requestSaveProfile.emit(path)
+    
+    def _prefetch(self):
+        """ While idle, renders the pages adjacent to the current page,
+            or the views a view's width either side of the one zoomed
+            or panned to, into the cache, one at a time. """
+        if self.renderBusy or self.pendingRequest is not None or self.store is None:
+            return
+        if self.viewRange is not None:
+            start, end = self.viewRange
+            requests = [self._page_request(None, True, (start + shift, end + shift)) for shift in (end - start, start - end)]
+        elif self.overview:
+            return
+        else:
+            requests = [self._page_request(page, True) for page in (self.currentPage + 1, self.currentPage - 1)
+                if 0 <= page <= self.totalPages]
+        for request in requests:
+            if self._cache_key(request) not in self.pageCache:
+                self._dispatch(request)
+                return
+    
+    def _poll(self):
+        """ Asks the worker for the rows newly written to a live capture,
+            one poll at a time. """
+        if self.pollBusy or self.store is None or self.store.tail is None:
+            return
+        self.pollBusy = True
+        self.worker.requestPoll.emit(self.store)
+    
+    def _polled(self, store, extent, firstStart):
+        """ Shows the rows a poll added: the last page is followed, or the
+            shown page is redrawn if they fall on it. Pages are redrawn
+            no faster than they render. """
+        self.pollBusy = False
+        if store is not self.store:
+            return
+        self.extent = extent
+        if firstStart is not None:
+            # Plugins first seen in this poll go after those already listed
+            order = self.pluginOrder[self.pluginName]
+            added = [plugin for plugin in self.extent.pluginOrder if plugin not in order]
+            if added:
+                self.pluginOrder[self.pluginName] = order + added
+                self.view.add_plugins(added)
             
-        if subDF.empty:
-            self.view.set_display(text='No data on this page.')
-            self.view.change_pagenum(str(self.currentPage) + ' / ' + str(self.totalPages))
-            return
-        
-        # Generate figure for display
-        fig = px.timeline(subDF, 
-            x_start = self.startTime,
-            x_end = self.endTime, 
-            y = self.pluginName, 
-            color = self.pluginName, 
-            labels = {self.pluginName: 'Plugin Name', self.startTime: 'Start Time (ns)', self.endTime: 'End Time (ns)'},
-            category_orders = plotOrder
-        ) 
-        fig.layout.xaxis.type = 'linear'
-        fig.layout.xaxis.title = 'Time (ns)'
-        fig.layout.yaxis.title = None
-        fig.layout.yaxis.showticklabels = False
-        
-        # Send figure to View
-        self.view.set_display(figure=fig)
-        self.view.change_pagenum(str(self.currentPage) + ' / ' + str(self.totalPages))
-        
+            # Pages from the earliest new start on have changed
+            firstPage = firstStart // self.pageSz
+            self.pageCache.discard(lambda key: key[0] is None or key[0] >= firstPage)
+            self.totalPages = self.extent.page_count(self.pageSz) - 1
+            if self.follow and not self.overview:
+                self.liveStale = self.liveStale or self.currentPage != self.totalPages or self.currentPage >= firstPage
+                self.currentPage = self.totalPages
+            elif self.overview or self.currentPage >= firstPage:
+                self.liveStale = True
+            elif not self.overview:
+                self.view.change_pagenum(self._page_label())
+        if self.liveStale and not self.renderBusy:
+            self.liveStale = False
+            self._create_fig()
+    
+    def _set_follow(self, follow : bool):
+        """ Follows the last page of a live capture, or keeps the shown
+            page pinned. """
+        self.follow = follow
+        if follow and self.store is not None and self.store.tail is not None and not self.overview:
+            self.viewRange = None
+            self.currentPage = self.totalPages
+            self._create_fig()
+    
     def _page_left(self):
-        """ Pages left, updating current settings and figure. """
-        if self.currentPage > 0:
+        """ Pages left, updating current settings and figure. Paging away
+            from the end of a live capture pins the shown page. """
+        if not self.overview and self.currentPage > 0:
+            self.viewRange = None
             self.currentPage -= 1
+            if self.follow and self.store.tail is not None:
+                self.view.set_follow(False)
             self._create_fig()
-        
+    
     def _page_right(self):
         """ Pages right, updating current settings and figure. """
-        if self.currentPage < self.totalPages:
+        if not self.overview and self.currentPage < self.totalPages:
+            self.viewRange = None
             self.currentPage += 1
             self._create_fig()
-            
+    
     def _reorder_fig(self):
         """ Reorders the figure based on the ordering in
             the left Plugins list. """
         newPluginOrder = self.view.get_plugin_list()
         self.pluginOrder[self.pluginName] = newPluginOrder
         self._create_fig()
+    
+    def _set_overview(self, overview : bool):
+        """ Switches between the whole trace overview and paging. """
+        self.overview = overview
+        self.viewRange = None
+        if self.store is not None:
+            self._create_fig()
+    
+    def _view_reported(self, viewRange):
+        """ Receives the range the display was zoomed or panned to, or
+            None once reset, drawing it when the display settles. """
+        self.reportedView = viewRange
+        self.viewTimer.start()
+    
+    def _change_view(self):
+        """ Draws the range last zoomed or panned to. A range within a
+            figure drawn one interval at a time is already drawn in full;
+            any other is requested afresh, at the resolution its number
+            of intervals allows, abandoning the render in progress.
+            Resetting the axis returns to the page or overview. """
+        if self.store is None:
+            return
+        if self.reportedView is None:
+            if self.viewRange is not None:
+                self.viewRange = None
+                self._create_fig()
+            return
+        start, end = floor(self.reportedView[0]), ceil(self.reportedView[1])
+        if end <= start or (start, end) == self.viewRange:
+            return
+        self.viewRange = (start, end)
+        self.currentPage = min(max((start + end) // 2 // self.pageSz, 0), self.totalPages)
+        if self.follow and self.store.tail is not None:
+            self.view.set_follow(False) # Pins the view, as paging left does
+        if self.exactRange is not None and self.exactRange[0] <= start and end <= self.exactRange[1]:
+            self.view.change_pagenum(self._page_label())
+            return
+        if self.inFlight is not None:
+            self.worker.supersede(self.inFlight)
+        self._create_fig()
+    
+    def _set_concurrency_lane(self, shown : bool):
+        """ Shows or hides the running concurrency under the plugins. """
+        self.concurrencyLane = shown
+        if self.store is not None:
+            self._create_fig()
 
-# This overwrite method was obtained from:
-# https://stackoverflow.com/questions/66078893/plotly-express-timeline-for-gantt-chart-with-integer-xaxis
-def integer_process_dataframe_timeline(args):
-    """
-    Overwrite conversion to datetime input for px.timeline()
-    """
-    # print("Processing x-axis data as an integer rather than a datetime")
-    args["is_timeline"] = True
-    if args["x_start"] is None or args["x_end"] is None:
-        raise ValueError("Both x_start and x_end are required")
-    
-    x_start = args["data_frame"][args["x_start"]]
-    x_end = args["data_frame"][args["x_end"]]
-    
-    # No columns added to the dataframe, no risk of overwrite
-    args["data_frame"][args["x_end"]] = (x_end - x_start)
-    args["x"] = args["x_end"]
-    del args["x_end"]
-    args["base"] = args["x_start"]
-    del args["x_start"]
-    return args
+def warm_up():
+    """ Imports plotly, builds a figure of each kind of trace drawn and
+        reads plotly.js for the display, so that the first figure does
+        not wait for them. """
+    import plotly.graph_objs as go
+    figure_to_payload(go.Figure([go.Scattergl(x=[0], y=[0]), go.Heatmap(z=[[0]])]))
+    VisualizerSchemeHandler.asset('/plotly.min.js')
 
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['export']:
+        from illixr_cli import export_main
+        sys.exit(export_main(sys.argv[2:]))
+    register_url_scheme()
+    # QtWebEngineWidgets is imported once the window is shown
+    QApplication.setAttribute(QtCore.Qt.AA_ShareOpenGLContexts)
     illixr_visualizer = QApplication(sys.argv)
     view = VisualizerGUI()
     view.show()
     controller = VisualizerController(view)
     sys.exit(illixr_visualizer.exec_())
-    
-    
+
+
@@ -12,20 +12,28 @@ import plotly.express as px #<-- must come after pandas
 
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5 import QtCore, QtWidgets
+import os
 import sys
+import tempfile
  
  
 def show_qt(fig): # <-- treated as another button
-    raw_html = '<html><head><meta charset="utf-8" />'
-    raw_html += '<script src="https://cdn.plot.ly/plotly-latest.min.js"></script></head>'
-    raw_html += '<body>'
-    raw_html += po.plot(fig, include_plotlyjs=False, output_type='div') # 'div'for embedding graphs in an HTML file with other graphs or HTML markup
-    raw_html += '</body></html>'
+    # setHtml has a 2MB size limit, so write the figure to a tmp file with
+    # plotly.js inlined from the local package (no CDN fetch) and load that.
+    tmp = tempfile.NamedTemporaryFile(suffix='.html', delete=False)
+    tmp.close()
+    po.plot(fig, filename=tmp.name, include_plotlyjs=True, auto_open=False)
  
     fig_view = QWebEngineView()
-    # setHtml has a 2MB size limit, need to switch to setUrl on tmp file
-    # for large figures.
-    fig_view.setHtml(raw_html)
+    fig_view.load(QtCore.QUrl.fromLocalFile(tmp.name))
+    # The file holds all of plotly.js; delete it along with the view, or
+    # on exit if the view outlives the event loop
+    def remove_tmp():
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+    fig_view.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+    fig_view.destroyed.connect(remove_tmp)
+    QtWidgets.QApplication.instance().aboutToQuit.connect(remove_tmp)
     fig_view.show() # <-- only show in window
     fig_view.raise_()
     return fig_view
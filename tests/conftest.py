@@ -0,0 +1,17 @@
+# Filename: conftest.py
+""" Makes ILLIXR Visualizer's modules importable from the tests, which
+    run from any directory with python -m pytest, and seeds the random
+    traces of the tests that take rng. """
+
+import numpy as np
+import os
+import pytest
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(params=range(6))
+def rng(request):
+    """ A random generator, one run of the test per seed. """
+    return np.random.default_rng(request.param)
@@ -0,0 +1,147 @@
+# Filename: synthetic.py
+""" Small generated traces, and brute-force answers over them that the
+    tests check ILLIXR Visualizer's data structures against. """
+
+import numpy as np
+import os
+import sqlite3
+
+from illixr_store import LazyTraceStore
+
+WALL_TIME = 10**12 # Wall clock time of CPU time 0 in written captures
+
+
+def random_intervals(rng, n : int, span=10000, first=0):
+    """ n intervals sorted by start: mostly short, some empty or inverted,
+        and a few long enough to overlap many others. """
+    starts = np.sort(rng.integers(first, first + span, n)).astype(np.int64)
+    durations = rng.integers(0, 50, n)
+    durations[rng.random(n) < 0.1] = 0
+    durations[rng.random(n) < 0.05] = -rng.integers(1, 10)
+    durations[rng.random(n) < 0.05] = rng.integers(span // 10, span // 2 + 1)
+    return starts, starts + durations
+
+
+def random_ranges(rng, span : int, count=100):
+    """ [a, b) query ranges over a trace of span ns, some empty and some
+        beyond the trace. """
+    firsts = rng.integers(-span // 10, span + span // 10, count)
+    return [(int(a), int(a + width)) for a, width in zip(firsts, rng.integers(0, span // 4, count))]
+
+
+def overlapping(starts, stops, a : int, b : int):
+    """ Positions of the intervals overlapping [a, b), by linear scan. """
+    return np.flatnonzero((np.asarray(starts) < b) & (np.asarray(stops) >= a))
+
+
+def occupancy(codes, starts, stops, nCodes : int, edges):
+    """ Busy time and intervals started of each plugin in each bin between
+        edges, summed interval by interval. Inverted intervals are empty. """
+    busy = np.zeros((nCodes, len(edges) - 1))
+    counts = np.zeros((nCodes, len(edges) - 1), dtype=np.int64)
+    for code, start, stop in zip(np.asarray(codes).tolist(), np.asarray(starts).tolist(), np.asarray(stops).tolist()):
+        stop = max(stop, start)
+        for i, (a, b) in enumerate(zip(edges[:-1].tolist(), edges[1:].tolist())):
+            busy[code, i] += max(min(stop, b) - max(start, a), 0)
+            counts[code, i] += a <= start < b
+    return busy, counts
+
+
+def write_table(path : str, table : str, columns : dict, rowids=None):
+    """ Writes columns, a dict of column name to values, as table of the
+        SQLite database at path, with the given rowids if any. Rows are
+        appended if the table exists. """
+    names = list(columns)
+    rows = zip(*(np.asarray(values).tolist() for values in columns.values()))
+    if rowids is not None:
+        names = ['rowid'] + names
+        rows = ((rowid,) + row for rowid, row in zip(np.asarray(rowids).tolist(), rows))
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE IF NOT EXISTS " + table + " (" + ", ".join(columns) + ")")
+        connection.executemany("INSERT INTO " + table + " (" + ", ".join(names) + ") VALUES (" +
+            ", ".join('?' * len(names)) + ")", rows)
+    connection.close()
+
+
+def random_tables(rng, pluginIds, rows : int, sources=(0, 1), span=10000, first=0):
+    """ (source, pluginIds, starts, stops, skips, iterations) tables of
+        each source, of up to rows rows starting from first, in close to
+        start order as ILLIXR logs them. Only the tables of odd sources,
+        like threadloop iterations, have skips. Iteration numbers repeat,
+        as each plugin numbers its own. """
+    tables = []
+    for source in sources:
+        n = int(rng.integers(0, rows))
+        starts = np.maximum(np.sort(rng.integers(first, first + span, n)) + rng.integers(-20, 20, n), first) # Slightly out of order
+        skips = np.where(rng.random(n) < 0.2, rng.integers(1, 4, n), 0) if source % 2 else None
+        tables.append((source, rng.choice(pluginIds, n).astype(np.int64), starts.astype(np.int64),
+            (starts + rng.integers(0, 200, n)).astype(np.int64), skips, rng.integers(0, 20, n)))
+    return tables
+
+
+def table_rows(tables):
+    """ Every row of the tables as (pluginId, start, stop, source), in
+        stable start order. """
+    rows = [(int(pluginId), int(start), int(stop), source) for source, ids, starts, stops, _, _ in tables
+        for pluginId, start, stop in zip(ids, starts, stops)]
+    return sorted(rows, key=lambda row: row[1])
+
+
+def store_rows(store):
+    """ Every row of a store, as table_rows lists them, in store order. """
+    return list(zip(store.pluginIds[store.codes].tolist(), store.starts.tolist(), store.stops.tolist(),
+        store.sources.tolist()))
+
+
+def write_databases(directory, tables, names : dict):
+    """ Writes a plugin_name database of names, a dict of plugin ID to
+        name, and a data database with tables as tables source0, source1,
+        ... of columns plugin_id, start, stop and, if they have them, skips
+        and iteration_no. Returns their paths. """
+    namePath, dataPath = str(directory / 'plugin_name.sqlite'), str(directory / 'data.sqlite')
+    write_table(namePath, 'plugin_name', {'plugin_id': list(names), 'plugin_name': list(names.values())})
+    for source, ids, starts, stops, skips, iterations in tables:
+        columns = {'plugin_id': ids, 'start': starts, 'stop': stops}
+        if skips is not None:
+            columns['skips'] = skips
+        if iterations is not None:
+            columns['iteration_no'] = iterations
+        write_table(dataPath, 'source' + str(source), columns)
+    return namePath, dataPath
+
+
+
+def lazy_store(directory, tables, names : dict, rebase=False):
+    """ A LazyTraceStore of tables, built from the databases
+        write_databases writes in directory. """
+    namePath, dataPath = write_databases(directory, tables, names)
+    path = str(directory / 'lazy.sqlite')
+    LazyTraceStore.build(path, namePath, ('plugin_name', 'plugin_id', 'plugin_name'),
+        [(source, dataPath, 'source' + str(source), 't.plugin_id', 't.start', 't.stop', 't.skips' if skips is not None else '0',
+            't.iteration_no' if iterations is not None else '-1') for source, _, _, _, skips, iterations in tables], rebase)
+    return LazyTraceStore.open(path)
+
+def write_capture(directory, tables, names : dict, vsyncs=None):
+    """ Writes a plugin_name database of names, a dict of plugin ID to
+        name, and switchboard and threadloop databases of the tables of
+        sources 0 and 1 as ILLIXR logs them, timed by the CPU clock and by
+        a wall clock WALL_TIME ns ahead of it. vsyncs, if given, are
+        written as the wall clock times of an mtp_record database.
+        Writing to existing databases appends the tables' rows. Returns
+        the name database's path and the data databases' paths by source. """
+    namePath = str(directory / 'plugin_name.sqlite')
+    if not os.path.exists(namePath):
+        write_table(namePath, 'plugin_name', {'plugin_id': list(names), 'plugin_name': list(names.values())})
+    dataPaths = {}
+    for (source, ids, starts, stops, skips, iterations), (name, table) in zip(tables,
+            (('switchboard', 'switchboard_callback'), ('threadloop', 'threadloop_iteration'))):
+        dataPaths[name] = str(directory / (table + '.sqlite'))
+        columns = {'plugin_id': ids, 'cpu_time_start': starts, 'cpu_time_stop': stops,
+            'wall_time_start': starts + WALL_TIME, 'wall_time_stop': stops + WALL_TIME, 'iteration_no': iterations}
+        if skips is not None:
+            columns['skips'] = skips
+        write_table(dataPaths[name], table, columns)
+    if vsyncs is not None:
+        dataPaths['mtp_record'] = str(directory / 'mtp_record.sqlite')
+        write_table(dataPaths['mtp_record'], 'mtp_record', {'vsync': vsyncs, 'iteration_no': np.arange(len(vsyncs))})
+    return namePath, dataPaths
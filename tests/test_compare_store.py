@@ -0,0 +1,172 @@
+# Filename: test_compare_store.py
+""" Tests of the CompareStore's alignment, windows and statistics, and of
+    the differences between its runs, against the runs' own rows. """
+
+import numpy as np
+import pytest
+
+from illixr_model import PageRequest, VisualizerModel
+from illixr_store import CompareStore, MalformedDatabaseError, TraceStore
+from synthetic import random_ranges, random_tables, WALL_TIME, write_capture
+
+NAMES = {1: 'one', 2: 'two', 3: 'three'}
+
+
+def random_run(rng, first : int):
+    """ Tables and vsyncs of a run whose intervals start from first. """
+    tables = random_tables(rng, [1, 2, 3], 80, first=first)
+    vsyncs = np.sort(rng.integers(first + 500, first + 10000, 20)) + WALL_TIME
+    return tables, vsyncs
+
+
+def lane_rows(store, a, b):
+    """ The rows of a store's window [a, b), by lane name, sorted. """
+    window = store.window(a, b)
+    return sorted(zip(store.names[window.codes].tolist(), window.starts.tolist(), window.stops.tolist(),
+        window.sources.tolist()))
+
+
+def aligned_rows(runs, labels, offsets, a, b):
+    """ The rows of each run's window [a, b) after shifting it back by the
+        run's offset, named for their run, sorted. """
+    rows = []
+    for run, label, offset in zip(runs, labels, offsets):
+        rows += [(name + " [" + label + "]", start - offset, stop - offset, source)
+            for name, start, stop, source in lane_rows(run, a + offset, b + offset)]
+    return sorted(rows)
+
+
+@pytest.fixture(scope='module')
+def captures(tmp_path_factory):
+    """ Two runs' databases, starting at different times, and their
+        tables and vsyncs. A shared cache keeps each run's sidecar. """
+    rng = np.random.default_rng(0)
+    runs = []
+    for label, first in (('a', 0), ('b', 3000)):
+        directory = tmp_path_factory.mktemp(label)
+        tables, vsyncs = random_run(rng, first)
+        namePath, dataPaths = write_capture(directory, tables, NAMES, vsyncs)
+        runs.append(((label, namePath, dataPaths), tables, vsyncs))
+    return runs, str(tmp_path_factory.mktemp('cache'))
+
+
+def expected_anchor(tables, vsyncs, align):
+    """ The wall clock time, rebased, that a run is aligned on. """
+    origin = min([int(starts.min()) + WALL_TIME for _, _, starts, _, _, _ in tables if len(starts)] + [int(vsyncs.min())])
+    if align is None:
+        return 0
+    if align == 'vsync':
+        return int(vsyncs.min()) - origin
+    pluginId = next(pluginId for pluginId, name in NAMES.items() if name == align)
+    return min(int(starts[ids == pluginId].min()) for _, ids, starts, _, _, _ in tables if (ids == pluginId).any()) \
+        + WALL_TIME - origin
+
+
+@pytest.mark.parametrize('align', [None, 'vsync', 'two'])
+def test_runs_aligned(captures, align):
+    runs, cacheRoot = captures
+    model = VisualizerModel()
+    model.timeBase = 'wall'
+    model.cacheRoot = cacheRoot
+    store, _ = model.load_runs([run for run, _, _ in runs], align)
+    anchors = [expected_anchor(tables, vsyncs, align) for _, tables, vsyncs in runs]
+    assert store.offsets == [anchor - store.anchor for anchor in anchors]
+    assert store.anchor == max(anchor - run.index.minStart for run, anchor in zip(store.runs, anchors))
+    assert store.index.minStart == 0 # No aligned time is negative
+    for a, b in [(0, store.index.maxStop + 1), (store.anchor, store.anchor + 500)]:
+        assert lane_rows(store, a, b) == aligned_rows(store.runs, store.labels, store.offsets, a, b)
+
+
+def test_vsync_needs_wall_time(captures):
+    runs, cacheRoot = captures
+    model = VisualizerModel()
+    model.cacheRoot = cacheRoot
+    with pytest.raises(MalformedDatabaseError, match='vsync'):
+        model.load_runs([run for run, _, _ in runs], 'vsync') # vsyncs are only logged in wall clock time
+
+
+@pytest.fixture
+def compared(rng):
+    """ A CompareStore of two or three random runs, aligned on random
+        anchors, and its runs. """
+    runs = [TraceStore.from_tables(np.array(list(NAMES)), list(NAMES.values()), random_run(rng, first)[0])
+        for first in rng.integers(0, 5000, int(rng.integers(2, 4))).tolist()]
+    runs = [run for run in runs if len(run)]
+    labels = [str(number) for number in range(len(runs))]
+    anchors = [int(rng.integers(run.index.minStart, run.index.maxStop + 1)) for run in runs]
+    return CompareStore(labels, runs, anchors, interleave=bool(rng.integers(2))), runs
+
+
+def test_windows_match_runs(rng, compared):
+    store, runs = compared
+    assert len(store) == sum(len(run) for run in runs)
+    for a, b in random_ranges(rng, store.index.maxStop + 1, 30):
+        assert lane_rows(store, a, b) == aligned_rows(runs, store.labels, store.offsets, a, b)
+        assert store.index.estimate(a, b) >= len(store.window(a, b).codes)
+
+
+def test_plugin_order(compared):
+    store, runs = compared
+    lanes = [(name, label) for label, run in zip(store.labels, runs) for name in run.plugin_order()]
+    plugins = list(dict.fromkeys(name for name, _ in lanes))
+    if store.interleave:
+        expected = [name + " [" + label + "]" for name in plugins for label in store.labels if (name, label) in lanes]
+    else:
+        expected = [name + " [" + label + "]" for label in store.labels for name in plugins if (name, label) in lanes]
+    assert store.plugin_order() == expected
+    # A plugin's lanes share its color, stride codes apart
+    for name in plugins:
+        codes = [code for code, lane in enumerate(store.names) if lane.startswith(name + " [")]
+        assert len({code % store.stride for code in codes}) == 1
+
+
+def test_statistics_and_differences(compared):
+    store, runs = compared
+    model = VisualizerModel()
+    stats = model.statistics(store)
+    runStats = [model.statistics(run) for run in runs]
+    for number, (run, single, codeMap) in enumerate(zip(runs, runStats, store.codeMaps)):
+        for code in range(len(run.names)):
+            for name in ('counts', 'totals', 'maxima', 'skips', 'periodCounts'):
+                assert getattr(stats, name)[codeMap[code]] == getattr(single, name)[code]
+            assert stats.periodMeans[codeMap[code]] == pytest.approx(single.periodMeans[code])
+    
+    rows = model.run_differences(store, stats)
+    assert [(name, label) for name, label, *_ in rows] == [(name, label) for name in store.plugins
+        for label, run in zip(store.labels, runs) if name in run.plugin_order()]
+    first = runs[0]
+    for name, label, count, mean, meanChange, p99, p99Change, period, periodChange in rows:
+        run, single = runs[store.labels.index(label)], runStats[store.labels.index(label)]
+        code = list(run.names).index(name)
+        assert count == single.counts[code]
+        assert mean == pytest.approx(single.totals[code] / count / 1e6)
+        assert p99 == pytest.approx(single.percentile(99)[code] / 1e6)
+        firstCode = list(first.names).index(name)
+        if runStats[0].counts[firstCode]:
+            firstMean = runStats[0].totals[firstCode] / runStats[0].counts[firstCode] / 1e6
+            assert meanChange == pytest.approx((mean / firstMean - 1) * 100, nan_ok=True)
+        else:
+            assert np.isnan(meanChange)
+        if single.periodCounts[code]:
+            assert period == pytest.approx(single.periodMeans[code] / 1e6)
+        else:
+            assert np.isnan(period) and np.isnan(periodChange)
+
+
+def test_views_with_concurrency_lane(rng, compared):
+    """ Runs share no CPU, so a view asking for the concurrency lane is
+        drawn without it. """
+    store, _ = compared
+    model = VisualizerModel()
+    assert model.concurrency(store) is None
+    figs = [model.create_fig(PageRequest(None, 1000, store.plugin_order(), 'cpu', store, False, True, span))
+        for span in random_ranges(rng, store.index.maxStop + 1, 10)]
+    figs = [fig for fig in figs if fig is not None]
+    assert figs and all('yaxis2' not in fig.to_plotly_json()['layout'] for fig in figs)
+
+
+def test_anchor_of_missing_lane():
+    store = TraceStore.from_tables(np.array([1]), ['one'], [(0, np.array([1]), np.array([5]), np.array([9]), None, None)])
+    assert CompareStore.anchor_of(store) == 5
+    assert CompareStore.anchor_of(store, 'one') == 5
+    assert CompareStore.anchor_of(store, 'vsync') is None
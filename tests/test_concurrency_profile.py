@@ -0,0 +1,120 @@
+# Filename: test_concurrency_profile.py
+""" Tests of the ConcurrencyProfile's sweep against counting the running
+    intervals at every ns of small random traces. """
+
+import numpy as np
+import pytest
+
+from illixr_store import ConcurrencyProfile, TraceStore
+from synthetic import random_tables
+
+SPAN = 2000 # ns covered by the random traces
+
+
+def random_store(rng, rows : int):
+    """ A store of CPU intervals of three plugins, some empty, and GPU
+        intervals, which the profile leaves out. """
+    tables = random_tables(rng, [1, 2, 3], rows, span=SPAN) + random_tables(rng, [-3], rows, sources=(2,), span=SPAN)
+    return TraceStore.from_tables(np.array([1, 2, 3]), ['a', 'b', 'c'], tables)
+
+
+def running(store):
+    """ (ns, code) matrix of how many of each plugin's CPU intervals run
+        at each ns from 0. """
+    grid = np.zeros((SPAN + 300, len(store.names)), dtype=np.int64)
+    for row in np.flatnonzero(store.sources != 2).tolist():
+        grid[store.starts[row]:store.stops[row], store.codes[row]] += 1
+    return grid
+
+
+def level_at(profile, times):
+    """ The profile's step function at each of times. """
+    steps = np.searchsorted(profile.times, times, side='right') - 1
+    return np.where(steps >= 0, np.asarray(profile.levels)[np.maximum(steps, 0)], 0)
+
+
+@pytest.fixture
+def swept(rng):
+    """ A random store, its profile swept in random chunks of events, and
+        the concurrency at every ns. """
+    store = random_store(rng, int(rng.integers(1, 120)))
+    capacity = 2 * len(store) + 1
+    profile = ConcurrencyProfile.build(store.events(int(rng.integers(1, 40))), len(store.names), capacity, maxBins=16)
+    return store, profile, running(store)
+
+
+def test_sweep_matches_counts(swept):
+    store, profile, grid = swept
+    concurrency = grid.sum(axis=1)
+    np.testing.assert_array_equal(level_at(profile, np.arange(len(grid))), concurrency)
+    assert np.all(np.diff(profile.times) > 0)
+    
+    # Time at each level counts between the first and last events
+    cpu = (store.sources != 2) & (store.stops > store.starts)
+    swept = concurrency[int(store.starts[cpu].min()):int(store.stops[cpu].max())] if cpu.any() else []
+    levelTimes = np.bincount(swept, minlength=len(profile.levelTimes))
+    np.testing.assert_allclose(profile.levelTimes, levelTimes[:len(profile.levelTimes)])
+    assert not levelTimes[len(profile.levelTimes):].any()
+    np.testing.assert_allclose(profile.time_at_least(), np.cumsum(profile.levelTimes[::-1])[::-1])
+    active = (grid > 0).astype(np.float64)
+    np.testing.assert_allclose(profile.overlaps, active.T @ active)
+
+
+def test_bins_match_counts(swept):
+    _, profile, grid = swept
+    concurrency = grid.sum(axis=1)
+    for level, (peaks, integrals) in enumerate(profile.binLevels):
+        width = profile.width << level
+        for i, (peak, integral) in enumerate(zip(peaks.tolist(), integrals.tolist())):
+            first = profile.origin + i * width
+            assert peak == concurrency[first:first + width].max(initial=0)
+            assert integral == concurrency[first:first + width].sum()
+
+
+def test_windows(rng, swept):
+    _, profile, grid = swept
+    concurrency = np.append(grid.sum(axis=1), [0] * 1000)
+    for a in rng.integers(0, SPAN, 20).tolist():
+        b = a + int(rng.integers(1, 500))
+        # Exact steps: each ns of [a, b) at the level of the step before it
+        steps = profile.window(a, b, 10**6)
+        assert steps.means is None and steps.times[-1] == b
+        drawn = [steps.peaks[i] if i >= 0 else 0 for i in (np.searchsorted(steps.times[:-1], np.arange(a, b), side='right') - 1).tolist()]
+        assert drawn == concurrency[a:b].tolist()
+        
+        # Bins: each bin's peak and mean over the ns it covers
+        bins = profile.window(a, b, 2)
+        if bins.means is None:
+            continue
+        for first, last, peak, mean in zip(bins.times[:-1].tolist(), bins.times[1:].tolist(), bins.peaks.tolist(), bins.means.tolist()):
+            assert peak == concurrency[first:last].max()
+            assert mean == pytest.approx(concurrency[first:last].mean())
+
+
+def test_save_and_open(swept, tmp_path):
+    store, profile, _ = swept
+    directory = str(tmp_path / 'concurrency')
+    saved = ConcurrencyProfile.build(store.events(7), len(store.names), 2 * len(store) + 1, directory, maxBins=16)
+    opened = ConcurrencyProfile.open(directory)
+    for other in (saved, opened):
+        np.testing.assert_array_equal(other.times, profile.times)
+        np.testing.assert_array_equal(other.levels, profile.levels)
+        np.testing.assert_array_equal(other.overlaps, profile.overlaps)
+        assert other.binLevels[-1][0].tolist() == profile.binLevels[-1][0].tolist()
+    assert ConcurrencyProfile.open(str(tmp_path / 'missing')) is None
+
+
+def test_empty_and_zero_length():
+    empty = np.empty(0, dtype=np.int64)
+    for tables in ([(0, empty, empty, empty, None, None)], [(0, np.array([1, 1]), np.array([5, 9]), np.array([5, 9]), None, None)]):
+        store = TraceStore.from_tables(np.array([1]), ['a'], tables)
+        profile = store.concurrency_profile()
+        assert len(profile.times) == 0 and profile.overlaps.sum() == 0
+        assert profile.window(0, 100, 10).times.tolist() == [100]
+
+
+def test_single_interval():
+    store = TraceStore.from_tables(np.array([1]), ['a'], [(0, np.array([1]), np.array([10]), np.array([30]), None, None)])
+    profile = store.concurrency_profile()
+    assert profile.times.tolist() == [10, 30] and profile.levels.tolist() == [1, 0]
+    assert profile.levelTimes.tolist() == [0, 20] and profile.overlaps.tolist() == [[20]]
@@ -0,0 +1,62 @@
+# Filename: test_export.py
+""" Tests of the headless export command on small random databases. """
+
+import json
+import numpy as np
+import os
+import pytest
+
+from illixr_cli import export_main
+from synthetic import random_tables, table_rows, write_capture
+
+PAGE_SZ = 1000
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """ Paths of a plugin name database and switchboard and threadloop
+        databases of random intervals, and the intervals' rows. Sidecars
+        are cached under tmp_path. """
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    tables = random_tables(np.random.default_rng(0), [1, 2, 3], 60, span=20 * PAGE_SZ)
+    namePath, dataPaths = write_capture(tmp_path, tables, {1: 'one', 2: 'two', 3: 'three'})
+    return dict(dataPaths, plugin=namePath), table_rows(tables)
+
+
+def export_args(paths : dict, out : str):
+    return ['--plugin-db', paths['plugin'], '--switchboard-db', paths['switchboard'],
+        '--threadloop-db', paths['threadloop'], '--out', out, '--page-size', str(PAGE_SZ), '--jobs', '2']
+
+
+def test_pages_with_data_are_exported(tmp_path, databases):
+    paths, rows = databases
+    out = str(tmp_path / 'pages')
+    assert export_main(export_args(paths, out) + ['--format', 'json']) == 0
+    with open(os.path.join(out, 'manifest.json')) as manifestFile:
+        manifest = json.load(manifestFile)
+    
+    lastPage = max(stop for _, _, stop, _ in rows) // PAGE_SZ
+    expected = [page for page in range(lastPage + 1)
+        if any(start < (page + 1) * PAGE_SZ and stop >= page * PAGE_SZ for _, start, stop, _ in rows)]
+    assert [entry['page'] for entry in manifest['pages']] == expected
+    names = {1: 'one', 2: 'two', 3: 'three'}
+    assert manifest['pluginOrder'] == list(dict.fromkeys(names[pluginId] for pluginId, _, _, _ in rows))
+    for entry in manifest['pages'] + [{'file': manifest['overview']}]:
+        with open(os.path.join(out, entry['file'])) as pageFile:
+            assert json.load(pageFile)['data']
+
+
+def test_range_limits_pages(tmp_path, databases):
+    paths, _ = databases
+    out = str(tmp_path / 'pages')
+    assert export_main(export_args(paths, out) + ['--start', str(3 * PAGE_SZ), '--end', str(5 * PAGE_SZ)]) == 0
+    with open(os.path.join(out, 'manifest.json')) as manifestFile:
+        pages = [entry['page'] for entry in json.load(manifestFile)['pages']]
+    assert pages and set(pages) <= {3, 4}
+    assert os.path.exists(os.path.join(out, 'plotly.min.js'))
+
+
+def test_malformed_database_fails(tmp_path, databases):
+    paths, _ = databases
+    paths = dict(paths, switchboard=paths['plugin']) # No switchboard table
+    assert export_main(export_args(paths, str(tmp_path / 'pages'))) == 1
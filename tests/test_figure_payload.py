@@ -0,0 +1,125 @@
+# Filename: test_figure_payload.py
+""" Tests of the compact payload figures are pushed to the display in,
+    decoded as viewer.html expands it and compared with the figures. """
+
+import base64
+import json
+import numpy as np
+import plotly.graph_objs as go
+import pytest
+import shutil
+import subprocess
+
+from benchmark import viewer_decoder
+from illixr_export import figure_to_payload
+from illixr_model import PageRequest, VisualizerModel
+from illixr_store import TraceStore
+from synthetic import random_ranges, random_tables
+
+
+def decode(spec : dict):
+    """ The array of a Plotly typed array. """
+    values = np.frombuffer(base64.b64decode(spec['bdata']), dtype='<' + spec['dtype'])
+    if 'shape' in spec:
+        values = values.reshape([int(length) for length in spec['shape'].split(',')])
+    return values
+
+
+def expand(trace : dict):
+    """ The x values of a payload trace, as figure_to_json would send
+        them, with the durations its intervals hover, if any. """
+    if 'intervals' in trace:
+        intervals = trace['intervals']
+        starts = intervals['origin'] + np.cumsum(decode(intervals['startDeltas']).astype(np.float64))
+        x = np.full(3 * len(starts), np.nan)
+        customdata = np.full(len(x), np.nan)
+        x[0::3] = starts
+        x[1::3] = starts + decode(intervals['durations'])
+        customdata[0::3] = customdata[1::3] = decode(intervals['durations'])
+        return x, customdata, intervals['lane']
+    instants = trace['instants']
+    return instants['origin'] + np.cumsum(decode(instants['timeDeltas']).astype(np.float64)), None, instants['lane']
+
+
+def check_payload(fig):
+    """ Asserts the payload of fig holds its traces' x and y values. """
+    payload = json.loads(figure_to_payload(fig))
+    assert len(payload['data']) == len(fig.data)
+    for trace, sent in zip(fig.data, payload['data']):
+        if trace.meta in ('intervals', 'instants'):
+            x, customdata, lane = expand(sent)
+            np.testing.assert_array_equal(x, np.asarray(trace.x, dtype=np.float64))
+            if trace.customdata is not None:
+                np.testing.assert_array_equal(customdata, np.asarray(trace.customdata, dtype=np.float64))
+            assert np.all(np.asarray(trace.y) == lane)
+            assert 'x' not in sent and 'y' not in sent and 'meta' not in sent
+        elif trace.type == 'heatmap':
+            np.testing.assert_array_equal(decode(sent['z']), np.asarray(trace.z))
+
+
+@pytest.fixture
+def store(rng):
+    """ A store of random intervals and vsyncs. """
+    tables = random_tables(rng, [1, 2, 3], 200, first=10**6)
+    vsyncs = np.arange(10**6, 10**6 + 10000, 1000, dtype=np.int64)
+    tables.append((4, np.full(len(vsyncs), -5), vsyncs, vsyncs, None, None))
+    return TraceStore.from_tables(np.array([1, 2, 3]), ['a', 'b', 'c'], tables)
+
+
+def test_views_round_trip(rng, store):
+    model = VisualizerModel()
+    for a, b in random_ranges(rng, 10000, 20):
+        request = PageRequest(None, 1000, store.plugin_order(), 'cpu', store, False, False, (10**6 + a, 10**6 + b))
+        fig = model.create_fig(request)
+        if fig is not None:
+            check_payload(fig)
+
+
+def test_dense_view_round_trip(store):
+    model = VisualizerModel()
+    model.rawEventLimit = 5
+    span = (store.index.minStart, store.index.maxStop + 1)
+    check_payload(model.create_fig(PageRequest(None, 1000, store.plugin_order(), 'cpu', store, False, False, span)))
+
+
+@pytest.mark.parametrize('starts, stops', [([7], [7]), ([5, 5, 2**31 + 5, 2**33], [5, 9, 2**31 + 5, 2**33 + 3])])
+def test_edge_round_trip(starts, stops):
+    """ A lone zero-length interval, and starts too far apart for int32
+        offsets. """
+    x = np.full(3 * len(starts), np.nan)
+    x[0::3], x[1::3] = starts, stops
+    fig = go.Figure([go.Scattergl(x=x, y=np.full(len(x), 2), meta='intervals'),
+        go.Scattergl(x=np.array(starts, dtype=np.float64), y=np.full(len(starts), 3), meta='instants')])
+    check_payload(fig)
+
+
+# Decodes the payload in argv[2] with viewer.html's decoder, and writes
+# its traces' points as JSON, NaN breaks as null
+NODE_DECODE = """
+const figure = parseFigure(require('fs').readFileSync(process.argv[2], 'utf8'));
+process.stdout.write(JSON.stringify(figure.data.map(function (trace) {
+    return {x: Array.from(trace.x || []), y: Array.from(trace.y || []), customdata: Array.from(trace.customdata || [])};
+})));
+"""
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_viewer_decodes_payload(tmp_path, store):
+    """ viewer.html's own decoder, run in node, expands the payload into
+        the points of the figure. """
+    model = VisualizerModel()
+    span = (store.index.minStart, store.index.maxStop + 1)
+    fig = model.create_fig(PageRequest(None, 1000, store.plugin_order(), 'cpu', store, False, False, span))
+    (tmp_path / 'decode.js').write_text(viewer_decoder() + NODE_DECODE)
+    (tmp_path / 'payload.json').write_text(figure_to_payload(fig))
+    decoded = json.loads(subprocess.run(['node', str(tmp_path / 'decode.js'), str(tmp_path / 'payload.json')],
+        capture_output=True, text=True, check=True).stdout)
+    points = lambda values: [None if value != value else value for value in np.asarray(values, dtype=np.float64).tolist()]
+    checked = 0
+    for trace, drawn in zip(fig.data, decoded):
+        if trace.meta in ('intervals', 'instants'):
+            assert drawn['x'] == points(trace.x)
+            assert drawn['y'] == points(trace.y)
+            assert drawn['customdata'] == (points(trace.customdata) if trace.customdata is not None else [])
+            checked += 1
+    assert checked > 0
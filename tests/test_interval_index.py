@@ -0,0 +1,79 @@
+# Filename: test_interval_index.py
+""" Tests of the IntervalIndex against a linear scan of small random
+    traces, and at the edges of single intervals. """
+
+import numpy as np
+import pytest
+
+from illixr_store import IntervalIndex
+from synthetic import overlapping, random_intervals, random_ranges
+
+# An interval, a zero-length one and an inverted one (stop before start)
+EDGE_STARTS = np.array([100, 300, 400])
+EDGE_STOPS = np.array([200, 300, 390])
+
+
+def test_overlapping_matches_scan(rng):
+    starts, stops = random_intervals(rng, int(rng.integers(0, 400)))
+    index = IntervalIndex(starts, stops)
+    for a, b in random_ranges(rng, 10000):
+        expected = overlapping(starts, stops, a, b)
+        np.testing.assert_array_equal(index.overlapping(a, b), expected)
+        assert index.estimate(a, b) >= len(expected)
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    (0, 100, []),      # Ends where the interval starts
+    (0, 101, [0]),
+    (200, 250, [0]),   # Starts where the interval stops
+    (201, 300, []),
+    (201, 301, [1]),   # Holds the zero-length interval
+    (300, 300, []),    # Empty range
+    (300, 301, [1]),
+    (390, 1000, [2]),  # Reaches back to the inverted interval's stop
+    (391, 1000, []),
+    (-50, 10**6, [0, 1, 2]),
+])
+def test_edges(a, b, expected):
+    index = IntervalIndex(EDGE_STARTS, EDGE_STOPS)
+    assert index.overlapping(a, b).tolist() == expected
+    assert overlapping(EDGE_STARTS, EDGE_STOPS, a, b).tolist() == expected
+    assert index.estimate(a, b) >= len(expected)
+
+
+def test_single_interval():
+    index = IntervalIndex(np.array([5]), np.array([5]))
+    assert (index.minStart, index.maxStop) == (5, 5)
+    assert index.overlapping(5, 6).tolist() == [0]
+    assert index.overlapping(0, 5).tolist() == []
+    assert index.page_count(10) == 1
+
+
+def test_empty_index():
+    index = IntervalIndex(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    assert len(index) == 0
+    assert len(index.overlapping(0, 100)) == 0
+    assert index.estimate(0, 100) == 0
+    assert index.page_count(10) == 1
+
+
+def test_page_count_covers_last_stop():
+    index = IntervalIndex(np.array([0, 10]), np.array([5, 30]))
+    assert index.page_count(10) == 3
+    assert index.page_count(30) == 1
+    assert index.page_count(29) == 2
+
+
+def test_malformed_columns_rejected():
+    with pytest.raises(ValueError):
+        IntervalIndex(np.array([5, 1]), np.array([6, 2]))
+    with pytest.raises(ValueError):
+        IntervalIndex(np.array([1, 5]), np.array([2]))
+
+
+def test_state_round_trip(rng):
+    starts, stops = random_intervals(rng, 300)
+    state, positions = IntervalIndex(starts, stops).state()
+    index = IntervalIndex.from_state(starts, stops, state, positions)
+    for a, b in random_ranges(rng, 10000, 50):
+        np.testing.assert_array_equal(index.overlapping(a, b), overlapping(starts, stops, a, b))
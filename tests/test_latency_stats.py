@@ -0,0 +1,79 @@
+# Filename: test_latency_stats.py
+""" Tests of LatencyStats against exact per-plugin statistics of small
+    random traces. """
+
+import numpy as np
+import pytest
+
+from illixr_store import LatencyStats, TraceStore
+from synthetic import random_ranges, random_tables
+
+
+def random_store(rng):
+    """ A store of random intervals, some with skips. """
+    return TraceStore.from_tables(np.array([1, 2, 3]), ['x', 'y', 'z'], random_tables(rng, [1, 2, 3], 400))
+
+
+def exact(store, a=None, b=None):
+    """ Each plugin's durations, starts and skips over the intervals
+        starting in [a, b), by a pass over the rows. """
+    skips = np.zeros(len(store), dtype=np.int64)
+    skips[store.skipRows] = store.skipCounts
+    rows = np.ones(len(store), dtype=bool)
+    if a is not None:
+        rows = (store.starts >= a) & (store.starts < b)
+    return [(np.maximum(store.stops - store.starts, 0)[rows & (store.codes == code)],
+        store.starts[rows & (store.codes == code)], skips[rows & (store.codes == code)].sum())
+        for code in range(len(store.names))]
+
+
+def check(stats, plugins):
+    """ Asserts stats are exact, or within a bucket for percentiles. """
+    for code, (durations, starts, skips) in enumerate(plugins):
+        assert stats.counts[code] == len(durations)
+        assert stats.skips[code] == skips
+        if len(durations) == 0:
+            continue
+        assert stats.totals[code] == durations.sum()
+        assert stats.maxima[code] == durations.max()
+        assert stats.periodCounts[code] == len(starts) - 1
+        if len(starts) > 1:
+            assert stats.periodMeans[code] == pytest.approx(np.diff(starts).mean())
+            assert stats.periodM2[code] == pytest.approx(np.diff(starts).var() * (len(starts) - 1), abs=1e-6)
+        for q in (0, 1, 50, 90, 99, 100):
+            # At most one bucket above the true value, and never above the maximum
+            value = np.percentile(durations, q, method='inverted_cdf')
+            estimate = stats.percentile(q)[code]
+            assert value <= estimate <= max(value, 1) * 2 ** (1 / LatencyStats.bucketsPerOctave)
+
+
+def test_single_pass_exact(rng):
+    store = random_store(rng)
+    check(LatencyStats.from_chunks(len(store.names), store.chunks()), exact(store))
+
+
+@pytest.mark.parametrize('chunkSz', [1, 7, 64])
+def test_chunked_merge_equals_single_pass(rng, chunkSz):
+    store = random_store(rng)
+    whole = LatencyStats.from_chunks(len(store.names), store.chunks())
+    merged = LatencyStats.from_chunks(len(store.names), store.chunks(chunkSz=chunkSz))
+    for name in ('counts', 'maxima', 'histogram', 'skips', 'periodCounts', 'firstStarts', 'lastStarts'):
+        np.testing.assert_array_equal(getattr(merged, name), getattr(whole, name))
+    for name in ('totals', 'periodMeans', 'periodM2'):
+        np.testing.assert_allclose(getattr(merged, name), getattr(whole, name), rtol=1e-9, atol=1e-6)
+
+
+def test_windows_exact(rng):
+    store = random_store(rng)
+    for a, b in random_ranges(rng, 10000, 20):
+        check(LatencyStats.from_chunks(len(store.names), store.chunks(a, b, chunkSz=16)), exact(store, a, b))
+
+
+def test_empty_and_single_interval():
+    stats = LatencyStats.from_chunks(2, [])
+    assert stats.rows(['x', 'y']) == []
+    stats = LatencyStats.from_chunk(2, np.array([1]), np.array([100]), np.array([100]), np.array([0]))
+    rows = stats.rows(['x', 'y'])
+    assert [row[:2] for row in rows] == [('y', 1)]
+    assert rows[0][2:7] == (0, 0, 0, 0, 0) # A zero-length interval
+    assert np.isnan(rows[0][7]) and np.isnan(rows[0][8]) # No period with a single start
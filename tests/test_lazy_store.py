@@ -0,0 +1,109 @@
+# Filename: test_lazy_store.py
+""" Tests of the LazyTraceStore's range queries against a TraceStore of
+    the same small generated databases. """
+
+import numpy as np
+import pytest
+
+from illixr_store import LazyTraceStore, TraceStore
+from synthetic import lazy_store, random_ranges, random_tables, write_databases, write_table
+
+NAMES = {1: 'one', 2: 'two', 3: 'three'}
+
+
+def build(directory, tables, rebase=False):
+    """ A LazyTraceStore and a TraceStore of tables. """
+    return lazy_store(directory, tables, NAMES, rebase), \
+        TraceStore.from_tables(np.array(list(NAMES)), list(NAMES.values()), tables, rebase)
+
+
+@pytest.fixture(params=[False, True], ids=['cpu', 'rebased'])
+def stores(request, rng, tmp_path):
+    """ A LazyTraceStore and a TraceStore of the same random databases,
+        with a plugin ID missing from the name table, with times rebased
+        or not. """
+    lazy, store = build(tmp_path, random_tables(rng, [1, 2, 3, 4], 300), request.param)
+    yield lazy, store
+    lazy.connection.close()
+
+
+def rows_of(window, names):
+    """ A window's rows, codes replaced by plugin names, sorted. """
+    return sorted(zip(names[window.codes].tolist(), window.starts.tolist(), window.stops.tolist(), window.sources.tolist()))
+
+
+def rows_of_chunks(chunks, names):
+    """ The rows of (codes, starts, stops, skips) chunks, codes replaced
+        by plugin names, sorted. """
+    return sorted(row for codes, starts, stops, skips in chunks
+        for row in zip(names[codes].tolist(), starts.tolist(), stops.tolist(), skips.tolist()))
+
+
+def test_summary_matches(stores):
+    lazy, store = stores
+    assert len(lazy) == len(store)
+    assert lazy.origin == store.origin
+    assert lazy.names.tolist() == store.names.tolist()
+    assert lazy.index.minStart == store.index.minStart
+    assert lazy.index.maxStop == store.index.maxStop
+    assert sorted(lazy.plugin_order()) == sorted(store.plugin_order())
+
+
+def test_windows_match(rng, stores):
+    lazy, store = stores
+    for a, b in random_ranges(rng, 10000):
+        window, lazyWindow = store.window(a, b), lazy.window(a, b)
+        assert rows_of(lazyWindow, lazy.names) == rows_of(window, store.names)
+        assert np.all(np.diff(lazyWindow.starts) >= 0)
+        assert lazy.index.estimate(a, b) >= len(window.codes)
+
+
+def test_chunks_match(rng, stores):
+    lazy, store = stores
+    for a, b in [(None, None)] + random_ranges(rng, 10000, 10):
+        assert rows_of_chunks(lazy.chunks(a, b, chunkSz=13), lazy.names) == rows_of_chunks(store.chunks(a, b), store.names)
+
+
+def test_concurrency_profile_matches(stores):
+    lazy, store = stores
+    profile, lazyProfile = store.concurrency_profile(), lazy.concurrency_profile()
+    np.testing.assert_array_equal(lazyProfile.times, profile.times)
+    np.testing.assert_array_equal(lazyProfile.levels, profile.levels)
+    np.testing.assert_allclose(lazyProfile.levelTimes, profile.levelTimes)
+    np.testing.assert_allclose(lazyProfile.overlaps, profile.overlaps)
+
+
+def test_boundary_windows(tmp_path):
+    # One interval, a zero-length one and a long one reaching back past both
+    tables = [(0, np.array([1, 2, 3]), np.array([10, 20, 0]), np.array([20, 20, 100]), None, None)]
+    lazy, store = build(tmp_path, tables)
+    for a, b in [(20, 21), (0, 10), (21, 30), (100, 101), (101, 200), (5, 5)]:
+        assert rows_of(lazy.window(a, b), lazy.names) == rows_of(store.window(a, b), store.names)
+    lazy.connection.close()
+
+
+def test_empty_tables(tmp_path):
+    empty = np.empty(0, dtype=np.int64)
+    lazy, store = build(tmp_path, [(0, empty, empty, empty, None, None)])
+    assert len(lazy) == 0 and lazy.plugin_order() == []
+    assert len(lazy.window(0, 100).codes) == 0
+    lazy.connection.close()
+
+
+def test_rows_without_times_skipped(tmp_path):
+    namePath, _ = write_databases(tmp_path, [], NAMES)
+    dataPath = str(tmp_path / 'null.sqlite')
+    write_table(dataPath, 'source0', {'plugin_id': [1, 2, 3], 'start': [0, None, 5], 'stop': [10, 10, None]})
+    path = str(tmp_path / 'lazy.sqlite')
+    LazyTraceStore.build(path, namePath, ('plugin_name', 'plugin_id', 'plugin_name'),
+        [(0, dataPath, 'source0', 't.plugin_id', 't.start', 't.stop', '0', '-1')])
+    lazy = LazyTraceStore.open(path)
+    assert len(lazy) == 1 and lazy.plugin_order() == ['one']
+    lazy.connection.close()
+
+
+def test_missing_or_malformed_database(tmp_path):
+    assert LazyTraceStore.open(str(tmp_path / 'missing.sqlite')) is None
+    path = str(tmp_path / 'other.sqlite')
+    write_table(path, 'meta', {'key': [], 'value': []})
+    assert LazyTraceStore.open(path) is None
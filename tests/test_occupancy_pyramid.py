@@ -0,0 +1,71 @@
+# Filename: test_occupancy_pyramid.py
+""" Tests of the OccupancyPyramid's bins against per-bin sums over small
+    random traces, and at the edges of its bins. """
+
+import numpy as np
+
+from illixr_store import OccupancyPyramid
+from synthetic import occupancy, random_intervals
+
+
+def random_trace(rng, n : int, nCodes : int, span=5000):
+    """ n random intervals of nCodes plugins, sorted by start. """
+    starts, stops = random_intervals(rng, n, span)
+    return rng.integers(0, nCodes, n).astype(np.int16), starts, stops
+
+
+def level_edges(pyramid, level : int):
+    """ The edges of every bin of a level. """
+    return pyramid.origin + np.arange(pyramid.levels[level][0].shape[1] + 1, dtype=np.int64) * (pyramid.width << level)
+
+
+def test_every_level_matches_sums(rng):
+    codes, starts, stops = random_trace(rng, 120, 3)
+    pyramid = OccupancyPyramid(codes, starts, stops, 3, maxBins=64, minWidth=4, chunkSz=17)
+    assert (int(stops.max()) - pyramid.origin) // pyramid.width + 1 <= 64
+    for level, (busy, counts) in enumerate(pyramid.levels):
+        expectedBusy, expectedCounts = occupancy(codes, starts, stops, 3, level_edges(pyramid, level))
+        np.testing.assert_allclose(busy, expectedBusy)
+        np.testing.assert_array_equal(counts, expectedCounts)
+    assert pyramid.levels[-1][0].shape[1] == 1
+
+
+def test_bins_cover_range(rng):
+    codes, starts, stops = random_trace(rng, 200, 4)
+    pyramid = OccupancyPyramid(codes, starts, stops, 4, maxBins=128, minWidth=2)
+    end = pyramid.origin + pyramid.levels[0][0].shape[1] * pyramid.width
+    for a, width, maxBins in zip(rng.integers(0, 5000, 30), rng.integers(1, 5000, 30), rng.integers(1, 100, 30)):
+        a, b = int(a), int(a + width)
+        bins = pyramid.bins(a, b, int(maxBins))
+        if a < end:
+            assert bins.edges[0] <= max(a, pyramid.origin) and bins.edges[-1] >= min(b, end)
+        expectedBusy, expectedCounts = occupancy(codes, starts, stops, 4, bins.edges)
+        np.testing.assert_allclose(bins.busy, expectedBusy)
+        np.testing.assert_array_equal(bins.counts, expectedCounts)
+
+
+def test_intervals_on_bin_edges():
+    """ Bins of width 10: an interval filling one bin exactly, one
+        spanning three, a zero-length and an inverted one. """
+    codes = np.array([0, 1, 0, 1], dtype=np.int16)
+    starts = np.array([10, 15, 30, 32])
+    stops = np.array([20, 45, 30, 31])
+    pyramid = OccupancyPyramid(codes, starts, stops, 2, minWidth=10)
+    assert (pyramid.origin, pyramid.width) == (10, 10)
+    busy, counts = pyramid.levels[0]
+    assert busy.tolist() == [[10, 0, 0, 0], [5, 10, 10, 5]]
+    assert counts.tolist() == [[1, 0, 1, 0], [1, 0, 1, 0]]
+    assert pyramid.levels[1][0].tolist() == [[10, 0], [15, 15]]
+    
+    bins = pyramid.bins(20, 40, 2)
+    assert bins.edges.tolist() == [20, 30, 40]
+    assert bins.busy.tolist() == [[0, 0], [10, 10]]
+    assert len(pyramid.bins(100, 200, 4).edges) == 1 # Beyond the trace
+
+
+def test_empty_trace():
+    empty = np.empty(0, dtype=np.int64)
+    pyramid = OccupancyPyramid(empty.astype(np.int16), empty, empty, 2)
+    assert len(pyramid.levels) == 1
+    assert pyramid.levels[0][0].tolist() == [[0], [0]]
+    assert pyramid.bins(0, 100, 10).busy.sum() == 0
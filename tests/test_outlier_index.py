@@ -0,0 +1,102 @@
+# Filename: test_outlier_index.py
+""" Tests of the outlier index's longest, percentile and iteration
+    queries, in memory and on disk, against sorting each plugin's rows. """
+
+import numpy as np
+import pytest
+
+from illixr_model import VisualizerModel
+from illixr_store import TraceStore
+from synthetic import lazy_store, random_tables
+
+NAMES = {1: 'one', 2: 'two', 3: 'three'}
+
+
+@pytest.fixture(params=['memory', 'sidecar', 'lazy'])
+def store(request, rng, tmp_path):
+    """ A TraceStore, one saved as a sidecar and opened again, or a
+        LazyTraceStore of random tables, and the tables' (start, stop,
+        iteration) rows by plugin name. """
+    tables = random_tables(rng, [1, 2, 3, 4], 300)
+    rows = {}
+    for _, ids, starts, stops, _, iterations in tables:
+        for pluginId, row in zip(ids.tolist(), zip(starts.tolist(), stops.tolist(), iterations.tolist())):
+            rows.setdefault(NAMES.get(pluginId, str(pluginId)), []).append(row)
+    if request.param == 'lazy':
+        store = lazy_store(tmp_path, tables, NAMES)
+        yield store, rows
+        store.connection.close()
+    else:
+        store = TraceStore.from_tables(np.array(list(NAMES)), list(NAMES.values()), tables)
+        if request.param == 'sidecar':
+            store.save(str(tmp_path / 'sidecar'))
+            store = TraceStore.open(str(tmp_path / 'sidecar'))
+            assert isinstance(store.outliers.byDuration, np.memmap)
+        yield store, rows
+
+
+def events_of(events):
+    """ (start, stop, iteration) rows of TraceEvents. """
+    return list(zip(events.starts.tolist(), events.stops.tolist(), events.iterations.tolist()))
+
+
+def by_duration(rows):
+    """ Durations of rows, longest first. """
+    return sorted((stop - start for start, stop, _ in rows), reverse=True)
+
+
+def test_longest(rng, store):
+    store, rows = store
+    for code, name in enumerate(store.names):
+        expected = rows.get(name, [])
+        assert store.interval_count(code) == len(expected)
+        for first, k in [(0, 1), (0, 5), (3, 10), (0, len(expected) + 5), (len(expected), 3)]:
+            events = events_of(store.longest_intervals(code, k, first))
+            assert [stop - start for start, stop, _ in events] == by_duration(expected)[first:first + k]
+            assert set(events) <= set(expected)
+
+
+def test_iterations(store):
+    store, rows = store
+    for code, name in enumerate(store.names):
+        for iteration in (-1, 0, 7, 19, 25):
+            expected = sorted(row for row in rows.get(name, []) if row[2] == iteration)
+            events = events_of(store.iteration_intervals(code, iteration))
+            assert sorted(events) == expected
+            assert [start for start, _, _ in events] == sorted(start for start, _, _ in expected)
+
+
+@pytest.mark.parametrize('query, value', [('longest', 3), ('longest', 1000), ('percentile', 90), ('percentile', 0),
+    ('percentile', 100), ('iteration', 4)])
+def test_find(store, query, value):
+    store, rows = store
+    model = VisualizerModel()
+    model.findLimit = 40
+    found, total = model.find(store, query, None, value)
+    expected = []
+    for name, plugin in rows.items():
+        if query == 'iteration':
+            expected += [(name, iteration, start, stop) for start, stop, iteration in plugin if iteration == value]
+        else:
+            k = min(value, len(plugin)) if query == 'longest' else int(len(plugin) * (100 - value) / 100)
+            expected += [(name, stop - start) for start, stop, _ in sorted(plugin, key=lambda row: row[0] - row[1])[:k]]
+    assert total == len(expected)
+    if query == 'iteration':
+        assert set(found) <= set(expected)
+        assert [start for _, _, start, _ in found] == sorted(start for _, _, start, _ in expected)[:model.findLimit]
+    else:
+        durations = sorted((duration for _, duration in expected), reverse=True)[:model.findLimit]
+        assert [stop - start for _, _, start, stop in found] == durations
+    
+    # One plugin, by name
+    name = max(rows, key=lambda name: len(rows[name]))
+    found, _ = model.find(store, query, name, value)
+    assert {plugin for plugin, *_ in found} <= {name}
+
+
+@pytest.mark.parametrize('query, value', [('percentile', -1), ('percentile', 100.5), ('percentile', float('nan')),
+    ('median', 50)])
+def test_find_rejects_invalid_queries(store, query, value):
+    store, _ = store
+    with pytest.raises(ValueError):
+        VisualizerModel().find(store, query, None, value)
@@ -0,0 +1,43 @@
+# Filename: test_page_cache.py
+""" Tests of the PageCache's least-recently-used eviction by size. """
+
+from illixr_visualizer import PageCache
+
+
+def test_evicts_least_recently_used():
+    cache = PageCache(maxBytes=100)
+    for page in range(4):
+        cache.put(page, 'page ' + str(page), 30)
+    assert 0 not in cache and len(cache) == 3 and cache.nbytes == 90
+    assert cache.get(1) == 'page 1' # Now the most recently used
+    cache.put(4, 'page 4', 30)
+    assert 2 not in cache
+    assert [key for key in (1, 3, 4) if key in cache] == [1, 3, 4]
+
+
+def test_replacing_a_page_updates_its_size():
+    cache = PageCache(maxBytes=100)
+    cache.put('a', 1, 60)
+    cache.put('a', 2, 10)
+    cache.put('b', 3, 90)
+    assert cache.get('a') == 2 and cache.get('b') == 3
+    assert cache.nbytes == 100
+
+
+def test_pages_over_the_limit_are_not_cached():
+    cache = PageCache(maxBytes=100)
+    cache.put('small', 1, 50)
+    cache.put('large', 2, 101)
+    assert cache.get('large') is None
+    assert cache.get('small') == 1 and cache.nbytes == 50
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_discarding_stale_pages():
+    cache = PageCache(maxBytes=100)
+    for page in range(5):
+        cache.put((page, 'raw'), page, 10)
+    cache.discard(lambda key: key[0] >= 3)
+    assert [page for page in range(5) if (page, 'raw') in cache] == [0, 1, 2]
+    assert cache.nbytes == 30
@@ -0,0 +1,90 @@
+# Filename: test_partitioned_load.py
+""" Tests of loading tables in concurrent rowid ranges against loading
+    them in one read. """
+
+import numpy as np
+import pytest
+import sqlite3
+
+from illixr_model import VisualizerModel
+from illixr_store import MalformedDatabaseError
+from synthetic import random_tables, store_rows, write_capture
+
+NAMES = {1: 'one', 2: 'two', 3: 'three'}
+
+
+def loaded(namePath, dataPaths, partitionRows : int, readThreads=4):
+    """ The store loaded in rowid ranges of at least partitionRows rows. """
+    model = VisualizerModel()
+    model.cacheRoot = None
+    model.partitionRows = partitionRows
+    model.readThreads = readThreads
+    store, _ = model.load(namePath, dataPaths)
+    return store
+
+
+def skip_counts(store):
+    """ The (row, skips) of the store's rows with skips. """
+    return list(zip(store.skipRows.tolist(), store.skipCounts.tolist()))
+
+
+@pytest.mark.parametrize('partitionRows', [1, 7, 64])
+def test_ranges_match_one_read(rng, tmp_path, partitionRows):
+    namePath, dataPaths = write_capture(tmp_path, random_tables(rng, [1, 2, 3], 200), NAMES)
+    whole = loaded(namePath, dataPaths, 10**9, 1)
+    store = loaded(namePath, dataPaths, partitionRows)
+    assert store_rows(store) == store_rows(whole)
+    assert skip_counts(store) == skip_counts(whole)
+    assert store.plugin_order() == whole.plugin_order()
+
+
+def test_rowid_gaps(rng, tmp_path):
+    namePath, dataPaths = write_capture(tmp_path, random_tables(rng, [1, 2, 3], 200), NAMES)
+    with sqlite3.connect(dataPaths['switchboard']) as connection:
+        connection.execute("DELETE FROM switchboard_callback WHERE rowid % 3 = 0 OR rowid BETWEEN 20 AND 60")
+    connection.close()
+    expected = loaded(namePath, dataPaths, 10**9, 1)
+    assert store_rows(loaded(namePath, dataPaths, 5)) == store_rows(expected)
+
+
+def test_empty_table(tmp_path):
+    empty = np.empty(0, dtype=np.int64)
+    tables = [(0, empty, empty, empty, None, empty), (1, np.array([2]), np.array([5]), np.array([9]), np.array([1]), np.array([4]))]
+    namePath, dataPaths = write_capture(tmp_path, tables, NAMES)
+    store = loaded(namePath, dataPaths, 1)
+    assert store_rows(store) == [(2, 5, 9, 1)]
+    assert skip_counts(store) == [(0, 1)]
+
+
+def test_missing_table(rng, tmp_path):
+    namePath, dataPaths = write_capture(tmp_path, random_tables(rng, [1, 2, 3], 50), NAMES)
+    dataPaths['switchboard'] = namePath # Has no switchboard_callback table
+    assert VisualizerModel()._max_rowid(namePath, 'switchboard_callback') is None
+    with pytest.raises(MalformedDatabaseError, match='switchboard_callback'):
+        loaded(namePath, dataPaths, 1)
+
+
+@pytest.mark.parametrize('partitionRows', [1, 10**6])
+@pytest.mark.parametrize('statement', ["UPDATE switchboard_callback SET cpu_time_start = NULL WHERE rowid = 3",
+    "ALTER TABLE switchboard_callback DROP COLUMN cpu_time_stop"])
+def test_null_or_missing_column(tmp_path, partitionRows, statement):
+    """ A NULL time or a missing column is reported as a malformed
+        database, whether read in one range or many. """
+    table = (0, np.array([1, 2, 3, 1]), np.array([0, 10, 20, 30]), np.array([5, 15, 25, 35]), None, np.arange(4))
+    namePath, dataPaths = write_capture(tmp_path, [table], NAMES)
+    connection = sqlite3.connect(dataPaths['switchboard'])
+    connection.execute(statement)
+    connection.commit()
+    connection.close()
+    with pytest.raises(MalformedDatabaseError, match='switchboard_callback'):
+        loaded(namePath, dataPaths, partitionRows)
+
+
+@pytest.mark.parametrize('lastRowid', [None, 0, 1, 6, 7, 8, 100])
+def test_ranges_cover_rowids(lastRowid):
+    model = VisualizerModel()
+    model.partitionRows, model.readThreads = 7, 4
+    ranges = model._rowid_ranges(lastRowid)
+    assert ranges[0][0] == 0 and ranges[-1][1] == (lastRowid or 0)
+    assert all(last == after for (_, last), (after, _) in zip(ranges[:-1], ranges[1:])) # Contiguous
+    assert len(ranges) <= model.readThreads and all(last - after >= 7 for after, last in ranges[:-1])
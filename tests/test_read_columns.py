@@ -0,0 +1,91 @@
+# Filename: test_read_columns.py
+""" Tests of read_columns against the rows SQLite returns, across batch
+    boundaries, sparse and negative rowids and malformed tables. """
+
+import numpy as np
+import pytest
+import sqlite3
+
+from illixr_store import LoadCancelled, read_columns
+from synthetic import write_table
+
+COLUMNS = {'plugin_id': np.int32, 'start': np.int64, 'stop': np.int64}
+
+
+def random_columns(rng, rows : int):
+    """ Plugin ids and times of rows random intervals. """
+    starts = rng.integers(0, 10**12, rows)
+    return {'plugin_id': rng.integers(0, 40, rows), 'start': starts, 'stop': starts + rng.integers(0, 10**6, rows)}
+
+
+@pytest.mark.parametrize('rows', [0, 1, 7, 8, 9, 100])
+def test_batches_match_table(tmp_path, rng, rows):
+    """ Reads in batches of 8 rows, so that rows fall exactly on, before
+        and after batch boundaries. """
+    columns = random_columns(rng, rows)
+    path = str(tmp_path / 'data.sqlite')
+    write_table(path, 'data', columns)
+    arrays, _ = read_columns(path, 'data', COLUMNS, batchSz=8)
+    for name, dtype in COLUMNS.items():
+        assert arrays[name].dtype == dtype
+        np.testing.assert_array_equal(arrays[name], columns[name])
+
+
+@pytest.mark.parametrize('rowids', [[1, 1000, 10**6], [-10, -9, -8, -7, -6, 1], list(range(-50, 50))])
+def test_rowids_other_than_row_count(tmp_path, rowids):
+    """ Capacity comes from the largest rowid: sparse rowids leave it to
+        be trimmed and negative ones make it grow. """
+    columns = random_columns(np.random.default_rng(len(rowids)), len(rowids))
+    path = str(tmp_path / 'data.sqlite')
+    write_table(path, 'data', columns, rowids)
+    arrays, _ = read_columns(path, 'data', COLUMNS, batchSz=4)
+    for name in COLUMNS:
+        assert len(arrays[name]) == len(rowids)
+        np.testing.assert_array_equal(arrays[name], columns[name])
+
+
+@pytest.mark.parametrize('size', [1, 3, 16, 1000])
+def test_rowid_ranges_concatenate_to_table(tmp_path, rng, size):
+    """ Ranges of size rowids over a table with rowid gaps, read in
+        batches of 4 rows, join into the whole table. """
+    rowids = np.sort(rng.choice(np.arange(1, 200), 60, replace=False))
+    columns = random_columns(rng, len(rowids))
+    path = str(tmp_path / 'data.sqlite')
+    write_table(path, 'data', columns, rowids)
+    whole, _ = read_columns(path, 'data', COLUMNS)
+    parts = [read_columns(path, 'data', COLUMNS, batchSz=4, rowids=(after, after + size))[0]
+        for after in range(0, 200, size)]
+    for name in COLUMNS:
+        np.testing.assert_array_equal(np.concatenate([part[name] for part in parts]), whole[name])
+
+
+def test_text_columns(tmp_path):
+    path = str(tmp_path / 'names.sqlite')
+    write_table(path, 'plugin_name', {'plugin_id': [3, 1, 2], 'plugin_name': ['c', 'a', 'b']})
+    arrays, _ = read_columns(path, 'plugin_name', {'plugin_id': np.int32, 'plugin_name': object})
+    assert arrays['plugin_id'].tolist() == [3, 1, 2]
+    assert arrays['plugin_name'].tolist() == ['c', 'a', 'b']
+
+
+def test_malformed_tables_raise(tmp_path):
+    path = str(tmp_path / 'data.sqlite')
+    write_table(path, 'data', {'plugin_id': [1, 2], 'start': [0, None], 'stop': [5, 6]})
+    with pytest.raises(TypeError):
+        read_columns(path, 'data', COLUMNS)
+    with pytest.raises(sqlite3.Error):
+        read_columns(path, 'data', {'plugin_id': np.int32, 'missing': np.int64})
+    with pytest.raises(sqlite3.Error):
+        read_columns(path, 'missing', COLUMNS)
+
+
+def test_progress_after_every_batch(tmp_path):
+    path = str(tmp_path / 'data.sqlite')
+    write_table(path, 'data', random_columns(np.random.default_rng(0), 20))
+    calls = []
+    read_columns(path, 'data', COLUMNS, batchSz=8, progress=lambda rows, expected: calls.append((rows, expected)))
+    assert calls == [(8, 20), (16, 20), (20, 20)]
+    
+    def cancel(rows, expected):
+        raise LoadCancelled()
+    with pytest.raises(LoadCancelled):
+        read_columns(path, 'data', COLUMNS, batchSz=8, progress=cancel)
@@ -0,0 +1,92 @@
+# Filename: test_sidecar.py
+""" Tests of saving a TraceStore as a sidecar of .npy columns and
+    memory-mapping it back. """
+
+import json
+import numpy as np
+import os
+
+from illixr_store import sidecar_directory, TraceStore
+from synthetic import random_tables
+
+COLUMNS = ('codes', 'starts', 'stops', 'sources', 'skipRows', 'skipCounts', 'iterations')
+
+
+def random_store(rng, rows : int):
+    """ A store of random intervals of two sources. """
+    return TraceStore.from_tables(np.array([5, 6, 7]), ['p', 'q', 'r'], random_tables(rng, [5, 6, 7], rows, span=10**6))
+
+
+def saved(store, tmp_path):
+    """ The store saved as a sidecar and opened again. """
+    directory = str(tmp_path / 'sidecar')
+    store.save(directory)
+    return TraceStore.open(directory)
+
+
+def test_round_trip(tmp_path, rng):
+    store = random_store(rng, 300)
+    opened = saved(store, tmp_path)
+    
+    assert isinstance(opened.starts, np.memmap)
+    assert opened.names.tolist() == store.names.tolist()
+    assert opened.plugin_order() == store.plugin_order()
+    np.testing.assert_array_equal(opened.pluginIds, store.pluginIds)
+    for name in COLUMNS:
+        np.testing.assert_array_equal(getattr(opened, name), getattr(store, name))
+    for (busy, counts), (openedBusy, openedCounts) in zip(store.pyramid.levels, opened.pyramid.levels):
+        np.testing.assert_array_equal(openedBusy, busy)
+        np.testing.assert_array_equal(openedCounts, counts)
+    end = store.index.maxStop
+    for a, width in zip(rng.integers(-1000, end + 1, 50), rng.integers(0, end // 4 + 1, 50)):
+        window, openedWindow = store.window(int(a), int(a + width)), opened.window(int(a), int(a + width))
+        for column, openedColumn in zip(window, openedWindow):
+            np.testing.assert_array_equal(openedColumn, column)
+
+
+def test_concurrency_profile_saved(tmp_path, rng):
+    opened = saved(random_store(rng, 200), tmp_path)
+    profile = opened.concurrency_profile()
+    assert os.path.isfile(os.path.join(str(tmp_path / 'sidecar'), 'concurrency', 'meta.json'))
+    reopened = TraceStore.open(str(tmp_path / 'sidecar')).concurrency_profile()
+    assert isinstance(reopened.times, np.memmap)
+    np.testing.assert_array_equal(reopened.times, profile.times)
+    np.testing.assert_array_equal(reopened.levels, profile.levels)
+
+
+def test_empty_store_round_trip(tmp_path):
+    empty = np.empty(0, dtype=np.int64)
+    opened = saved(TraceStore.from_tables(np.array([1]), ['x'], [(0, empty, empty, empty, None, None)]), tmp_path)
+    assert len(opened) == 0
+    assert opened.plugin_order() == []
+    assert len(opened.window(0, 100).codes) == 0
+
+
+def test_missing_incomplete_or_outdated_sidecar(tmp_path):
+    directory = str(tmp_path / 'sidecar')
+    assert TraceStore.open(directory) is None
+    random_store(np.random.default_rng(1), 50).save(directory)
+    
+    metaPath = os.path.join(directory, 'meta.json')
+    with open(metaPath) as metaFile:
+        meta = json.load(metaFile)
+    meta['version'] = TraceStore.sidecarVersion - 1
+    with open(metaPath, 'w') as metaFile:
+        json.dump(meta, metaFile)
+    assert TraceStore.open(directory) is None
+    
+    os.remove(metaPath)
+    assert TraceStore.open(directory) is None
+
+
+def test_directory_follows_databases_and_columns(tmp_path):
+    namePath, dataPath = tmp_path / 'names.sqlite', tmp_path / 'data.sqlite'
+    namePath.write_bytes(b'names')
+    dataPath.write_bytes(b'data')
+    key = lambda columns: sidecar_directory(str(tmp_path), str(namePath), {'switchboard': str(dataPath)}, columns)
+    directory = key(['start'])
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert key(['start']) == directory
+    assert key(['stop']) != directory
+    dataPath.write_bytes(b'longer data')
+    assert key(['start']) != directory
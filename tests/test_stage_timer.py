@@ -0,0 +1,56 @@
+# Filename: test_stage_timer.py
+""" Tests of the StageTimer's summaries against the recorded latencies. """
+
+import numpy as np
+import pytest
+import threading
+
+from illixr_model import StageTimer
+
+
+def test_summary_matches_latencies(rng):
+    timer = StageTimer()
+    durations = {'read': rng.integers(1, 10**7, 500), 'draw': np.exp(rng.normal(12, 2, 300)).astype(np.int64) + 1}
+    for stage, values in durations.items():
+        for start, duration in enumerate(values.tolist()):
+            timer.record(stage, start, duration)
+    rows = {row[0]: row[1:] for row in timer.summary()}
+    assert list(rows) == ['read', 'draw']
+    for stage, values in durations.items():
+        runs, mean, p50, p90, p99, longest = rows[stage]
+        assert runs == len(values)
+        assert mean == pytest.approx(values.mean() / 1e6)
+        assert longest == values.max() / 1e6
+        for q, estimate in zip((50, 90, 99), (p50, p90, p99)):
+            # An upper bound within one bucket, a quarter octave
+            exact = np.percentile(values, q, method='inverted_cdf') / 1e6
+            assert exact <= estimate * (1 + 1e-9) and estimate <= exact * 2 ** (1 / StageTimer.bucketsPerOctave)
+
+
+def test_ring_keeps_latest_spans():
+    timer = StageTimer(maxSpans=3)
+    for start in range(5):
+        timer.record('page', start * 1000, 10)
+    events = [event for event in timer.chrome_trace()['traceEvents'] if event['ph'] == 'X']
+    assert [event['ts'] for event in events] == [2, 3, 4]
+    timer.reset()
+    assert timer.summary() == []
+
+
+def test_threads_record_every_span():
+    timer = StageTimer()
+    # Live threads have distinct ids
+    done = threading.Barrier(4)
+    def work():
+        for _ in range(1000):
+            with timer.span('work'):
+                pass
+        done.wait()
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert timer.summary()[0][1] == 4000
+    names = [event for event in timer.chrome_trace()['traceEvents'] if event['ph'] == 'M']
+    assert len(names) == 4
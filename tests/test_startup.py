@@ -0,0 +1,32 @@
+# Filename: test_startup.py
+""" Tests that a launch loads plotly and QtWebEngine only after the
+    window is shown, and that the headless modules load no Qt. """
+
+import json
+import os
+import pytest
+import subprocess
+import sys
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(statement : str):
+    """ The modules loaded by running statement in a fresh process. """
+    output = subprocess.run([sys.executable, '-c', statement + "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"],
+        cwd=REPOSITORY, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_import_defers_heavy_modules():
+    modules = loaded_modules("import illixr_visualizer")
+    assert 'illixr_visualizer' in modules
+    assert not [module for module in modules if module.split('.')[0] in ('pandas', 'plotly') or
+        module in ('PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets', 'PyQt5.QtWebChannel')]
+
+
+@pytest.mark.parametrize('module', ['illixr_cli', 'illixr_model'])
+def test_headless_modules_load_no_qt(module):
+    modules = loaded_modules("import " + module)
+    assert module in modules
+    assert not [name for name in modules if name.split('.')[0] in ('PyQt5', 'pandas', 'plotly')]
@@ -0,0 +1,140 @@
+# Filename: test_trace_append.py
+""" Tests of appending a live capture's new rows to a TraceStore against
+    a store built from every row at once. """
+
+import numpy as np
+import pytest
+
+import illixr_model
+from illixr_model import VisualizerModel
+from illixr_store import LoadCancelled, TraceStore, TraceTail
+from synthetic import random_ranges, random_tables, store_rows, write_capture
+
+
+def skip_counts(store):
+    """ The skips of every row of a store, in store order. """
+    skips = np.zeros(len(store), dtype=np.int64)
+    skips[store.skipRows] = store.skipCounts
+    return skips.tolist()
+
+
+def check_same(store, expected, rng):
+    """ Asserts store holds expected's rows, windows and overview. """
+    assert store.origin == expected.origin
+    assert list(zip(store_rows(store), skip_counts(store))) == list(zip(store_rows(expected), skip_counts(expected)))
+    assert np.all(np.diff(store.skipRows) > 0) and np.all(store.skipCounts > 0)
+    assert sorted(store.plugin_order()) == sorted(expected.plugin_order())
+    np.testing.assert_array_equal(store.iterations, expected.iterations)
+    for code, name in enumerate(store.names):
+        expectedCode = expected.names.tolist().index(name)
+        longest, expectedLongest = store.longest_intervals(code, 5), expected.longest_intervals(expectedCode, 5)
+        np.testing.assert_array_equal(longest.stops - longest.starts, expectedLongest.stops - expectedLongest.starts)
+    
+    end = expected.index.maxStop
+    for a, b in random_ranges(rng, end + 1, 20):
+        window, expectedWindow = store.window(a, b), expected.window(a, b)
+        assert store.pluginIds[window.codes].tolist() == expected.pluginIds[expectedWindow.codes].tolist()
+        np.testing.assert_array_equal(window.starts, expectedWindow.starts)
+        np.testing.assert_array_equal(window.stops, expectedWindow.stops)
+    
+    bins = store.pyramid.bins(store.index.minStart, end + 1, 64)
+    busy = np.zeros(len(store.names))
+    np.add.at(busy, store.codes, np.maximum(store.stops - store.starts, 0))
+    np.testing.assert_allclose(bins.busy.sum(axis=1), busy)
+    assert bins.counts.sum(axis=1).tolist() == np.bincount(store.codes, minlength=len(store.names)).tolist()
+
+
+@pytest.mark.parametrize('rebase', [False, True])
+def test_append_matches_rebuilt_store(rng, rebase):
+    pluginIds = [10, 20]
+    tables = random_tables(rng, pluginIds, 50, span=2000, first=10**6)
+    store = TraceStore.from_tables(np.array(pluginIds), ['ten', 'twenty'], tables, rebase)
+    for poll in range(8):
+        if poll in (2, 5):
+            pluginIds = pluginIds + [30 + poll] # Plugins first seen in a poll
+        last = int(store.starts.max()) + store.origin if len(store) else 10**6
+        batch = random_tables(rng, pluginIds, 60, span=2300, first=last - 300)
+        earliest = min((int(starts.min()) for _, _, starts, _, _, _ in batch if len(starts)), default=None)
+        assert store.append(batch, rebase) == (earliest - store.origin if earliest is not None else None)
+        tables = tables + batch
+        check_same(store, TraceStore.from_tables(np.array([10, 20]), ['ten', 'twenty'], tables, rebase), rng)
+
+
+def test_empty_polls_add_nothing(rng):
+    store = TraceStore.from_tables(np.array([1]), ['one'], random_tables(rng, [1], 20))
+    before = store_rows(store)
+    assert store.append([]) is None
+    empty = np.empty(0, dtype=np.int64)
+    assert store.append([(0, empty, empty, empty, None, None)]) is None
+    assert store_rows(store) == before
+
+
+def test_append_to_empty_store():
+    empty = np.empty(0, dtype=np.int64)
+    store = TraceStore.from_tables(np.array([1]), ['one'], [(0, empty, empty, empty, None, None)], rebase=True)
+    assert store.append([(0, np.array([1, 1]), np.array([500, 700]), np.array([600, 700]), None, None)], True) == 0
+    assert store.origin == 500
+    assert store_rows(store) == [(1, 0, 100, 0), (1, 200, 200, 0)]
+
+
+def test_poll_reads_new_rows(rng, tmp_path):
+    names = {1: 'one', 2: 'two'}
+    namePath, dataPaths = write_capture(tmp_path, random_tables(rng, [1, 2], 40), names)
+    model = VisualizerModel()
+    model.cacheRoot = None
+    store, _ = model.load(namePath, dataPaths, live=True)
+    assert model.poll(store) is None
+    for first in (10000, 20000):
+        write_capture(tmp_path, random_tables(rng, [1, 2, 3], 40, first=first), names)
+        model.poll(store)
+        check_same(store, model.load(namePath, dataPaths)[0], rng)
+
+
+def test_closed_tail_reads_nothing(tmp_path):
+    names = {1: 'one'}
+    table = (0, np.array([1, 1]), np.array([0, 10]), np.array([5, 15]), None, np.arange(2))
+    namePath, dataPaths = write_capture(tmp_path, [table], names)
+    model = VisualizerModel()
+    model.cacheRoot = None
+    store, _ = model.load(namePath, dataPaths, live=True)
+    assert len(store.tail.connections) == 1
+    store.tail.close()
+    assert store.tail.connections == {}
+    write_capture(tmp_path, [table], names)
+    assert model.poll(store) is None and len(store) == 2
+    assert store.tail.connections == {}
+
+
+def test_unfinished_live_load_closes_its_tail(tmp_path, monkeypatch):
+    tails = []
+    class RecordedTail(TraceTail):
+        def __init__(self, rebase):
+            super().__init__(rebase)
+            tails.append(self)
+    monkeypatch.setattr(illixr_model, 'TraceTail', RecordedTail)
+    table = (0, np.array([1]), np.array([0]), np.array([5]), None, np.arange(1))
+    namePath, dataPaths = write_capture(tmp_path, [table], {1: 'one'})
+    def cancel(percent, message):
+        raise LoadCancelled()
+    model = VisualizerModel()
+    model.cacheRoot = None
+    with pytest.raises(LoadCancelled):
+        model.load(namePath, dataPaths, cancel, live=True)
+    assert len(tails) == 1 and tails[0].tables == [] and tails[0].connections == {}
+
+
+def test_reload_closes_the_replaced_tail(tmp_path):
+    pytest.importorskip('PyQt5.QtCore')
+    from illixr_visualizer import VisualizerWorker
+    table = (0, np.array([1]), np.array([0]), np.array([5]), None, np.arange(1))
+    namePath, dataPaths = write_capture(tmp_path, [table], {1: 'one'})
+    model = VisualizerModel()
+    model.cacheRoot = None
+    worker = VisualizerWorker(model)
+    loaded = []
+    worker.loadedSignal.connect(lambda store, extent, summary: loaded.append(store))
+    for live in (True, True, False):
+        worker.load(namePath, dataPaths, False, 'cpu', live)
+    first, second, _ = loaded
+    assert first.tail.connections == {} and second.tail.connections == {}
+    assert worker.tail is None
@@ -0,0 +1,233 @@
+# Filename: test_trace_exporter.py
+""" Tests of the TraceExporter's Chrome JSON and Perfetto protobuf traces,
+    decoded and compared with the store's intervals. """
+
+from decimal import Decimal
+import json
+import numpy as np
+import pytest
+
+from illixr_store import SOURCES, TraceStore
+from illixr_export import TraceExporter
+from synthetic import random_tables
+
+NAMES = ['one', 'two "quoted"', 'three']
+
+
+def random_store(rng, rows : int, rebase=False):
+    """ A store of random intervals: callbacks and iterations of the same
+        plugins overlapping, and an unnumbered lane. """
+    tables = random_tables(rng, [1, 2, 3], rows, span=20000, first=10**9)
+    n = int(rng.integers(0, rows))
+    starts = np.sort(rng.integers(10**9, 10**9 + 20000, n))
+    tables.append((3, np.full(n, -4), starts, starts + rng.integers(0, 500, n), None, None))
+    return TraceStore.from_tables(np.array([1, 2, 3]), NAMES, tables, rebase)
+
+
+def expected_rows(store, a=None, b=None, plugins=None):
+    """ The intervals an export should hold, as sorted (name, start, stop,
+        category, iteration) rows. """
+    rows = []
+    for code, start, stop, source, iteration in zip(store.codes.tolist(), store.starts.tolist(), store.stops.tolist(),
+            store.sources.tolist(), store.iterations.tolist()):
+        name = store.names[code]
+        if (a is None or start >= a) and (b is None or start < b) and (plugins is None or name in plugins):
+            rows.append((name, start, stop, SOURCES[source], iteration if iteration >= 0 else None))
+    return sorted(rows)
+
+
+def check_tracks(tracks : dict, names : dict):
+    """ Checks that no two intervals of a track overlap, and that each
+        track is named after its plugin. Returns each track's plugin. """
+    plugins = {}
+    for track, intervals in tracks.items():
+        intervals.sort()
+        for (_, stop), (start, _) in zip(intervals[:-1], intervals[1:]):
+            assert start >= stop
+        name = names[track]
+        plugins[track] = name.rsplit(" (", 1)[0] if name.endswith(")") and " (" in name else name
+    return plugins
+
+
+def decode_json(path : str):
+    """ The rows of a Chrome trace, read with json. """
+    with open(path) as traceFile:
+        trace = json.loads(traceFile.read(), parse_float=Decimal)
+    names, tracks, slices = {}, {}, []
+    for event in trace['traceEvents']:
+        if event['ph'] == 'M':
+            if event['name'] == 'thread_name':
+                names[event['tid']] = event['args']['name']
+            continue
+        assert event['ph'] == 'X' and event['pid'] == 1
+        start = int(Decimal(event['ts']) * 1000)
+        stop = start + int(Decimal(event['dur']) * 1000)
+        tracks.setdefault(event['tid'], []).append((start, stop))
+        slices.append((event['tid'], start, stop, event['cat'], event.get('args', {}).get('iteration')))
+    plugins = check_tracks(tracks, names)
+    return trace, sorted((plugins[track], start, stop, category, iteration) for track, start, stop, category, iteration in slices)
+
+
+def decode_message(data : bytes):
+    """ A protobuf message's fields as (field number, value) pairs, with
+        varints as ints and length-delimited fields as bytes. """
+    fields = []
+    position = 0
+    while position < len(data):
+        key, position = decode_varint(data, position)
+        number, wireType = key >> 3, key & 7
+        if wireType == 0:
+            value, position = decode_varint(data, position)
+        elif wireType == 2:
+            length, position = decode_varint(data, position)
+            value = data[position:position + length]
+            position += length
+            assert position <= len(data)
+        else:
+            raise AssertionError("Unexpected wire type " + str(wireType))
+        fields.append((number, value))
+    return fields
+
+
+def decode_varint(data : bytes, position : int):
+    """ The varint at position and the position after it. """
+    value = shift = 0
+    while True:
+        byte = data[position]
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        position += 1
+        if not byte & 0x80:
+            return value, position
+
+
+def decode_perfetto(path : str):
+    """ The rows of a Perfetto trace, read with a protobuf wire format
+        decoder: Trace.packet (1) holds TracePackets of a timestamp (8),
+        a TrackEvent (11) or a TrackDescriptor (60). """
+    with open(path, 'rb') as traceFile:
+        packets = [decode_message(packet) for number, packet in decode_message(traceFile.read()) if number == 1]
+    names, tracks, slices, begun = {}, {}, [], {}
+    for packet in packets:
+        fields = dict(packet)
+        if 60 in fields:
+            descriptor = dict(decode_message(fields[60]))
+            names[descriptor[1]] = descriptor[2].decode()
+            continue
+        assert fields[10] == 1 # trusted_packet_sequence_id
+        event = decode_message(fields[11])
+        eventFields = dict(event)
+        if eventFields[9] == 1: # TYPE_SLICE_BEGIN
+            iteration = None
+            for number, annotation in event:
+                if number == 4:
+                    annotationFields = dict(decode_message(annotation))
+                    assert annotationFields[10] == b'iteration'
+                    iteration = annotationFields[4]
+            assert eventFields[11] not in begun
+            begun[eventFields[11]] = (fields[8], eventFields[22].decode(), iteration)
+        else:
+            assert eventFields[9] == 2 # TYPE_SLICE_END
+            start, category, iteration = begun.pop(eventFields[11])
+            tracks.setdefault(eventFields[11], []).append((start, fields[8]))
+            slices.append((eventFields[11], start, fields[8], category, iteration))
+    assert not begun
+    plugins = check_tracks(tracks, names)
+    return packets, sorted((plugins[track], start, stop, category, iteration) for track, start, stop, category, iteration in slices)
+
+
+DECODERS = {'json': decode_json, 'perfetto': decode_perfetto}
+
+
+@pytest.mark.parametrize('rebase', [False, True])
+def test_json_matches_store(tmp_path, rng, rebase):
+    store = random_store(rng, 150, rebase)
+    path = str(tmp_path / 'trace.json')
+    exporter = TraceExporter(store, 'json')
+    exporter.chunkSz = 37
+    assert exporter.write(path) == len(store)
+    trace, rows = decode_json(path)
+    assert trace['displayTimeUnit'] == 'ns'
+    assert trace['otherData']['timeOrigin'] == store.origin
+    assert rows == expected_rows(store)
+
+
+@pytest.mark.parametrize('rebase', [False, True])
+def test_perfetto_matches_store(tmp_path, rng, rebase):
+    store = random_store(rng, 150, rebase)
+    path = str(tmp_path / 'trace.perfetto-trace')
+    exporter = TraceExporter(store, 'perfetto')
+    exporter.chunkSz = 37
+    assert exporter.write(path) == len(store)
+    packets, rows = decode_perfetto(path)
+    assert rows == expected_rows(store)
+    assert dict(decode_message(dict(packets[0])[60]))[2] == b"ILLIXR"
+
+
+@pytest.mark.parametrize('fmt', ['json', 'perfetto'])
+def test_range_and_plugins(tmp_path, rng, fmt):
+    store = random_store(rng, 200)
+    a, b = int(store.starts[len(store) // 4]), int(store.starts[len(store) // 2])
+    plugins = ['two "quoted"', 'switchboard queues']
+    path = str(tmp_path / ('trace.' + fmt))
+    expected = expected_rows(store, a, b, plugins)
+    assert TraceExporter(store, fmt).write(path, a, b, plugins) == len(expected)
+    assert DECODERS[fmt](path)[1] == expected
+
+
+@pytest.mark.parametrize('fmt', ['json', 'perfetto'])
+@pytest.mark.parametrize('rows', [[], [(1, 50, 50)], [(1, 50, 50), (1, 50, 80), (1, 80, 80), (2, 50, 50)]])
+def test_empty_single_and_zero_length(tmp_path, fmt, rows):
+    """ An empty store, a zero-length interval, and zero-length intervals
+        at the start and end of another. """
+    column = lambda values: np.array(values, dtype=np.int64)
+    table = (0, column([pluginId for pluginId, _, _ in rows]), column([start for _, start, _ in rows]),
+        column([stop for _, _, stop in rows]), None, column(range(len(rows))))
+    store = TraceStore.from_tables(np.array([1, 2, 3]), NAMES, [table])
+    path = str(tmp_path / ('trace.' + fmt))
+    assert TraceExporter(store, fmt).write(path) == len(rows)
+    assert DECODERS[fmt](path)[1] == expected_rows(store)
+
+
+@pytest.mark.parametrize('fmt', ['json', 'perfetto'])
+def test_inverted_interval_is_zero_length(tmp_path, fmt):
+    """ An interval stopping before it starts, between two others of its
+        plugin. """
+    column = lambda values: np.array(values, dtype=np.int64)
+    table = (0, column([1, 1, 1]), column([10, 30, 40]), column([30, 25, 50]), None, column([0, 1, 2]))
+    store = TraceStore.from_tables(np.array([1, 2, 3]), NAMES, [table])
+    path = str(tmp_path / ('trace.' + fmt))
+    assert TraceExporter(store, fmt).write(path) == 3
+    assert DECODERS[fmt](path)[1] == [(NAMES[0], 10, 30, SOURCES[0], 0), (NAMES[0], 30, 30, SOURCES[0], 1),
+        (NAMES[0], 40, 50, SOURCES[0], 2)]
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    store = random_store(np.random.default_rng(0), 200)
+    path = tmp_path / 'trace.json'
+    exporter = TraceExporter(store, 'json')
+    exporter.chunkSz = 10
+    def progress(percent, message):
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        exporter.write(str(path), progress=progress)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_perfetto_parses_with_perfetto_protos(tmp_path):
+    """ The trace parses with Perfetto's own protos, if installed. """
+    protos = pytest.importorskip('perfetto.protos.perfetto.trace.perfetto_trace_pb2')
+    store = random_store(np.random.default_rng(3), 100)
+    path = str(tmp_path / 'trace.perfetto-trace')
+    TraceExporter(store, 'perfetto').write(path)
+    trace = protos.Trace()
+    with open(path, 'rb') as traceFile:
+        trace.ParseFromString(traceFile.read())
+    begins = [packet for packet in trace.packet
+        if packet.HasField('track_event') and packet.track_event.type == protos.TrackEvent.TYPE_SLICE_BEGIN]
+    ends = [packet for packet in trace.packet
+        if packet.HasField('track_event') and packet.track_event.type == protos.TrackEvent.TYPE_SLICE_END]
+    assert len(begins) == len(ends) == len(store)
+    assert sorted((packet.track_event.name.rsplit(" (", 1)[0], packet.timestamp, packet.track_event.categories[0])
+        for packet in begins) == sorted((name, start, category) for name, start, _, category, _ in expected_rows(store))
+    assert trace.packet[0].track_descriptor.name == "ILLIXR"
@@ -0,0 +1,91 @@
+# Filename: test_trace_store.py
+""" Tests of the TraceStore's columns, plugin codes and windows against
+    the rows of small random tables, and of empty and single-interval
+    stores. """
+
+import numpy as np
+import pytest
+
+from illixr_store import LANE_NAMES, TraceStore
+from synthetic import random_tables, store_rows, table_rows
+
+
+def test_from_tables_merges_rows(rng):
+    tables = random_tables(rng, [3, 7, 11, 42], 150)
+    store = TraceStore.from_tables(np.array([3, 7, 11]), ['a', 'b', 'c'], tables)
+    assert store_rows(store) == table_rows(tables)
+    nameOf = {3: 'a', 7: 'b', 11: 'c', 42: '42'} # IDs missing from the name table are named after their ID
+    assert [store.names[code] for code in range(len(store.names))] == [nameOf[pluginId] for pluginId in store.pluginIds]
+    assert store.codes.dtype == np.int16
+
+
+def test_rebase_shifts_times(rng):
+    tables = random_tables(rng, [1, 2], 100, span=10**6)
+    tables = [(source, ids, starts + 10**12, stops + 10**12, skips, iterations)
+        for source, ids, starts, stops, skips, iterations in tables]
+    store, rebased = (TraceStore.from_tables(np.array([1, 2]), ['x', 'y'], tables, rebase) for rebase in (False, True))
+    assert store.origin == 0
+    assert rebased.origin == (store.starts[0] if len(store) else 0)
+    np.testing.assert_array_equal(rebased.starts + rebased.origin, store.starts)
+    np.testing.assert_array_equal(rebased.stops + rebased.origin, store.stops)
+
+
+def test_lanes_named():
+    # Sources without plugin IDs are drawn under the IDs of their lanes
+    laneId, lane = next(iter(LANE_NAMES.items()))
+    tables = [(0, np.array([1]), np.array([0]), np.array([5]), None, None), (2, np.array([laneId]), np.array([3]), np.array([4]), None, None)]
+    store = TraceStore.from_tables(np.array([1]), ['x'], tables)
+    assert store.plugin_order() == ['x', lane]
+
+
+def test_window_matches_scan(rng):
+    tables = random_tables(rng, [1, 2, 3], 200)
+    store = TraceStore.from_tables(np.array([1, 2, 3]), ['x', 'y', 'z'], tables)
+    rows = table_rows(tables)
+    for a, width in zip(rng.integers(-100, 10000, 100), rng.integers(0, 2000, 100)):
+        a, b = int(a), int(a + width)
+        window = store.window(a, b)
+        expected = [(pluginId, max(start, a), min(stop, b), source) for pluginId, start, stop, source in rows
+            if start < b and stop >= a]
+        assert sorted(zip(store.pluginIds[window.codes].tolist(), window.starts.tolist(), window.stops.tolist(),
+            window.sources.tolist())) == sorted(expected)
+        assert np.all(np.diff(window.starts) >= 0)
+
+
+def test_plugin_order(rng):
+    tables = random_tables(rng, [1, 2, 3], 100)
+    store = TraceStore.from_tables(np.array([1, 2, 3]), ['x', 'y', 'z'], tables)
+    firsts = {}
+    for pluginId, start, _, _ in table_rows(tables):
+        firsts.setdefault(pluginId, start)
+    assert store.plugin_order() == [{1: 'x', 2: 'y', 3: 'z'}[pluginId] for pluginId in firsts]
+
+
+def test_equal_starts_keep_table_order():
+    tables = [(0, np.array([1, 2]), np.array([5, 9]), np.array([6, 10]), None, None),
+        (1, np.array([2, 1]), np.array([5, 5]), np.array([7, 8]), np.array([0, 2]), None)]
+    store = TraceStore.from_tables(np.array([1, 2]), ['x', 'y'], tables)
+    assert store_rows(store) == [(1, 5, 6, 0), (2, 5, 7, 1), (1, 5, 8, 1), (2, 9, 10, 0)]
+
+
+def test_empty_store():
+    empty = np.empty(0, dtype=np.int64)
+    store = TraceStore.from_tables(np.array([1]), ['x'], [(0, empty, empty, empty, None, None), (1, empty, empty, empty, empty, None)])
+    assert len(store) == 0
+    assert store.plugin_order() == []
+    assert store.page_count(1000) == 1
+    assert len(store.window(0, 1000).codes) == 0
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    (0, 100, []),             # Ends where the interval starts
+    (150, 160, [(150, 160)]), # Inside the interval
+    (50, 150, [(100, 150)]),
+    (200, 300, [(200, 200)]), # Starts where it stops: clipped to zero length
+    (201, 300, []),
+])
+def test_single_interval_windows(a, b, expected):
+    store = TraceStore.from_tables(np.array([1]), ['x'], [(0, np.array([1]), np.array([100]), np.array([200]), None, None)])
+    window = store.window(a, b)
+    assert list(zip(window.starts.tolist(), window.stops.tolist())) == expected
+    assert window.codes.tolist() == [0] * len(expected)
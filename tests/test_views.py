@@ -0,0 +1,75 @@
+# Filename: test_views.py
+""" Tests of the figures drawn for pages and for ranges zoomed or panned
+    to, against the intervals in the range. """
+
+import numpy as np
+import pytest
+
+from illixr_model import PageRequest, VisualizerModel
+from illixr_store import TraceStore
+from synthetic import random_ranges, random_tables
+
+
+def request(store, page=None, span=None):
+    return PageRequest(page, 1000, store.plugin_order(), 'cpu', store, False, False, span)
+
+
+@pytest.fixture
+def store(rng):
+    return TraceStore.from_tables(np.array([1, 2, 3]), ['a', 'b', 'c'], random_tables(rng, [1, 2, 3], 100))
+
+
+def test_data_ranges(store):
+    model = VisualizerModel()
+    assert model.data_range(request(store, 3)) == (3000, 4000)
+    assert model.data_range(request(store)) == (store.index.minStart, store.index.maxStop + 1)
+    assert model.data_range(request(store, 3, (2000, 2400))) == (1800, 2600) # The view has margins
+    assert model.data_range(request(store, span=(5, 5))) == (5, 5)
+
+
+def test_views_draw_their_intervals(rng, store):
+    model = VisualizerModel()
+    for span in random_ranges(rng, 10000, 20):
+        fig = model.create_fig(request(store, span=span))
+        window = store.window(*model.data_range(request(store, span=span)))
+        if len(window.codes) == 0:
+            assert fig is None
+            continue
+        assert list(fig.layout.xaxis.range) == list(span)
+        drawn = sorted((trace.name, int(start), int(stop)) for trace in fig.data
+            for start, stop in zip(trace.x[0::3], trace.x[1::3]))
+        assert drawn == sorted(zip(store.names[window.codes].tolist(), window.starts.tolist(), window.stops.tolist()))
+
+
+def test_dense_views_draw_occupancy(store):
+    model = VisualizerModel()
+    model.rawEventLimit = 5
+    span = (store.index.minStart, store.index.maxStop + 1)
+    assert not model.is_exact(store, *span)
+    fig = model.create_fig(request(store, span=span))
+    assert [trace.type for trace in fig.data] == ['heatmap']
+    assert list(fig.layout.xaxis.range) == list(span)
+
+
+def test_page_of_unlisted_plugins_draws_nothing(store):
+    """ A poll can add rows of plugins not yet in the plot order. """
+    model = VisualizerModel()
+    page = int(store.starts[0]) // 1000
+    assert model.create_fig(PageRequest(page, 1000, [], 'cpu', store, False)) is None
+
+
+def test_exact_range(rng, store):
+    """ The range a figure draws one interval at a time is its data
+        range, unless it draws occupancy. """
+    model = VisualizerModel()
+    model.rawEventLimit = 20
+    kinds = set()
+    for span in random_ranges(rng, 10000, 40):
+        dataRange = model.data_range(request(store, span=span))
+        exact = model.exact_range(request(store, span=span))
+        assert exact == (dataRange if model.is_exact(store, *dataRange) else None)
+        fig = model.create_fig(request(store, span=span))
+        if fig is not None:
+            assert ('heatmap' in [trace.type for trace in fig.data]) == (exact is None)
+            kinds.add(exact is None)
+    assert kinds == {False, True}